@@ -74,6 +74,9 @@ def run(kwargs: dict, model_params_list: list, filename_list: list):
         elif run_option == PARAMETER_GRID_SEARCH:
             param_grid = config.get_param_grid()
             SingleTrajectoryAnalyser(data_class, params).grid_search(param_grid)
+        elif run_option == HALVING_GRID_SEARCH:
+            param_grid = config.get_param_grid()
+            SingleTrajectoryAnalyser(data_class, params).halving_grid_search(param_grid)
         elif run_option == TRAJECTORY_SUBSET_ANALYSIS:
             SingleTrajectoryAnalyser(data_class, params).compare_trajectory_subsets(model_params_list)
         else:
@@ -5,7 +5,8 @@ import warnings
 import pandas as pd
 
 import preprocessing.weather_preprocessing as wp
-from trajectory import ProteinTrajectory, SubTrajectoryDecorator, WeatherTrajectory, DataTrajectory
+from trajectory import ProteinTrajectory, SubTrajectoryDecorator, WeatherTrajectory, DataTrajectory, \
+    StreamingProteinTrajectory
 from utils.param_keys import *
 from utils.param_keys.analyses import *
 from utils.param_keys.kernel_functions import *
@@ -170,7 +171,8 @@ def get_model_params_list(alg_json_file: str) -> list[dict]:
             # NTH_EIGENVECTOR: int
             # LAG_TIME: int
             # *** Boolean Parameters:
-            # CORR_KERNEL, ONES_ON_KERNEL_DIAG, USE_STD, CENTER_OVER_TIME, EXTRA_DR_LAYER
+            # CORR_KERNEL, ONES_ON_KERNEL_DIAG, USE_STD, CENTER_OVER_TIME, EXTRA_DR_LAYER,
+            # USE_KRONECKER_STRUCTURE (False: dense reference decomposition of tensor models)
 
             {ALGORITHM_NAME: 'pca', NDIM: TENSOR_NDIM, KERNEL_MAP: KERNEL_ONLY, KERNEL_FUNCTION: MY_GAUSSIAN},
             # {ALGORITHM_NAME: 'tica', NDIM: TENSOR_NDIM, KERNEL: KERNEL_ONLY, LAG_TIME: params[LAG_TIME]},
@@ -223,6 +225,8 @@ def get_data_class(params: dict, kwargs: dict) -> [DataTrajectory, SubTrajectory
             return WeatherTrajectory(**kwargs)
         elif data_set_name == "sub_protein":
             return SubTrajectoryDecorator(data_trajectory=ProteinTrajectory(**kwargs), **kwargs)
+        elif data_set_name == "streaming_protein":
+            return StreamingProteinTrajectory(**kwargs)
         else:  # "protein"
             return ProteinTrajectory(**kwargs)
     else:
@@ -17,7 +17,9 @@ from trajectory import ProteinTrajectory, DataTrajectory, SubTrajectoryDecorator
 from utils import statistical_zero, get_algorithm_name
 from utils.algorithms.dropp import DROPP
 from utils.errors import InvalidReconstructionException, InvalidProteinTrajectory
+from utils.grid_search import ParallelGridSearch, SuccessiveHalvingSearch, negated_reconstruction_error
 from utils.matrix_tools import calculate_symmetrical_kernel_matrix, reconstruct_matrix
+from utils.stage_cache import StageCache
 from utils.param_keys import *
 from utils.param_keys.analyses import COLOR_MAP, KERNEL_COMPARE
 from utils.param_keys.model import KERNEL_FUNCTION, USE_ORIGINAL_DATA, ALGORITHM_NAME
@@ -34,7 +36,8 @@ class SingleTrajectoryAnalyser:
             INTERACTIVE: params.get(INTERACTIVE, True),
             N_COMPONENTS: params.get(N_COMPONENTS, 2),
             PLOT_FOR_PAPER: params.get(PLOT_FOR_PAPER, False),
-            ENABLE_SAVE: params.get(ENABLE_SAVE, False)
+            ENABLE_SAVE: params.get(ENABLE_SAVE, False),
+            N_JOBS: params.get(N_JOBS, 1)
         }
 
     def compare(self, model_parameter_list: list[dict], plot_results: bool = True) -> list[dict]:
@@ -50,13 +53,15 @@ class SingleTrajectoryAnalyser:
             The results of the models {MODEL, PROJECTION, EXPLAINED_VAR, INPUT_PARAMS}
         """
         model_results = []
-        for model_parameters in model_parameter_list:
-            try:
-                model_results.append(self.trajectory.get_model_result(model_parameters))
-            except np.linalg.LinAlgError as e:
-                warnings.warn(f'Eigenvalue decomposition for model `{model_parameters}` could not be calculated:\n {e}')
-            except AssertionError as e:
-                warnings.warn(f'{e}')
+        with StageCache():  # The models share the stages, which do not depend on their differing parameters
+            for model_parameters in model_parameter_list:
+                try:
+                    model_results.append(self.trajectory.get_model_result(model_parameters))
+                except np.linalg.LinAlgError as e:
+                    warnings.warn(f'Eigenvalue decomposition for model `{model_parameters}` '
+                                  f'could not be calculated:\n {e}')
+                except AssertionError as e:
+                    warnings.warn(f'{e}')
 
         if plot_results:
             self.compare_with_plot(model_results)
@@ -79,21 +84,28 @@ class SingleTrajectoryAnalyser:
             components=self.params[N_COMPONENTS]
         )
 
-    def plot_eigenvalues(self, model_parameter_list):
+    def plot_eigenvalues(self, model_parameter_list, n_eigenvalues=None):
         """
         Plots the values of the eigenvalues.
         @param model_parameter_list: list[dict]
             Different model input parameters, saved in a list.
+        @param n_eigenvalues: int
+            Number of the largest eigenvalues to plot (default: None, all eigenvalues).
+            DROPP models with a partial solver calculate only these eigenvalues.
         """
         model_results_list = self.compare(model_parameter_list, plot_results=False)
         for model_result in model_results_list:
             model = model_result[MODEL]
+            if isinstance(model, DROPP):
+                eigenvalues = model.get_eigenvalues(n_eigenvalues)
+            else:
+                eigenvalues = model.explained_variance_[:n_eigenvalues]
             ArrayPlotter(
                 title_prefix=f'Eigenvalues of\n{model}',
                 x_label='Num. Components',
                 y_label='Eigenvalue',
                 for_paper=self.params[PLOT_FOR_PAPER]
-            ).plot_2d(ndarray_data=model.explained_variance_)
+            ).plot_2d(ndarray_data=eigenvalues)
 
     def compare_trajectory_subsets(self, model_params_list):
         if isinstance(self.trajectory, SubTrajectoryDecorator):
@@ -110,21 +122,45 @@ class SingleTrajectoryAnalyser:
     def grid_search(self, param_grid: list[dict]):
         """
         Runs a grid search, to find the best input for the DAANCCER algorithm.
+        The candidates are fitted in parallel processes, if the parameter `n_jobs` is not 1.
         @param param_grid: list[dict]
             List of different parameters, which sets the search space.
         """
         print('Searching for best model...')
-        model = DROPP()
         inp = self.trajectory.data_input()  # Cannot train for different ndim at once
         cv = [(slice(None), slice(None))]  # get rid of cross validation
-        grid = GridSearchCV(model, param_grid, cv=cv, verbose=1)
-        grid.fit(inp, n_components=self.trajectory.params[N_COMPONENTS])
+        if self.params[N_JOBS] != 1:
+            grid = ParallelGridSearch(param_grid, cv=cv, n_jobs=self.params[N_JOBS], verbose=1)
+            grid.fit(inp, n_components=self.trajectory.params[N_COMPONENTS])
+        else:
+            grid = GridSearchCV(DROPP(), param_grid, cv=cv, scoring=negated_reconstruction_error, verbose=1)
+            with StageCache():
+                grid.fit(inp, n_components=self.trajectory.params[N_COMPONENTS])
         AnalyseResultsSaver(
             trajectory_name=self.trajectory.params[TRAJECTORY_NAME],
             filename=f'grid_search_{self.trajectory.filename[:-4]}',
             enable_save=self.params[ENABLE_SAVE]
         ).save_to_csv(grid.cv_results_)
 
+    def halving_grid_search(self, param_grid: list[dict]):
+        """
+        Runs a successive halving grid search, to find the best input for the DAANCCER algorithm.
+        All the candidates are scored on a short part of the trajectory, and only the best third of them
+        is promoted to the next iteration with three times more frames, until the whole trajectory is used.
+        @param param_grid: list[dict]
+            List of different parameters, which sets the search space.
+        """
+        print('Searching for best model with successive halving...')
+        inp = self.trajectory.data_input()  # Cannot train for different ndim at once
+        cv = [(slice(None), slice(None))]  # get rid of cross validation
+        grid = SuccessiveHalvingSearch(param_grid, cv=cv, n_jobs=self.params[N_JOBS], verbose=1)
+        grid.fit(inp, n_components=self.trajectory.params[N_COMPONENTS])
+        AnalyseResultsSaver(
+            trajectory_name=self.trajectory.params[TRAJECTORY_NAME],
+            filename=f'halving_grid_search_{self.trajectory.filename[:-4]}',
+            enable_save=self.params[ENABLE_SAVE]
+        ).save_to_csv(grid.cv_results_)
+
 
 class SingleProteinTrajectoryAnalyser(SingleTrajectoryAnalyser):
     def __init__(self, trajectory, params=None):
@@ -166,7 +202,8 @@ class MultiTrajectoryAnalyser:
             INTERACTIVE: params.get(INTERACTIVE, True),
             PLOT_FOR_PAPER: params.get(PLOT_FOR_PAPER, False),
             TRANSFORM_ON_WHOLE: params.get(TRANSFORM_ON_WHOLE, False),
-            ENABLE_SAVE: params.get(ENABLE_SAVE, False)
+            ENABLE_SAVE: params.get(ENABLE_SAVE, False),
+            N_JOBS: params.get(N_JOBS, 1)
         }
 
     def compare_pcs(self, model_params_list: list[dict]):
@@ -373,19 +410,23 @@ class MultiTrajectoryAnalyser:
     def grid_search(self, param_grid):
         """
         Runs a grid search for multiple trajectories, to find the best input for the DAANCCER algorithm.
+        The candidates are fitted in parallel processes, if the parameter `n_jobs` is not 1.
         @param param_grid: list[dict]
             List of different parameters, which sets the search space.
         """
         print('Searching for best model...')
         train_trajectories = self.trajectories[:int(len(self.trajectories) * .8)]
         # test_trajectories = self.trajectories[int(len(self.trajectories) * .8):]
-        inp = train_trajectories[0].data_input()  # Works only for TENSOR_DIM_INPUT
-        for trajectory in train_trajectories[1:]:
-            np.concatenate((inp, trajectory.data_input()), axis=0)
-        model = DROPP()
+        # The model pools the statistics of the trajectories, the folds are whole trajectories
+        inp = [trajectory.data_input() for trajectory in train_trajectories]
         cv = len(train_trajectories)
-        grid = GridSearchCV(model, param_grid, cv=cv, verbose=1)
-        grid.fit(inp, n_components=self.params[N_COMPONENTS])
+        if self.params[N_JOBS] != 1:
+            grid = ParallelGridSearch(param_grid, cv=cv, n_jobs=self.params[N_JOBS], verbose=1)
+            grid.fit(inp, n_components=self.params[N_COMPONENTS])
+        else:
+            grid = GridSearchCV(DROPP(), param_grid, cv=cv, scoring=negated_reconstruction_error, verbose=1)
+            with StageCache():
+                grid.fit(inp, n_components=self.params[N_COMPONENTS])
         AnalyseResultsSaver(
             trajectory_name=self.params[TRAJECTORY_NAME],
             filename='grid_search_all',
@@ -563,6 +604,9 @@ class MultiTrajectoryAnalyser:
             to models fitted on a different trajectory.
         @return:
         """
+        if all(isinstance(model_dict_list[traj_index][MODEL], DROPP) for traj_index in range(len(self.trajectories))):
+            return self._get_reconstruction_score_curves(model_dict_list, fit_transform_re)
+
         scores_on_component_span: list = []
         for component in tqdm(range(1, self.trajectories[DUMMY_ZERO].max_components + 1)):
             try:
@@ -573,6 +617,82 @@ class MultiTrajectoryAnalyser:
                 break
         return np.array(scores_on_component_span)
 
+    def _get_reconstruction_score_curves(self, model_dict_list: list[dict],
+                                         fit_transform_re: bool = True) -> np.ndarray:
+        """
+        Calculates the reconstruction errors of the trajectories over the component span for DROPP models.
+        The errors of all the component counts are calculated in one pass with `DROPP.score_curve`,
+        instead of reconstructing the data for each component count.
+        @param model_dict_list: list
+            model results dict in a list
+        @param fit_transform_re: bool (default = True)
+            Should be calculated the fit_transform on the same data
+            or the transformation steps of trajectories should be applied
+            to models fitted on a different trajectory.
+        @return: reconstruction errors with shape (component_span, n_trajectories)
+        """
+        max_components = self.trajectories[DUMMY_ZERO].max_components
+        score_curves: list = []
+        for traj_index, fitted_trajectory in enumerate(tqdm(self.trajectories)):
+            model_dict = model_dict_list[traj_index]
+            model = model_dict[MODEL]
+            try:
+                if fit_transform_re:
+                    input_data = self._get_input_data(fitted_trajectory, model_dict[INPUT_PARAMS])
+                    score_curves.append(self._get_reconstruction_score_curve(model, input_data, max_components,
+                                                                             model_dict[PROJECTION]))
+                else:  # fit on one transform on all
+                    score_curves.append(np.median([
+                        self._get_reconstruction_score_curve(
+                            model, self._get_input_data(transform_trajectory, model_dict[INPUT_PARAMS]),
+                            max_components)
+                        for transform_trajectory in self.trajectories], axis=0))
+            except InvalidReconstructionException as e:
+                warnings.warn(str(e))
+                score_curves.append(np.empty(0))
+
+        component_span = min(len(score_curve) for score_curve in score_curves)
+        return np.array([score_curve[:component_span] for score_curve in score_curves]).T
+
+    @staticmethod
+    def _get_reconstruction_score_curve(model: DROPP, input_data: np.ndarray, max_components: int,
+                                        data_projection: [np.ndarray, None] = None) -> np.ndarray:
+        """
+        Calculates the reconstruction scores of a DROPP model for the component counts 1, ..., max_components.
+        If the model has fewer components, the curve ends at the last component of the model (with a warning).
+        @param model: DROPP
+            fitted model
+        @param input_data: np.ndarray
+            original data before transforming
+        @param max_components: int
+            largest number of components
+        @param data_projection: np.ndarray (optional)
+            the transformed data. If this is not calculated, then the transformation step is used to calculate it.
+        @return: Root Mean Squared Errors of the reconstructions with 1, ..., max_components components
+        """
+        if data_projection is None:
+            data_projection = model.transform(input_data)
+        n_components = min(data_projection.shape[1], model.components_.shape[0])
+        if max_components > n_components:
+            warnings.warn(f'Model does not have {max_components} many components. Max: {n_components}')
+            max_components = n_components
+        return model.score_curve(input_data, data_projection, max_components)
+
+    def _get_input_data(self, trajectory: DataTrajectory, model_params: dict) -> np.ndarray:
+        """
+        Get the input data of a trajectory for the reconstruction,
+        which is the full input of sub-trajectories, if the transformation is on the whole trajectory.
+        @param trajectory: DataTrajectory
+        @param model_params: dict
+            used to determine the data_input of the trajectory
+        @return: input data
+        """
+        if (self.params[TRANSFORM_ON_WHOLE] and
+                isinstance(trajectory, SubTrajectoryDecorator)):
+            with trajectory.use_full_input():
+                return trajectory.data_input(model_params)
+        return trajectory.data_input(model_params)
+
     def _models_re_for_component(self, component: int, fit_transform_re: bool, model_dict_list: list) -> list:
         all_models_reconstruction_scores: list = []
         for traj_index, fitted_trajectory in enumerate(self.trajectories):
@@ -599,12 +719,7 @@ class MultiTrajectoryAnalyser:
         :param model_result_dict:
         :return:
         """
-        if (self.params[TRANSFORM_ON_WHOLE] and
-                isinstance(fitted_trajectory, SubTrajectoryDecorator)):
-            with fitted_trajectory.use_full_input():
-                input_data = fitted_trajectory.data_input(model_result_dict[INPUT_PARAMS])
-        else:
-            input_data = fitted_trajectory.data_input(model_result_dict[INPUT_PARAMS])
+        input_data = self._get_input_data(fitted_trajectory, model_result_dict[INPUT_PARAMS])
         matrix_ndim_projection = model_result_dict[PROJECTION]
         return self._get_reconstruction_score(model, input_data, matrix_ndim_projection, component)
 
@@ -626,13 +741,7 @@ class MultiTrajectoryAnalyser:
         """
         transform_score = []
         for transform_trajectory in self.trajectories:
-            if (self.params[TRANSFORM_ON_WHOLE] and
-                    isinstance(transform_trajectory, SubTrajectoryDecorator)):
-                with transform_trajectory.use_full_input():
-                    input_data = transform_trajectory.data_input(model_params)
-            else:
-                input_data = transform_trajectory.data_input(model_params)
-
+            input_data = self._get_input_data(transform_trajectory, model_params)
             matrix_projection = model.transform(input_data)
 
             transform_score.append(
@@ -1,11 +1,19 @@
+import os
+import tempfile
 import unittest
 from unittest.mock import patch
 
 import numpy.testing as np_testing
 
+from sklearn.decomposition import PCA
+
+import utils.matrix_tools
 from utils.algorithms.dropp import *
 from utils.errors import ModelNotFittedError
-from utils.matrix_tools import co_mad
+from utils.matrix_tools import co_mad, matrix_bandwidth
+from utils.math import explained_variance
+from utils.param_keys.kernel_functions import MY_EPANECHNIKOV, MY_SINC
+from utils.stage_cache import StageCache
 
 
 class TestDROPPInitialization(unittest.TestCase):
@@ -21,7 +29,8 @@ class TestDROPPInitialization(unittest.TestCase):
             KERNEL_STAT_FUNC: statistical_zero,
             USE_ORIGINAL_DATA: False,
             CORR_KERNEL: False,
-            ONES_ON_KERNEL_DIAG: False
+            ONES_ON_KERNEL_DIAG: False,
+            ITERATIVE_KERNEL_FIT: False
         })
         self.assertEqual(dropp.cov_function, np.cov)
         self.assertEqual(dropp.lag_time, 0)
@@ -39,7 +48,8 @@ class TestDROPPInitialization(unittest.TestCase):
             KERNEL_STAT_FUNC: np.median,
             USE_ORIGINAL_DATA: True,
             CORR_KERNEL: True,
-            ONES_ON_KERNEL_DIAG: True
+            ONES_ON_KERNEL_DIAG: True,
+            ITERATIVE_KERNEL_FIT: True
         }
         dropp = DROPP(
             cov_stat_func=co_mad,
@@ -255,3 +265,822 @@ class TestDROPPGetCombinedCovarianceMatrix(unittest.TestCase):
             combined_cov_matrix = self.dropp.get_combined_covariance_matrix()
             self.assertEqual((10, 10), combined_cov_matrix.shape)
             plot_mocker.assert_called_once()
+
+
+class TestDROPPBatchedCovarianceTensor(unittest.TestCase):
+    def setUp(self):
+        warnings.simplefilter("ignore", category=UserWarning)
+        self.data_tensor = np.random.RandomState(42).rand(120, 6, 4)
+
+    def _fit(self, **params):
+        dropp = DROPP(kernel_kwargs={KERNEL_MAP: None}, **params)
+        return dropp.fit(self.data_tensor)
+
+    def test_covariance_tensor_equals_layer_wise(self):
+        for cov_function in [np.cov, np.corrcoef]:
+            dropp = self._fit(cov_function=cov_function)
+            data = dropp._standardized_data
+            expected = [cov_function(data[:, :, index].T) for index in range(data.shape[2])]
+            np_testing.assert_array_almost_equal(np.asarray(expected), dropp._get_covariance_tensor())
+
+    def test_lagged_correlation_tensor_equals_layer_wise(self):
+        dropp = self._fit(algorithm_name='tica', lag_time=7)
+        data = dropp._standardized_data
+        expected = []
+        for index in range(data.shape[2]):
+            dot_i = np.dot(data[:-7, :, index].T, data[7:, :, index]) / (data.shape[0] - 7)
+            expected.append(0.5 * (dot_i + dot_i.T))
+        np_testing.assert_array_almost_equal(np.asarray(expected), dropp._get_tensor_correlation())
+
+    def test_fused_matrices_equal_tensor_mean(self):
+        for params in [{}, {'algorithm_name': 'tica', 'lag_time': 7}]:
+            dropp = self._fit(**params)
+            self.assertTrue(dropp._use_fused_mean_reduction)
+            np_testing.assert_array_almost_equal(np.mean(dropp._get_covariance_tensor(), axis=0),
+                                                 dropp.get_combined_covariance_matrix())
+            np_testing.assert_array_almost_equal(np.mean(dropp._get_tensor_correlation(), axis=0),
+                                                 dropp._get_correlations_matrix(block_expand=False))
+
+    def test_median_statistic_uses_tensor(self):
+        dropp = self._fit(cov_stat_func=np.median)
+        self.assertFalse(dropp._use_fused_mean_reduction)
+        np_testing.assert_array_almost_equal(np.median(dropp._get_covariance_tensor(), axis=0),
+                                             dropp.get_combined_covariance_matrix())
+
+
+class TestDROPPFittedStatisticsTransform(unittest.TestCase):
+    def setUp(self):
+        warnings.simplefilter("ignore", category=UserWarning)
+        random_state = np.random.RandomState(42)
+        self.data_tensor = random_state.rand(100, 6, 3)
+        self.other_tensor = random_state.rand(40, 6, 3) * 2 + 1
+        self.params = [{}, {'use_std': False}, {'center_over_time': False},
+                       {'ndim': MATRIX_NDIM, 'kernel_kwargs': {KERNEL_MAP: None}}]
+
+    def _data(self, params, tensor):
+        return tensor.reshape(tensor.shape[0], -1) if params.get('ndim') == MATRIX_NDIM else tensor
+
+    def test_fit_transform_equals_fit_and_transform(self):
+        for params in self.params:
+            data = self._data(params, self.data_tensor)
+            np_testing.assert_array_almost_equal(DROPP(**params).fit(data).transform(data),
+                                                 DROPP(**params).fit_transform(data))
+
+    def test_fitted_statistics_are_not_changed(self):
+        for params in self.params:
+            data = self._data(params, self.data_tensor)
+            other = self._data(params, self.other_tensor)
+            dropp = DROPP(**params).fit(data)
+            mean, std = np.copy(dropp.mean), np.copy(dropp._std)
+            projection = dropp.transform(other, use_fitted_statistics=True)
+            np_testing.assert_array_equal(mean, dropp.mean)
+            np_testing.assert_array_equal(std, dropp._std)
+            expected = np.dot(dropp.convert_to_matrix((other - mean) / std), dropp.components_.T)
+            np_testing.assert_array_almost_equal(expected, projection)
+
+    def test_chunked_transform_equals_transform(self):
+        dropp = DROPP().fit(self.data_tensor)
+        chunked = [dropp.transform(chunk, use_fitted_statistics=True)
+                   for chunk in np.array_split(self.data_tensor, 3)]
+        np_testing.assert_array_almost_equal(dropp.transform(self.data_tensor), np.concatenate(chunked))
+
+    def test_not_fitted(self):
+        with self.assertRaises(ModelNotFittedError):
+            DROPP().transform(self.data_tensor, use_fitted_statistics=True)
+
+
+class TestDROPPDtype(unittest.TestCase):
+    def setUp(self):
+        warnings.simplefilter("ignore", category=UserWarning)
+        self.data_tensor = np.cumsum(np.random.RandomState(42).randn(2000, 10, 3), axis=0).astype(np.float32)
+        self.params = [{}, {'algorithm_name': 'tica', 'lag_time': 5}, {'cov_stat_func': np.median},
+                       {'ndim': MATRIX_NDIM, 'kernel_kwargs': {KERNEL_MAP: None}}]
+
+    def _data(self, params):
+        if params.get('ndim') == MATRIX_NDIM:
+            return self.data_tensor.reshape(self.data_tensor.shape[0], -1)
+        return self.data_tensor
+
+    def test_float32_storage(self):
+        for params in self.params:
+            data = self._data(params)
+            dropp = DROPP(dtype=np.float32, **params).fit(data)
+            self.assertEqual(np.float32, dropp._standardized_data.dtype)
+            self.assertEqual(np.float32, dropp.get_covariance_matrix().dtype)
+            self.assertEqual(np.float32, dropp.transform(data).dtype)
+            self.assertEqual(np.float64, dropp.mean.dtype)
+
+    def test_float32_accuracy(self):
+        for params in self.params:
+            data = self._data(params)
+            expected = DROPP(**params).fit(data)
+            dropp = DROPP(dtype='float32', **params).fit(data)
+            np_testing.assert_allclose(expected.get_covariance_matrix(), dropp.get_covariance_matrix(),
+                                       rtol=1e-4, atol=1e-5)
+            np_testing.assert_allclose(expected.explained_variance_[:2], dropp.explained_variance_[:2], rtol=1e-4)
+            np_testing.assert_allclose(np.abs(expected.transform(data)), np.abs(dropp.transform(data)),
+                                       rtol=1e-3, atol=1e-3)
+
+    def test_invalid_dtype(self):
+        with self.assertRaises(ValueError):
+            DROPP(dtype=np.int32)
+
+
+class TestDROPPInPlaceStandardization(unittest.TestCase):
+    def setUp(self):
+        warnings.simplefilter("ignore", category=UserWarning)
+        self.data_tensor = np.random.RandomState(42).rand(100, 6, 3)
+
+    def test_copy_does_not_change_data(self):
+        data = np.copy(self.data_tensor)
+        DROPP().fit(data)
+        np_testing.assert_array_equal(self.data_tensor, data)
+
+    def test_standardize_in_place(self):
+        expected = DROPP().fit(self.data_tensor)
+        data = np.copy(self.data_tensor)
+        dropp = DROPP(copy=False).fit(data)
+        self.assertIs(data, dropp._standardized_data)
+        np_testing.assert_array_almost_equal(expected._standardized_data, data)
+        np_testing.assert_array_almost_equal(expected.components_, dropp.components_)
+        np_testing.assert_array_almost_equal(expected.mean, dropp.mean)
+
+    def test_standardize_into_out(self):
+        data = np.copy(self.data_tensor)
+        out = np.empty_like(data, dtype=np.float32)
+        dropp = DROPP(dtype=np.float32).fit(data, out=out)
+        self.assertIs(out, dropp._standardized_data)
+        np_testing.assert_array_equal(self.data_tensor, data)
+        np_testing.assert_array_almost_equal(DROPP().fit(data)._standardized_data, out, decimal=5)
+
+    def test_ownership_rules(self):
+        read_only = np.copy(self.data_tensor)
+        read_only.flags.writeable = False
+        with self.assertRaises(ValueError):
+            DROPP(copy=False).fit(read_only)
+        with self.assertRaises(ValueError):
+            DROPP(copy=False, dtype=np.float32).fit(np.copy(self.data_tensor))
+        with self.assertRaises(ValueError):
+            DROPP().fit(self.data_tensor, out=np.empty((100, 6, 2)))
+        data = np.copy(self.data_tensor)
+        with self.assertRaises(ValueError):
+            DROPP().fit(data[:, :, :2], out=data[:, :, 1:])
+        np_testing.assert_array_equal(self.data_tensor, data)
+
+
+class TestDROPPGeneralizedSolver(unittest.TestCase):
+    def setUp(self):
+        warnings.simplefilter("ignore", category=UserWarning)
+        self.data_tensor = np.cumsum(np.random.RandomState(42).randn(300, 8, 3), axis=0)
+        self.params = [{'algorithm_name': 'tica', 'lag_time': 5}, {'algorithm_name': 'kica', 'lag_time': 5},
+                       {'algorithm_name': 'tica', 'lag_time': 5, 'use_kronecker_structure': False,
+                        'kernel_kwargs': {KERNEL_MAP: None}},
+                       {'algorithm_name': 'tica', 'lag_time': 5, 'ndim': MATRIX_NDIM,
+                        'kernel_kwargs': {KERNEL_MAP: None}}]
+
+    def _fit(self, params):
+        data = self.data_tensor
+        if params.get('ndim') == MATRIX_NDIM:
+            data = data.reshape(data.shape[0], -1)
+        return DROPP(**params).fit(data)
+
+    def test_equals_general_solver(self):
+        for params in self.params:
+            dropp = self._fit(params)
+            correlation_matrix = dropp._get_correlations_matrix(block_expand=not dropp._is_kronecker_structured)
+            expected = scipy.linalg.eig(correlation_matrix, b=dropp._covariance_matrix, right=False)
+            eigenvalues, eigenvectors = dropp._get_sorted_eigenpairs()
+            self.assertFalse(np.iscomplexobj(eigenvalues))
+            np_testing.assert_array_almost_equal(np.sort(np.abs(expected))[::-1], eigenvalues)
+            np_testing.assert_array_almost_equal(np.ones(eigenvectors.shape[1]),
+                                                 np.linalg.norm(eigenvectors, axis=0))
+
+    def test_regularization(self):
+        dropp = DROPP(algorithm_name='tica', lag_time=5, regularization=0.1).fit(self.data_tensor)
+        correlation_matrix = dropp._get_correlations_matrix(block_expand=False)
+        covariance_matrix = dropp._covariance_matrix + 0.1 * np.mean(np.diag(dropp._covariance_matrix)) * np.eye(8)
+        expected = scipy.linalg.eigh(correlation_matrix, covariance_matrix, eigvals_only=True)
+        np_testing.assert_array_almost_equal(np.sort(np.abs(expected))[::-1], dropp._get_sorted_eigenpairs()[0])
+
+    def test_not_positive_definite_covariance(self):
+        dropp = DROPP(algorithm_name='tica', lag_time=5, ndim=MATRIX_NDIM)
+        dropp.fit(self.data_tensor.reshape(300, -1))
+        correlation_matrix = dropp._get_correlations_matrix()
+        negative_definite = -np.eye(len(correlation_matrix))
+        with self.assertWarns(UserWarning):
+            dropp._get_generalized_eigenpairs(correlation_matrix, negative_definite)
+        with self.assertRaises(np.linalg.LinAlgError):
+            dropp._get_generalized_eigenpairs(correlation_matrix, negative_definite, n_eigenpairs=2)
+
+    def test_negative_regularization(self):
+        with self.assertRaises(ValueError):
+            DROPP(algorithm_name='tica', lag_time=5, regularization=-1)
+
+
+class TestDROPPFitLagTimes(unittest.TestCase):
+    def setUp(self):
+        warnings.simplefilter("ignore", category=UserWarning)
+        self.data_tensor = np.cumsum(np.random.RandomState(42).randn(200, 8, 3), axis=0)
+        self.lag_times = [1, 5, 10]
+
+    def test_equals_fit(self):
+        for params, data in [({'kernel_kwargs': {KERNEL_MAP: None}}, self.data_tensor),
+                             ({'ndim': MATRIX_NDIM, 'kernel_kwargs': {KERNEL_MAP: None}},
+                              self.data_tensor.reshape(200, 24))]:
+            models, timescales = DROPP(algorithm_name='tica', **params).fit_lag_times(data, self.lag_times,
+                                                                                      n_components=3)
+            self.assertEqual((3, 3), timescales.shape)
+            for lag_time, model, model_timescales in zip(self.lag_times, models, timescales):
+                expected = DROPP(algorithm_name='tica', lag_time=lag_time, **params).fit(data, n_components=3)
+                self.assertEqual(lag_time, model.lag_time)
+                np_testing.assert_array_almost_equal(expected.explained_variance_, model.explained_variance_)
+                np_testing.assert_array_almost_equal(np.abs(expected.components_), np.abs(model.components_))
+                np_testing.assert_array_almost_equal(
+                    -lag_time / np.log(np.abs(expected.explained_variance_[:3])), model_timescales)
+
+    def test_fft_equals_matrix_products(self):
+        lag_times = list(range(1, 31))
+        model = DROPP(algorithm_name='tica', kernel_kwargs={KERNEL_MAP: None})
+        expected_models, expected_timescales = model.fit_lag_times(self.data_tensor, lag_times, n_components=3)
+        with patch('scipy.fft.rfft', wraps=scipy.fft.rfft) as rfft:
+            models, timescales = model.fit_lag_times(self.data_tensor, lag_times, fft_cost_factor=0, n_components=3)
+        self.assertEqual(1, rfft.call_count)
+        np_testing.assert_array_almost_equal(expected_timescales, timescales)
+        for expected, model in zip(expected_models, models):
+            np_testing.assert_array_almost_equal(np.abs(expected.components_), np.abs(model.components_))
+
+    def test_not_time_lagged(self):
+        with self.assertRaises(ValueError):
+            DROPP().fit_lag_times(self.data_tensor, self.lag_times)
+
+
+class TestDROPPExtraDRLayer(unittest.TestCase):
+    def setUp(self):
+        warnings.simplefilter("ignore", category=UserWarning)
+        self.data_tensor = np.random.RandomState(42).rand(100, 7, 3)
+
+    @staticmethod
+    def _get_eigenvectors_with_pca_layer(dropp, eigenvectors, eigenvalues):
+        eigenvalues2 = []
+        eigenvectors2 = []
+        for component in range(dropp._feature_dim):
+            vector_from = component * dropp._combine_dim
+            vector_to = (component + 1) * dropp._combine_dim
+            model = PCA(n_components=1, svd_solver='full')
+            model.fit(eigenvectors[:, vector_from:vector_to])
+            eigenvalues2.append(np.sum(eigenvalues[vector_from:vector_to] * model.explained_variance_[0]))
+            eigenvectors2.append(np.dot(eigenvectors[:, vector_from:vector_to], model.components_[0]))
+        return np.asarray(eigenvalues2), np.asarray(eigenvectors2).T
+
+    def test_equals_pca_per_feature(self):
+        dropp = DROPP(extra_dr_layer=True).fit(self.data_tensor)
+        random_state = np.random.RandomState(42)
+        for n_rows in [21, 600]:
+            eigenvectors = random_state.rand(n_rows, 21)
+            eigenvalues = np.sort(random_state.rand(21))[::-1]
+            expected_eigenvalues, expected_eigenvectors = self._get_eigenvectors_with_pca_layer(
+                dropp, eigenvectors, eigenvalues)
+            dropp.explained_variance_ = eigenvalues
+            np_testing.assert_array_almost_equal(expected_eigenvectors,
+                                                 dropp._get_eigenvectors_with_dr_layer(eigenvectors))
+            np_testing.assert_array_almost_equal(expected_eigenvalues, dropp.explained_variance_)
+
+    def test_fit(self):
+        dropp = DROPP(extra_dr_layer=True).fit(self.data_tensor, n_components=3)
+        self.assertEqual((3, 21), dropp.components_.shape)
+        self.assertEqual((7,), dropp.explained_variance_.shape)
+
+
+class TestDROPPInverseCache(unittest.TestCase):
+    def setUp(self):
+        warnings.simplefilter("ignore", category=UserWarning)
+        self.data_tensor = np.random.RandomState(42).rand(100, 6, 3)
+
+    def test_inverse_is_cached(self):
+        dropp = DROPP(use_kronecker_structure=False).fit(self.data_tensor, n_components=18)
+        projection = dropp.transform(self.data_tensor)
+        with patch('utils.algorithms.dropp.is_matrix_orthogonal', return_value=True) as orthogonal_mocker:
+            first = dropp.reconstruct(projection[:, :5], 5)
+            second = dropp.reconstruct(projection[:, :5], 5)
+            orthogonal_mocker.assert_called_once()
+        np_testing.assert_array_equal(first, second)
+
+    def test_compact_inverse_is_cached(self):
+        dropp = DROPP(algorithm_name='tica', lag_time=5).fit(self.data_tensor, n_components=18)
+        inverse_factors = dropp._get_inverse_factors()
+        self.assertIs(inverse_factors, dropp._get_inverse_factors())
+        np_testing.assert_array_almost_equal(self.data_tensor,
+                                             dropp.reconstruct(dropp.transform(self.data_tensor)))
+
+    def test_refit_invalidates_cache(self):
+        for params in [{}, {'use_kronecker_structure': False}]:
+            dropp = DROPP(**params).fit(self.data_tensor, n_components=18)
+            dropp.reconstruct(dropp.transform(self.data_tensor))
+            data = self.data_tensor[::-1] ** 2
+            dropp.fit(data, n_components=18)
+            np_testing.assert_array_almost_equal(data, dropp.reconstruct(dropp.transform(data)))
+
+
+
+class TestDROPPScoreCurve(unittest.TestCase):
+    def setUp(self):
+        warnings.simplefilter("ignore", category=UserWarning)
+        self.data_tensor = np.random.RandomState(42).rand(100, 6, 3)
+
+    @staticmethod
+    def _reconstruction_scores(model, data, projection):
+        return [mean_squared_error(model.convert_to_matrix(data),
+                                   model.convert_to_matrix(model.reconstruct(projection[:, :component], component)),
+                                   squared=False)
+                for component in range(1, projection.shape[1] + 1)]
+
+    def test_equals_reconstruction_scores(self):
+        for params, data in [({}, self.data_tensor),
+                             ({'use_kronecker_structure': False}, self.data_tensor),
+                             ({'algorithm_name': 'tica', 'lag_time': 5}, self.data_tensor),
+                             ({'algorithm_name': 'tica', 'lag_time': 5, 'use_kronecker_structure': False},
+                              self.data_tensor),
+                             ({'use_std': False}, self.data_tensor),
+                             ({'ndim': MATRIX_NDIM}, self.data_tensor.reshape(100, 18))]:
+            dropp = DROPP(**params).fit(data, n_components=18)
+            projection = dropp.transform(data)
+            np_testing.assert_array_almost_equal(self._reconstruction_scores(dropp, data, projection),
+                                                 dropp.score_curve(data, projection))
+
+    def test_max_components(self):
+        dropp = DROPP().fit(self.data_tensor, n_components=10)
+        curve = dropp.score_curve(self.data_tensor, max_components=4)
+        self.assertEqual((4,), curve.shape)
+        np_testing.assert_array_almost_equal(dropp.score_curve(self.data_tensor)[:4], curve)
+        self.assertAlmostEqual(dropp.score(self.data_tensor), dropp.score_curve(self.data_tensor)[-1])
+        with self.assertRaises(InvalidComponentNumberException):
+            dropp.score_curve(self.data_tensor, max_components=11)
+
+    def test_reconstruction_is_not_materialized(self):
+        dropp = DROPP().fit(self.data_tensor, n_components=18)
+        with patch.object(DROPP, 'reconstruct') as reconstruct_mocker:
+            dropp.score_curve(self.data_tensor)
+            reconstruct_mocker.assert_not_called()
+
+
+class TestDROPPTrajectoryList(unittest.TestCase):
+    def setUp(self):
+        warnings.simplefilter("ignore", category=UserWarning)
+        random_state = np.random.RandomState(42)
+        self.trajectories = [random_state.rand(80, 6, 3), random_state.rand(60, 6, 3) + 0.5]
+        self.params = {'kernel_kwargs': {KERNEL_MAP: None}}
+
+    def test_pooled_statistics_equal_concatenation(self):
+        pooled = DROPP(**self.params).fit(self.trajectories, n_components=4)
+        concatenated = DROPP(**self.params).fit(np.concatenate(self.trajectories), n_components=4)
+        self.assertEqual(140, pooled.n_samples)
+        np_testing.assert_array_almost_equal(concatenated.explained_variance_, pooled.explained_variance_)
+        np_testing.assert_array_almost_equal(np.abs(concatenated.components_), np.abs(pooled.components_))
+
+    def test_lagged_pairs_within_trajectories(self):
+        params = dict(self.params, algorithm_name='tica', lag_time=5)
+        pooled = DROPP(**params).fit(self.trajectories, n_components=4)
+        incremental = DROPP(**params)
+        for trajectory in self.trajectories:
+            for index, chunk in enumerate(np.array_split(trajectory, 3)):
+                incremental.partial_fit(chunk, new_trajectory=index == 0)
+        incremental.finalize(n_components=4)
+        self.assertEqual(140 - 2 * 5, pooled._running_statistics.n_pairs)
+        np_testing.assert_array_almost_equal(incremental.explained_variance_, pooled.explained_variance_)
+
+        concatenated = DROPP(**params).fit(np.concatenate(self.trajectories), n_components=4)
+        self.assertFalse(np.allclose(concatenated.explained_variance_, pooled.explained_variance_))
+
+    def test_fit_transform(self):
+        dropp = DROPP(**self.params)
+        projections = dropp.fit_transform(self.trajectories, n_components=4)
+        self.assertEqual([(80, 4), (60, 4)], [projection.shape for projection in projections])
+        np_testing.assert_array_almost_equal(dropp.transform(self.trajectories[1], use_fitted_statistics=True),
+                                             projections[1])
+
+    def test_score(self):
+        dropp = DROPP(**self.params).fit(self.trajectories, n_components=4)
+        self.assertAlmostEqual(np.mean([dropp.score(trajectory) for trajectory in self.trajectories]),
+                               dropp.score(self.trajectories))
+
+    def test_invalid_input(self):
+        with self.assertRaises(ValueError):
+            DROPP().fit([])
+        with self.assertRaises(ValueError):
+            DROPP(cov_function=co_mad).fit(self.trajectories)
+
+
+class TestDROPPSaveLoad(unittest.TestCase):
+    def setUp(self):
+        warnings.simplefilter("ignore", category=UserWarning)
+        self.data_tensor = np.random.RandomState(42).rand(100, 6, 3)
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'dropp.npz')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_loaded_model_equals_fitted_model(self):
+        for params, data in [({}, self.data_tensor),
+                             ({'use_kronecker_structure': False}, self.data_tensor),
+                             ({'algorithm_name': 'tica', 'lag_time': 5, 'dtype': np.float32}, self.data_tensor),
+                             ({'cov_function': co_mad, 'cov_stat_func': np.median}, self.data_tensor),
+                             ({'ndim': MATRIX_NDIM}, self.data_tensor.reshape(100, 18))]:
+            dropp = DROPP(**params).fit(data, n_components=18)
+            dropp.save(self.path)
+            for mmap_mode in [None, 'r']:
+                loaded = DROPP.load(self.path, mmap_mode=mmap_mode)
+                self.assertEqual(dropp.get_params(), loaded.get_params())
+                np_testing.assert_array_equal(dropp.explained_variance_, loaded.explained_variance_)
+                projection = dropp.transform(data, use_fitted_statistics=True)
+                np_testing.assert_array_equal(projection, loaded.transform(data, use_fitted_statistics=True))
+                np_testing.assert_array_equal(dropp.reconstruct(projection, 18), loaded.reconstruct(projection, 18))
+
+    def test_memory_mapped_components(self):
+        DROPP().fit(self.data_tensor, n_components=4).save(self.path)
+        loaded = DROPP.load(self.path, mmap_mode='r')
+        self.assertIsInstance(loaded._component_factors, np.memmap)
+        self.assertIsInstance(loaded.mean, np.memmap)
+
+    def test_invalid_save(self):
+        with self.assertRaises(ModelNotFittedError):
+            DROPP().save(self.path)
+        with self.assertRaises(ValueError):
+            dropp = DROPP(cov_stat_func=lambda array, axis: np.mean(array, axis), kernel_kwargs={KERNEL_MAP: None})
+            dropp.fit(self.data_tensor).save(self.path)
+
+    def test_invalid_format_version(self):
+        DROPP().fit(self.data_tensor).save(self.path)
+        arrays = dict(np.load(self.path))
+        arrays['format_version'] = np.asarray(MODEL_FORMAT_VERSION + 1)
+        np.savez(self.path, **arrays)
+        with self.assertRaises(ValueError):
+            DROPP.load(self.path)
+
+
+class TestDROPPStageCache(unittest.TestCase):
+    def setUp(self):
+        warnings.simplefilter("ignore", category=UserWarning)
+        self.data_tensor = np.cumsum(np.random.RandomState(42).randn(200, 8, 3), axis=0)
+        self.params = [{'algorithm_name': algorithm_name, 'lag_time': lag_time, 'abs_eigenvalue_sorting': sorting,
+                        'kernel_kwargs': {KERNEL_MAP: kernel_map, ONES_ON_KERNEL_DIAG: ones_on_diagonal}}
+                       for algorithm_name, lag_time in [('pca', 0), ('tica', 5), ('kica', 5)]
+                       for kernel_map in [KERNEL_ONLY, KERNEL_DIFFERENCE, None]
+                       for ones_on_diagonal in [False, True]
+                       for sorting in [True, False]]
+
+    def test_cached_sweep_equals_uncached(self):
+        for ndim, data in [(TENSOR_NDIM, self.data_tensor), (MATRIX_NDIM, self.data_tensor.reshape(200, 24))]:
+            expected = [DROPP(ndim=ndim, **params).fit_transform(data, n_components=4) for params in self.params]
+            with StageCache(max_size=8) as cache:
+                projections = [DROPP(ndim=ndim, **params).fit_transform(data.view(), n_components=4)
+                               for params in self.params]
+            np_testing.assert_array_equal(expected, projections)
+            self.assertLess(cache.misses, 10)
+
+    def test_stages_are_reused(self):
+        with StageCache() as cache:
+            first = DROPP(kernel_kwargs={KERNEL_MAP: KERNEL_ONLY}).fit(self.data_tensor)
+            second = DROPP(kernel_kwargs={KERNEL_MAP: KERNEL_DIFFERENCE, ONES_ON_KERNEL_DIAG: True}).fit(
+                self.data_tensor.view())
+        self.assertIs(first._standardized_data, second._standardized_data)
+        self.assertEqual(3, cache.misses)  # standardized data, combined covariance, kernel matrix
+        self.assertFalse(first._standardized_data.flags.writeable)
+
+    def test_differing_stage_parameters(self):
+        with StageCache() as cache:
+            DROPP().fit(self.data_tensor)
+            DROPP(use_std=False).fit(self.data_tensor)
+            DROPP(cov_stat_func=np.median).fit(self.data_tensor)
+        self.assertEqual(0, cache.hits - 1)  # only the standardized data of the median model
+
+    def test_in_place_fit_is_not_cached(self):
+        with StageCache() as cache:
+            data = self.data_tensor.copy()
+            DROPP().fit(data)
+            DROPP(copy=False).fit(data)
+            np_testing.assert_array_almost_equal(DROPP().fit_transform(self.data_tensor),
+                                                 DROPP().fit_transform(data.view()))
+            self.assertIsNone(DROPP(copy=False).fit(self.data_tensor.copy())._stage_key)
+        self.assertGreater(len(cache), 0)
+
+    def test_iterative_kernel_fit_is_not_mixed_up(self):
+        with StageCache() as cache:
+            DROPP().fit(self.data_tensor)
+            DROPP(kernel_kwargs={ITERATIVE_KERNEL_FIT: True}).fit(self.data_tensor)
+        self.assertEqual(4, cache.misses)  # standardized data, combined covariance and the two kernel matrices
+
+
+class TestDROPPIterativeKernelFit(unittest.TestCase):
+    def setUp(self):
+        warnings.simplefilter("ignore", category=UserWarning)
+        self.data_tensor = np.cumsum(np.random.RandomState(42).randn(200, 8, 3), axis=0)
+
+    def test_iterative_kernel_fit(self):
+        for iterative, expected_calls in [(False, 1), (True, 0)]:
+            kernel_kwargs = {KERNEL_FUNCTION: MY_EPANECHNIKOV, ITERATIVE_KERNEL_FIT: iterative}
+            with patch.object(utils.matrix_tools, '_epanechnikov_parameters',
+                              wraps=utils.matrix_tools._epanechnikov_parameters) as closed_form_fit:
+                model = DROPP(kernel_kwargs=kernel_kwargs).fit(self.data_tensor)
+            self.assertEqual(iterative, model.kernel_kwargs[ITERATIVE_KERNEL_FIT])
+            self.assertEqual(expected_calls, closed_form_fit.call_count)
+
+    def test_default_is_closed_form(self):
+        self.assertFalse(DROPP().kernel_kwargs[ITERATIVE_KERNEL_FIT])
+
+
+class TestDROPPKroneckerStructure(unittest.TestCase):
+    def setUp(self):
+        warnings.simplefilter("ignore", category=UserWarning)
+        self.data_tensor = np.random.RandomState(42).rand(100, 8, 3)
+
+    @staticmethod
+    def _projection_matrix(model):
+        return model.components_.T @ np.linalg.pinv(model.components_.T)
+
+    def test_structured_covariance_shape(self):
+        dropp = DROPP().fit(self.data_tensor)
+        self.assertEqual((8, 8), dropp._covariance_matrix.shape)
+
+    def test_dense_reference_covariance_shape(self):
+        dropp = DROPP(**{USE_KRONECKER_STRUCTURE: False}).fit(self.data_tensor)
+        self.assertFalse(dropp._is_kronecker_structured)
+        self.assertEqual((24, 24), dropp._covariance_matrix.shape)
+
+    def test_structured_equals_dense_reference(self):
+        for params in [{}, {'kernel_kwargs': {KERNEL_MAP: None}},
+                       {'algorithm_name': 'tica', 'lag_time': 5},
+                       {'algorithm_name': 'tica', 'lag_time': 5, 'kernel_kwargs': {KERNEL_MAP: None}}]:
+            structured = DROPP(**params).fit(self.data_tensor, n_components=6)
+            dense = DROPP(use_kronecker_structure=False, **params).fit(self.data_tensor, n_components=6)
+
+            np_testing.assert_array_almost_equal(dense.explained_variance_, structured.explained_variance_)
+            np_testing.assert_array_almost_equal(self._projection_matrix(dense),
+                                                 self._projection_matrix(structured))
+
+    def test_matrix_model_ignores_structure(self):
+        dropp = DROPP(ndim=2).fit(np.random.rand(100, 10))
+        self.assertFalse(dropp._is_kronecker_structured)
+        self.assertEqual((10, 10), dropp._covariance_matrix.shape)
+
+
+class TestDROPPCompactComponents(unittest.TestCase):
+    def setUp(self):
+        warnings.simplefilter("ignore", category=UserWarning)
+        self.data_tensor = np.random.RandomState(42).rand(100, 8, 3)
+
+    def test_compact_storage(self):
+        dropp = DROPP().fit(self.data_tensor, n_components=5)
+        self.assertEqual((8, 5), dropp._component_factors.shape)
+        self.assertEqual((5,), dropp._component_coordinates.shape)
+        self.assertEqual((5, 24), dropp.components_.shape)
+
+    def test_extra_dr_layer_stores_dense(self):
+        dropp = DROPP(extra_dr_layer=True).fit(self.data_tensor, n_components=5)
+        self.assertIsNone(dropp._component_factors)
+        self.assertEqual((5, 24), dropp.components_.shape)
+
+    def test_components_equal_dense_eigenvectors(self):
+        dropp = DROPP().fit(self.data_tensor, n_components=5)
+        np_testing.assert_array_almost_equal(dropp._get_eigenvectors()[:, :5].T, dropp.components_)
+
+    def test_transform_equals_dense_projection(self):
+        dropp = DROPP(nth_eigenvector=2).fit(self.data_tensor, n_components=5)
+        standardized_matrix = dropp.convert_to_matrix(dropp._standardized_data)
+        np_testing.assert_array_almost_equal(standardized_matrix @ dropp.components_.T,
+                                             dropp.transform(self.data_tensor))
+
+    def test_reconstruct_all_components(self):
+        for params in [{}, {'algorithm_name': 'tica', 'lag_time': 5}]:
+            dropp = DROPP(**params).fit(self.data_tensor, n_components=24)
+            projection = dropp.transform(self.data_tensor)
+            np_testing.assert_array_almost_equal(self.data_tensor, dropp.reconstruct(projection, 24))
+
+    def test_setting_components_clears_compact_storage(self):
+        dropp = DROPP().fit(self.data_tensor, n_components=5)
+        dropp.components_ = np.eye(24)[:5]
+        self.assertIsNone(dropp._component_factors)
+        np_testing.assert_array_equal(np.eye(24)[:5], dropp.components_)
+
+
+class TestDROPPPartialSolver(unittest.TestCase):
+    def setUp(self):
+        warnings.simplefilter("ignore", category=UserWarning)
+        self.data_tensor = np.random.RandomState(42).rand(100, 8, 3)
+        self.params = [
+            {'kernel_kwargs': {KERNEL_MAP: None}},
+            {'nth_eigenvector': 2, 'kernel_kwargs': {KERNEL_MAP: None}},
+            {'algorithm_name': 'tica', 'lag_time': 5, 'kernel_kwargs': {KERNEL_MAP: None}},
+            {'ndim': MATRIX_NDIM, 'kernel_kwargs': {KERNEL_MAP: None}},
+        ]
+
+    def _data(self, params):
+        if params.get('ndim') == MATRIX_NDIM:
+            return self.data_tensor.reshape(100, 24)
+        return self.data_tensor
+
+    def _fit(self, params, solver=FULL_SOLVER):
+        return DROPP(solver=solver, **params).fit(self._data(params), n_components=4)
+
+    def test_invalid_solver(self):
+        with self.assertRaises(ValueError):
+            DROPP(solver='invalid')
+
+    def test_required_eigenpairs(self):
+        self.assertIsNone(self._fit(self.params[1])._n_required_eigenpairs)
+        self.assertEqual(3, self._fit(self.params[1], SUBSET_SOLVER)._n_required_eigenpairs)  # ceil(7 / 3)
+        self.assertEqual(4, self._fit(self.params[3], SUBSET_SOLVER)._n_required_eigenpairs)
+
+    def test_partial_solvers_equal_full_solver(self):
+        for params in self.params:
+            full = self._fit(params)
+            for solver in [SUBSET_SOLVER, LANCZOS_SOLVER]:
+                partial = self._fit(params, solver)
+                np_testing.assert_array_almost_equal(full.explained_variance_[:4], partial.explained_variance_[:4])
+                np_testing.assert_array_almost_equal(np.abs(full.transform(self._data(params))),
+                                                     np.abs(partial.transform(self._data(params))))
+
+    def test_total_variance_is_sum_of_full_spectrum(self):
+        for params in [self.params[0], dict(self.params[2], abs_eigenvalue_sorting=False), self.params[3]]:
+            full = self._fit(params)
+            self.assertIsNone(full.total_variance_)
+            for solver in [SUBSET_SOLVER, LANCZOS_SOLVER]:
+                self.assertAlmostEqual(np.sum(full.get_eigenvalues()),
+                                       self._fit(params, solver).total_variance_)
+
+    def test_total_variance_of_indefinite_problem(self):
+        for params in [{'ndim': MATRIX_NDIM, 'kernel_kwargs': {KERNEL_MAP: KERNEL_ONLY, KERNEL_FUNCTION: MY_SINC}},
+                       {'ndim': MATRIX_NDIM,
+                        'kernel_kwargs': {KERNEL_MAP: KERNEL_DIFFERENCE, KERNEL_FUNCTION: MY_SINC}},
+                       {'algorithm_name': 'tica', 'lag_time': 5,
+                        'kernel_kwargs': {KERNEL_MAP: KERNEL_MULTIPLICATION, KERNEL_FUNCTION: MY_SINC}}]:
+            signed_eigenvalues = DROPP(abs_eigenvalue_sorting=False, **params).fit(
+                self._data(params), n_components=4).get_eigenvalues()
+            self.assertLess(signed_eigenvalues[-1], 0)
+            full = self._fit(params)
+            for solver in [SUBSET_SOLVER, LANCZOS_SOLVER]:
+                partial = self._fit(params, solver)
+                self.assertAlmostEqual(np.sum(np.abs(signed_eigenvalues)), partial.total_variance_)
+                self.assertAlmostEqual(explained_variance(full.explained_variance_, 4),
+                                       explained_variance(partial.explained_variance_, 4, partial.total_variance_))
+
+    def test_get_eigenvalues(self):
+        for params in self.params + [{}]:
+            full = self._fit(params)
+            partial = self._fit(params, SUBSET_SOLVER)
+            np_testing.assert_array_almost_equal(full.get_eigenvalues(6), partial.get_eigenvalues(6))
+            np_testing.assert_array_almost_equal(full.get_eigenvalues(), partial.get_eigenvalues())
+
+
+
+class TestDROPPToeplitzSolver(unittest.TestCase):
+    def setUp(self):
+        warnings.simplefilter("ignore", category=UserWarning)
+        self.data_tensor = np.cumsum(np.random.RandomState(42).randn(300, 11, 3), axis=0)
+
+    def test_use_toeplitz_solver(self):
+        self.assertTrue(DROPP()._use_toeplitz_solver)
+        self.assertTrue(DROPP(ndim=MATRIX_NDIM)._use_toeplitz_solver)
+        self.assertFalse(DROPP(use_kronecker_structure=False)._use_toeplitz_solver)
+        self.assertFalse(DROPP(algorithm_name='tica', lag_time=5)._use_toeplitz_solver)
+        self.assertFalse(DROPP(kernel_kwargs={KERNEL_MAP: KERNEL_DIFFERENCE})._use_toeplitz_solver)
+
+    def test_equal_dense_eigenproblem(self):
+        for params in [{}, {'solver': SUBSET_SOLVER}, {'abs_eigenvalue_sorting': False},
+                       {'kernel_kwargs': {ONES_ON_KERNEL_DIAG: True}}]:
+            model = DROPP(**params).fit(self.data_tensor, n_components=9)
+            covariance_matrix = model._covariance_matrix
+            eigenvalues = np.linalg.eigvalsh(covariance_matrix)
+            eigenvalues = np.sort(np.abs(eigenvalues) if model.abs_eigenvalue_sorting else eigenvalues)[::-1]
+            np_testing.assert_array_almost_equal(np.repeat(eigenvalues[:3], 3), model.explained_variance_[:9])
+
+            factors = model._component_factors[:, ::3]
+            rayleigh_quotients = np.sum(factors * (covariance_matrix @ factors), axis=0)
+            np_testing.assert_array_almost_equal(covariance_matrix @ factors, factors * rayleigh_quotients)
+            np_testing.assert_array_almost_equal(np.eye(3), factors.T @ factors)
+
+
+class TestDROPPBandedSolver(unittest.TestCase):
+    def setUp(self):
+        warnings.simplefilter("ignore", category=UserWarning)
+        self.data_tensor = np.cumsum(np.random.RandomState(42).randn(300, 200, 3), axis=0)
+
+    def test_banded_covariance_matrix(self):
+        for kernel_map in [KERNEL_ONLY, KERNEL_MULTIPLICATION]:
+            model = DROPP(kernel_kwargs={KERNEL_FUNCTION: MY_GAUSSIAN, KERNEL_MAP: kernel_map},
+                          solver=SUBSET_SOLVER).fit(self.data_tensor, n_components=6)
+            band = model._get_banded_covariance_matrix()
+            self.assertIsNotNone(band)
+            self.assertLess(len(band) - 1, MAX_BANDED_SOLVER_RATIO * 200)
+            np_testing.assert_array_almost_equal(
+                banded_storage(model._covariance_matrix, matrix_bandwidth(model._covariance_matrix)), band)
+        model = DROPP(kernel_kwargs={KERNEL_MAP: KERNEL_DIFFERENCE}).fit(self.data_tensor, n_components=3)
+        self.assertIsNone(model._get_banded_covariance_matrix())
+
+    def test_equal_dense_eigenproblem(self):
+        for params in [{'solver': SUBSET_SOLVER}, {'solver': LANCZOS_SOLVER, 'abs_eigenvalue_sorting': False},
+                       {'solver': SUBSET_SOLVER, 'kernel_kwargs': {KERNEL_FUNCTION: MY_GAUSSIAN,
+                                                                  KERNEL_MAP: KERNEL_MULTIPLICATION}}]:
+            params = dict({'kernel_kwargs': {KERNEL_FUNCTION: MY_GAUSSIAN}}, **params)
+            model = DROPP(**params).fit(self.data_tensor, n_components=6)
+            covariance_matrix = model._covariance_matrix
+            eigenvalues = np.linalg.eigvalsh(covariance_matrix)
+            eigenvalues = np.sort(np.abs(eigenvalues) if model.abs_eigenvalue_sorting else eigenvalues)[::-1]
+            np_testing.assert_array_almost_equal(np.repeat(eigenvalues[:2], 3), model.explained_variance_[:6])
+            self.assertAlmostEqual(3 * np.trace(covariance_matrix), model.total_variance_)
+
+            factors = model._component_factors[:, ::3]
+            np_testing.assert_array_almost_equal(covariance_matrix @ factors, factors * eigenvalues[:2])
+            np_testing.assert_array_almost_equal(np.eye(2), factors.T @ factors)
+
+
+class TestDROPPRandomizedSolver(unittest.TestCase):
+    def setUp(self):
+        warnings.simplefilter("ignore", category=UserWarning)
+        random_state = np.random.RandomState(42)
+        self.data_tensor = (random_state.rand(200, 30, 3) +
+                            np.linspace(0, 5, 200)[:, np.newaxis, np.newaxis] * random_state.rand(1, 30, 3))
+        self.params = {'kernel_kwargs': {KERNEL_MAP: None}, 'solver': RANDOMIZED_SOLVER, 'random_state': 0}
+
+    def test_invalid_model(self):
+        for params in [{'kernel_kwargs': None}, {'algorithm_name': 'tica', 'lag_time': 5},
+                       {'cov_function': co_mad}, {'cov_stat_func': np.median}]:
+            with self.assertRaises(ValueError):
+                DROPP(**dict(self.params, **params))
+
+    def test_covariance_is_not_materialized(self):
+        dropp = DROPP(**self.params).fit(self.data_tensor, n_components=3)
+        self.assertIsNone(dropp._covariance_matrix)
+        self.assertLess(dropp.approximation_error_, 1e-2)
+
+    def test_covariance_operator(self):
+        for params in [{}, {'use_kronecker_structure': False}]:
+            dropp = DROPP(**params, **self.params).fit(self.data_tensor, n_components=3)
+            covariance_matrix = dropp.get_covariance_matrix(block_expand=not dropp._is_kronecker_structured)
+            identity = np.eye(covariance_matrix.shape[0])
+            np_testing.assert_array_almost_equal(covariance_matrix, dropp._get_covariance_operator() @ identity)
+
+    def test_equal_full_solver(self):
+        full = DROPP(kernel_kwargs={KERNEL_MAP: None}).fit(self.data_tensor, n_components=4)
+        randomized = DROPP(**self.params).fit(self.data_tensor, n_components=4)
+        np_testing.assert_array_almost_equal(full.explained_variance_[:4], randomized.explained_variance_[:4], 3)
+        np_testing.assert_array_almost_equal(np.abs(full.transform(self.data_tensor)),
+                                             np.abs(randomized.transform(self.data_tensor)), 1)
+        self.assertAlmostEqual(np.sum(full.get_eigenvalues()), randomized.total_variance_)
+
+
+class TestDROPPPartialFit(unittest.TestCase):
+    def setUp(self):
+        warnings.simplefilter("ignore", category=UserWarning)
+        self.data_tensor = np.random.RandomState(42).rand(150, 8, 3)
+        self.params = [
+            ({}, self.data_tensor),
+            ({'algorithm_name': 'tica', 'lag_time': 5}, self.data_tensor),
+            ({'algorithm_name': 'kica', 'lag_time': 5}, self.data_tensor),
+            ({'use_std': False, 'center_over_time': False}, self.data_tensor),
+            ({'ndim': MATRIX_NDIM, 'kernel_kwargs': {KERNEL_MAP: None}}, self.data_tensor.reshape(150, 24)),
+            ({'ndim': MATRIX_NDIM, 'algorithm_name': 'tica', 'lag_time': 3, 'kernel_kwargs': {KERNEL_MAP: None}},
+             self.data_tensor.reshape(150, 24)),
+        ]
+
+    @staticmethod
+    def _partial_fit(data, **params):
+        dropp = DROPP(**params)
+        for chunk in np.array_split(data, [10, 11, 70]):
+            dropp = dropp.partial_fit(chunk)
+        return dropp.finalize(n_components=4)
+
+    def test_finalize_equals_batch_fit(self):
+        for params, data in self.params:
+            batch = DROPP(**params).fit(data, n_components=4)
+            incremental = self._partial_fit(data, **params)
+            self.assertEqual(batch.n_samples, incremental.n_samples)
+            np_testing.assert_array_almost_equal(batch.explained_variance_, incremental.explained_variance_)
+            np_testing.assert_array_almost_equal(np.abs(batch.components_), np.abs(incremental.components_))
+            np_testing.assert_array_almost_equal(np.abs(batch.transform(data)), np.abs(incremental.transform(data)))
+
+    def test_data_is_not_stored(self):
+        dropp = self._partial_fit(self.data_tensor)
+        with self.assertRaises(ModelNotFittedError):
+            _ = dropp._standardized_data
+
+    def test_reconstruct(self):
+        dropp = DROPP()
+        for chunk in np.array_split(self.data_tensor, 4):
+            dropp = dropp.partial_fit(chunk)
+        dropp = dropp.finalize(n_components=24)
+        np_testing.assert_array_almost_equal(self.data_tensor, dropp.reconstruct(dropp.transform(self.data_tensor)))
+
+    def test_finalize_without_partial_fit(self):
+        with self.assertRaises(ModelNotFittedError):
+            DROPP().finalize()
+
+    def test_invalid_cov_function(self):
+        with self.assertRaises(ValueError):
+            DROPP(cov_function=co_mad).partial_fit(self.data_tensor)
+
+    def test_fit_resets_statistics(self):
+        dropp = self._partial_fit(self.data_tensor)
+        dropp.fit(self.data_tensor[:50])
+        self.assertIsNone(dropp._running_statistics)
+        self.assertEqual(50, dropp.n_samples)
@@ -0,0 +1,115 @@
+import pickle
+import unittest
+import warnings
+
+import numpy as np
+import numpy.testing as np_testing
+import scipy.stats
+
+from utils.algorithms.dropp import DROPP
+from utils.grid_search import ParallelGridSearch, SharedArray, SuccessiveHalvingSearch, STRIDED_FRAMES, \
+    blas_threads_per_worker, negated_reconstruction_error
+from utils.param_keys.model import KERNEL_MAP
+
+
+class TestSharedArray(unittest.TestCase):
+    def test_pickled_by_name(self):
+        array = np.random.RandomState(42).rand(100, 4, 3)
+        with SharedArray(array) as shared:
+            state = pickle.dumps(shared)
+            self.assertLess(len(state), array.nbytes)
+            attached = pickle.loads(state)
+            np_testing.assert_array_equal(array, attached.array)
+            self.assertFalse(attached.array.flags.writeable)
+            attached.close()
+
+
+class TestParallelGridSearch(unittest.TestCase):
+    def setUp(self):
+        warnings.simplefilter('ignore', category=UserWarning)
+        self.data_tensor = np.cumsum(np.random.RandomState(42).randn(300, 6, 3), axis=0)
+        self.param_grid = {'lag_time': [0, 5], 'algorithm_name': ['pca', 'tica'], 'kernel_kwargs': [{KERNEL_MAP: None}]}
+
+    def test_scores_equal_serial_fits(self):
+        grid = ParallelGridSearch(self.param_grid, cv=[(slice(None), slice(None))], n_jobs=2)
+        grid.fit(self.data_tensor, n_components=2)
+        expected = [-DROPP(**params).fit(self.data_tensor, n_components=2).score(self.data_tensor)
+                    for params in grid.cv_results_['params']]
+        np_testing.assert_array_almost_equal(expected, grid.cv_results_['mean_test_score'])
+        self.assertEqual(4, len(grid.cv_results_['params']))
+        self.assertEqual(np.argmax(expected), grid.best_index_)
+        self.assertEqual(1, grid.cv_results_['rank_test_score'][grid.best_index_])
+
+    def test_sklearn_ranking(self):
+        grid = ParallelGridSearch(self.param_grid, cv=[(slice(None), slice(None))], n_jobs=1)
+        grid.fit(self.data_tensor, n_components=2)
+        # Highest score first as in GridSearchCV, equal scores in the order of the candidates
+        np_testing.assert_array_equal(scipy.stats.rankdata(-grid.cv_results_['mean_test_score'], method='ordinal'),
+                                      grid.cv_results_['rank_test_score'])
+        model = DROPP(**grid.best_params_).fit(self.data_tensor, n_components=2)
+        self.assertAlmostEqual(negated_reconstruction_error(model, self.data_tensor), grid.best_score_)
+
+    def test_trajectory_folds(self):
+        trajectories = [self.data_tensor[:100], self.data_tensor[100:200], self.data_tensor[200:]]
+        grid = ParallelGridSearch({'lag_time': [0, 5]}, cv=3, n_jobs=2).fit(trajectories, n_components=2)
+        model = DROPP(lag_time=5).fit(trajectories[1:], n_components=2)
+        self.assertAlmostEqual(-model.score([trajectories[0]]), grid.cv_results_['split0_test_score'][1])
+
+    def test_failed_fit(self):
+        grid = ParallelGridSearch({'ndim': [3, 2]}, cv=[(slice(None), slice(None))], n_jobs=1)
+        with self.assertWarns(UserWarning):
+            grid.fit(self.data_tensor, n_components=2)
+        self.assertTrue(np.isnan(grid.cv_results_['mean_test_score'][1]))
+        self.assertEqual(0, grid.best_index_)
+
+    def test_invalid_n_jobs(self):
+        with self.assertRaises(ValueError):
+            ParallelGridSearch(self.param_grid, n_jobs=0)
+
+    def test_blas_threads(self):
+        self.assertEqual(1, blas_threads_per_worker(10 ** 6))
+
+
+class TestSuccessiveHalvingSearch(unittest.TestCase):
+    def setUp(self):
+        warnings.simplefilter('ignore', category=UserWarning)
+        self.data_tensor = np.cumsum(np.random.RandomState(42).randn(900, 6, 3), axis=0)
+        self.param_grid = {'lag_time': [0, 2, 5], 'algorithm_name': ['pca', 'tica'], 'use_std': [True, False],
+                           'kernel_kwargs': [{KERNEL_MAP: None}]}
+        self.cv = [(slice(None), slice(None))]
+
+    def test_promotion(self):
+        grid = SuccessiveHalvingSearch(self.param_grid, cv=self.cv, n_jobs=2, min_frames=100)
+        grid.fit(self.data_tensor, n_components=2)
+        results = grid.cv_results_
+        self.assertEqual(3, grid.n_iterations_)  # 12 candidates, factor 3
+        np_testing.assert_array_equal([12, 4, 2], np.bincount(results['iter']))
+        np_testing.assert_array_equal([100, 300, 900], np.unique(results['n_resources']))
+        first_iteration = results['iter'] == 0
+        promoted = np.argsort(-results['mean_test_score'][first_iteration])[:4]
+        self.assertEqual({str(results['params'][index]) for index in promoted},
+                         {str(params) for params, iteration in zip(results['params'], results['iter'])
+                          if iteration == 1})
+        self.assertEqual(2, results['iter'][grid.best_index_])
+        self.assertEqual(1, results['rank_test_score'][grid.best_index_])
+        model = DROPP(**grid.best_params_).fit(self.data_tensor, n_components=2)
+        self.assertAlmostEqual(-model.score(self.data_tensor), grid.best_score_)
+
+    def test_strided_frames(self):
+        grid = SuccessiveHalvingSearch({'lag_time': [0, 2, 5]}, cv=self.cv, n_jobs=1, min_frames=300,
+                                       frame_subset=STRIDED_FRAMES)
+        grid.fit(self.data_tensor, n_components=2)
+        model = DROPP(lag_time=grid.cv_results_['params'][0]['lag_time']).fit(self.data_tensor[::3], n_components=2)
+        self.assertAlmostEqual(-model.score(self.data_tensor[::3]), grid.cv_results_['mean_test_score'][0])
+
+    def test_min_frames_limit_iterations(self):
+        grid = SuccessiveHalvingSearch(self.param_grid, cv=self.cv, n_jobs=1, min_frames=1000)
+        grid.fit(self.data_tensor, n_components=2)
+        self.assertEqual(1, grid.n_iterations_)
+        self.assertEqual(12, len(grid.cv_results_['params']))
+
+    def test_invalid_parameters(self):
+        with self.assertRaises(ValueError):
+            SuccessiveHalvingSearch(self.param_grid, factor=1)
+        with self.assertRaises(ValueError):
+            SuccessiveHalvingSearch(self.param_grid, frame_subset='random')
@@ -7,6 +7,7 @@ import numpy.testing as np_testing
 from scipy.optimize import OptimizeWarning
 
 from utils.matrix_tools import *
+from utils.matrix_tools import _epanechnikov_parameters, _initial_kernel_parameters
 
 
 class MyTestCase(unittest.TestCase):
@@ -71,6 +72,34 @@ class TestMatrixDiagonalsCalculation(TestCase):
         expected = np.array([-7, 4 * 8, 1 * 5 * 9, 2, 3])
         np_testing.assert_array_equal(result, expected)
 
+    def test_vectorized_functions_equal_loop(self):
+        random_state = np.random.RandomState(42)
+        for shape in [(1, 1), (1, 4), (4, 1), (5, 5), (4, 7), (7, 4)]:
+            for dtype in [np.float64, np.float32, np.int64]:
+                matrix = (random_state.randn(*shape) * 10).astype(dtype)
+                for func in [np.sum, np.mean, np.median, np.min, np.max]:
+                    expected = np.asarray([func(np.diag(matrix, k)) for k in diagonal_indices(matrix)])
+                    result = matrix_diagonals_calculation(matrix, func=func)
+                    self.assertEqual(expected.dtype, result.dtype)
+                    np_testing.assert_allclose(result, expected, rtol=1e-5)
+
+    def test_median_with_nan(self):
+        matrix = np.arange(16, dtype=float).reshape(4, 4)
+        matrix[1, 2] = np.nan
+        result = matrix_diagonals_calculation(matrix, func=np.median)
+        expected = np.array([12, 10.5, 9, 7.5, np.nan, 4.5, 3])
+        np_testing.assert_array_equal(result, expected)
+
+
+class TestDiagonalsLayout(unittest.TestCase):
+    def test_diagonals_in_columns(self):
+        matrix = np.array([[1, 2, 3],
+                           [4, 5, 6]])
+        expected = np.array([[0, 1, 2, 3],
+                             [4, 5, 6, 0]])
+        np_testing.assert_array_equal(diagonals_layout(matrix), expected)
+        np_testing.assert_array_equal(diagonals_layout(matrix, fill_value=-1)[:, 0], [-1, 4])
+
 
 class TestExpandDiagonalsToMatrix(unittest.TestCase):
     def test_expand_diagonals(self):
@@ -294,6 +323,27 @@ class TestGetFittedYCurve(unittest.TestCase):
             np_testing.assert_array_almost_equal(rounded_expected, result)
             self.assertTrue(isinstance(result, np.ndarray))
 
+    def test_closed_form_fits_equal_iterative_fits(self):
+        xdata = np.arange(-20, 21)
+        noise = np.random.RandomState(42).randn(len(xdata)) * 0.02
+        for kernel_name, ydata in [(MY_GAUSSIAN, gaussian_2d(xdata, 0, 3) + noise),
+                                   (MY_EXPONENTIAL, exponential_2d(xdata, 1.5) + noise),
+                                   (MY_EPANECHNIKOV, epanechnikov_2d(xdata, 30) + noise)]:
+            np_testing.assert_array_almost_equal(
+                get_fitted_y_curve(kernel_name, xdata, ydata.copy(), iterative_kernel_fit=True),
+                get_fitted_y_curve(kernel_name, xdata, ydata.copy()), decimal=4)
+
+    def test_closed_form_parameters(self):
+        xdata = np.arange(-10, 11)
+        self.assertAlmostEqual(4, _epanechnikov_parameters(xdata, epanechnikov_2d(xdata, 4))[0])
+        mu, sigma = _initial_kernel_parameters(MY_GAUSSIAN, xdata, gaussian_2d(xdata, 0, 4))
+        self.assertEqual(0, mu)
+        self.assertAlmostEqual(4, sigma, delta=0.1)
+        self.assertAlmostEqual(2, _initial_kernel_parameters(MY_EXPONENTIAL, xdata, exponential_2d(xdata, 2))[0],
+                               delta=0.1)
+        self.assertIsNone(_initial_kernel_parameters(MY_GAUSSIAN, xdata, np.ones(len(xdata))))
+        self.assertIsNone(_initial_kernel_parameters(MY_COS, xdata, np.ones(len(xdata))))
+
 
 class TestReconstructMatrix(unittest.TestCase):
     def test_reconstruct_orthogonal(self):
@@ -330,3 +380,175 @@ class TestReconstructMatrix(unittest.TestCase):
 
         result = reconstruct_matrix(projection, eigenvectors, dim=2, mean=1)
         np_testing.assert_array_almost_equal(expected_result, result)
+
+
+class TestCoordinateBlockExpand(unittest.TestCase):
+    def test_equals_diagonal_block_expand_columns(self):
+        matrix = np.array([[1, 2],
+                           [3, 4]])
+        expanded = diagonal_block_expand(matrix, 3)
+        factors = np.repeat(matrix, 3, axis=1)
+        coordinates = np.tile(np.arange(3), 2)
+        np_testing.assert_array_equal(expanded, coordinate_block_expand(factors, coordinates, 3))
+
+    def test_selected_coordinates(self):
+        factors = np.array([[1, 2],
+                            [3, 4]])
+        result = coordinate_block_expand(factors, np.array([1, 0]), 2)
+        expected = np.array([[0, 2],
+                             [1, 0],
+                             [0, 4],
+                             [3, 0]])
+        np_testing.assert_array_equal(expected, result)
+
+
+class TestAccumulatedGram(unittest.TestCase):
+    def setUp(self):
+        random_state = np.random.RandomState(42)
+        self.a = random_state.rand(3, 1000, 5)
+        self.b = random_state.rand(3, 1000, 4)
+
+    def test_float64(self):
+        np_testing.assert_array_almost_equal(np.swapaxes(self.a, 1, 2) @ self.b, accumulated_gram(self.a, self.b))
+        np_testing.assert_array_almost_equal(self.a[0].T @ self.a[0], accumulated_gram(self.a[0]))
+
+    def test_float32_is_accumulated_in_float64(self):
+        gram = accumulated_gram(self.a.astype(np.float32), self.b.astype(np.float32), block_size=64)
+        self.assertEqual(np.float64, gram.dtype)
+        np_testing.assert_allclose(np.swapaxes(self.a, 1, 2) @ self.b, gram, rtol=1e-5)
+
+
+class TestPartialEigh(unittest.TestCase):
+    def setUp(self):
+        random_state = np.random.RandomState(42)
+        a = random_state.rand(20, 20)
+        self.matrix = a + a.T
+        b = random_state.rand(20, 20)
+        self.b = b @ b.T + 20 * np.eye(20)
+
+    def test_invalid_solver(self):
+        with self.assertRaises(ValueError):
+            partial_eigh(self.matrix, 3, solver='invalid')
+
+    def test_solvers_equal_full_spectrum(self):
+        for b in [None, self.b]:
+            for by_magnitude in [False, True]:
+                eigenvalues, eigenvectors = partial_eigh(self.matrix, b=b, by_magnitude=by_magnitude)
+                for solver in [SUBSET_SOLVER, LANCZOS_SOLVER]:
+                    values, vectors = partial_eigh(self.matrix, 3, b=b, solver=solver, by_magnitude=by_magnitude)
+                    np_testing.assert_array_almost_equal(eigenvalues[:3], values)
+                    np_testing.assert_array_almost_equal(np.abs(eigenvectors[:, :3]), np.abs(vectors))
+                    np_testing.assert_array_almost_equal(
+                        values, partial_eigh(self.matrix, 3, b=b, solver=solver, by_magnitude=by_magnitude,
+                                             eigvals_only=True))
+
+    def test_sorted_by_magnitude(self):
+        eigenvalues = partial_eigh(self.matrix, 5, solver=SUBSET_SOLVER, by_magnitude=True, eigvals_only=True)
+        np_testing.assert_array_equal(np.sort(np.abs(eigenvalues))[::-1], np.abs(eigenvalues))
+
+    def test_eigenvalue_sum(self):
+        for b in [None, self.b]:
+            eigenvalues = scipy.linalg.eigh(self.matrix, b, eigvals_only=True)
+            self.assertLess(eigenvalues[0], 0)
+            self.assertAlmostEqual(np.sum(eigenvalues), eigenvalue_sum(self.matrix, b))
+            self.assertAlmostEqual(np.sum(np.abs(eigenvalues)), eigenvalue_sum(self.matrix, b, by_magnitude=True))
+        positive_definite = self.b
+        self.assertAlmostEqual(np.trace(positive_definite), eigenvalue_sum(positive_definite, by_magnitude=True))
+
+
+
+class TestSymmetricToeplitzEigh(unittest.TestCase):
+    def test_equal_dense_eigenproblem(self):
+        random_state = np.random.RandomState(42)
+        for size in [1, 2, 7, 8]:
+            first_column = random_state.randn(size)
+            matrix = scipy.linalg.toeplitz(first_column)
+            for solver, n_eigenpairs in [(FULL_SOLVER, None), (SUBSET_SOLVER, 3), (LANCZOS_SOLVER, 2)]:
+                for by_magnitude in [False, True]:
+                    eigenvalues, eigenvectors = symmetric_toeplitz_eigh(first_column, n_eigenpairs, solver=solver,
+                                                                        by_magnitude=by_magnitude)
+                    np_testing.assert_array_almost_equal(
+                        partial_eigh(matrix, n_eigenpairs, by_magnitude=by_magnitude, eigvals_only=True),
+                        eigenvalues)
+                    np_testing.assert_array_almost_equal(matrix @ eigenvectors, eigenvectors * eigenvalues)
+                    np_testing.assert_array_almost_equal(np.eye(len(eigenvalues)), eigenvectors.T @ eigenvectors)
+
+    def test_eigvals_only(self):
+        first_column = np.exp(-np.arange(9) ** 2 / 8)
+        np_testing.assert_array_almost_equal(symmetric_toeplitz_eigh(first_column)[0],
+                                             symmetric_toeplitz_eigh(first_column, eigvals_only=True))
+
+
+class TestBandedEigh(unittest.TestCase):
+    def setUp(self):
+        random_state = np.random.RandomState(42)
+        matrix = random_state.randn(30, 30)
+        self.matrix = np.triu(np.tril(matrix + matrix.T, 3), -3)
+
+    def test_matrix_bandwidth(self):
+        self.assertEqual(3, matrix_bandwidth(self.matrix))
+        self.assertEqual(0, matrix_bandwidth(np.diag(np.arange(4.))))
+        self.assertEqual(0, matrix_bandwidth(np.zeros((4, 4))))
+        self.assertEqual(3, matrix_bandwidth(scipy.linalg.toeplitz([1, 0, 0, 2, 0])))
+
+    def test_banded_storage(self):
+        band = banded_storage(self.matrix, 3)
+        self.assertEqual((4, 30), band.shape)
+        np_testing.assert_array_equal(np.diag(self.matrix), band[0])
+        np_testing.assert_array_equal(np.diag(self.matrix, -2), band[2, :28])
+        np_testing.assert_array_equal(np.zeros(2), band[2, 28:])
+
+    def test_banded_eigenvalue_sum(self):
+        for matrix in [self.matrix, scipy.linalg.toeplitz(np.r_[4, 0.9, -0.5, 0.3, np.zeros(26)])]:
+            band = banded_storage(matrix, 3)
+            eigenvalues = np.linalg.eigvalsh(matrix)
+            self.assertAlmostEqual(np.sum(eigenvalues), banded_eigenvalue_sum(band))
+            self.assertAlmostEqual(np.sum(np.abs(eigenvalues)), banded_eigenvalue_sum(band, by_magnitude=True))
+
+    def test_equal_dense_eigenproblem(self):
+        band = banded_storage(self.matrix, 3)
+        for n_eigenpairs in [None, 1, 5, 20]:
+            for by_magnitude in [False, True]:
+                eigenvalues, eigenvectors = banded_eigh(band, n_eigenpairs, by_magnitude=by_magnitude)
+                np_testing.assert_array_almost_equal(
+                    partial_eigh(self.matrix, n_eigenpairs, by_magnitude=by_magnitude, eigvals_only=True),
+                    eigenvalues)
+                np_testing.assert_array_almost_equal(self.matrix @ eigenvectors, eigenvectors * eigenvalues)
+                np_testing.assert_array_almost_equal(np.eye(len(eigenvalues)), eigenvectors.T @ eigenvectors)
+                np_testing.assert_array_almost_equal(
+                    eigenvalues, banded_eigh(band, n_eigenpairs, by_magnitude=by_magnitude, eigvals_only=True))
+
+    def test_clustered_eigenvalues(self):
+        first_column = np.zeros(200)
+        first_column[:4] = [1, 0.6, 0.3, 0.1]
+        matrix = scipy.linalg.toeplitz(first_column)
+        eigenvalues, eigenvectors = banded_eigh(banded_storage(matrix, 3), 6)
+        np_testing.assert_array_almost_equal(matrix @ eigenvectors, eigenvectors * eigenvalues)
+        np_testing.assert_array_almost_equal(np.eye(6), eigenvectors.T @ eigenvectors)
+
+
+class TestRandomizedEigh(unittest.TestCase):
+    def setUp(self):
+        random_state = np.random.RandomState(42)
+        eigenvectors, _ = np.linalg.qr(random_state.rand(50, 50))
+        self.eigenvalues = 0.5 ** np.arange(50)
+        self.matrix = eigenvectors @ np.diag(self.eigenvalues) @ eigenvectors.T
+
+    def test_equal_full_spectrum(self):
+        eigenvalues, eigenvectors = partial_eigh(self.matrix, 4)
+        values, vectors, residuals = randomized_eigh(self.matrix, 4, random_state=0)
+        np_testing.assert_array_almost_equal(eigenvalues, values)
+        np_testing.assert_array_almost_equal(np.abs(eigenvectors), np.abs(vectors))
+        self.assertTrue(np.all(residuals < 1e-6))
+
+    def test_residuals_decrease_with_power_iterations(self):
+        _, _, residuals = randomized_eigh(self.matrix, 4, n_oversamples=0, n_power_iterations=0, random_state=0)
+        _, _, iterated_residuals = randomized_eigh(self.matrix, 4, n_oversamples=0, n_power_iterations=4,
+                                                   random_state=0)
+        self.assertLess(np.max(iterated_residuals), np.max(residuals))
+
+    def test_zero_eigenvalues(self):
+        for matrix in [np.zeros((10, 10)), np.diag(np.r_[1.0, np.zeros(9)])]:
+            with np.errstate(divide='raise', invalid='raise'):
+                _, _, residuals = randomized_eigh(matrix, 3, random_state=0)
+            self.assertTrue(np.all(np.isfinite(residuals)))
@@ -0,0 +1,99 @@
+import unittest
+
+import numpy as np
+import numpy.testing as np_testing
+
+from utils.running_statistics import RunningTensorStatistics
+
+
+class TestRunningTensorStatistics(unittest.TestCase):
+    def setUp(self):
+        self.lag_time = 4
+        self.data_tensor = np.random.RandomState(42).rand(103, 5, 3) * 10 + 1e4
+        self.statistics = RunningTensorStatistics(self.lag_time)
+        for chunk in np.array_split(self.data_tensor, [1, 2, 30, 31, 70]):
+            self.statistics.update(chunk)
+        self.standardized = ((self.data_tensor - np.mean(self.data_tensor, axis=0)) /
+                             np.std(self.data_tensor, axis=0))
+
+    def test_mean_and_std(self):
+        self.assertEqual(self.data_tensor.shape, self.statistics.shape)
+        np_testing.assert_array_almost_equal(np.mean(self.data_tensor, axis=0), self.statistics.mean)
+        np_testing.assert_array_almost_equal(np.std(self.data_tensor, axis=0), self.statistics.std)
+
+    def test_covariance_tensor(self):
+        np_testing.assert_array_almost_equal(
+            [np.cov(self.standardized[:, :, index].T) for index in range(3)], self.statistics.covariance_tensor())
+        np_testing.assert_array_almost_equal(
+            [np.cov(self.standardized[:-self.lag_time, :, index].T) for index in range(3)],
+            self.statistics.covariance_tensor(lagged=True))
+
+    def test_lagged_correlation_tensor(self):
+        correlations = [np.dot(self.standardized[:-self.lag_time, :, index].T,
+                               self.standardized[self.lag_time:, :, index]) / (103 - self.lag_time)
+                        for index in range(3)]
+        np_testing.assert_array_almost_equal([0.5 * (corr + corr.T) for corr in correlations],
+                                             self.statistics.lagged_correlation_tensor())
+
+    def test_matrix_data(self):
+        data_matrix = self.data_tensor.reshape(103, 15)
+        statistics = RunningTensorStatistics()
+        for chunk in np.array_split(data_matrix, 4):
+            statistics.update(chunk)
+        self.assertEqual(data_matrix.shape, statistics.shape)
+        np_testing.assert_array_almost_equal(np.std(data_matrix, axis=0), statistics.std)
+        np_testing.assert_array_almost_equal(np.cov(data_matrix.T), statistics.covariance_tensor(use_std=False)[0])
+
+    def test_invalid_chunk_dimension(self):
+        with self.assertRaises(ValueError):
+            self.statistics.update(self.data_tensor.reshape(103, 15))
+
+    def test_new_trajectory(self):
+        statistics = RunningTensorStatistics(self.lag_time)
+        trajectories = np.array_split(self.data_tensor, [40])
+        for trajectory in trajectories:
+            for index, chunk in enumerate(np.array_split(trajectory, 3)):
+                statistics.update(chunk, new_trajectory=index == 0)
+        self.assertEqual(103 - 2 * self.lag_time, statistics.n_pairs)
+        standardized = np.array_split(self.standardized, [40])
+        correlations = [sum(np.dot(trajectory[:-self.lag_time, :, index].T, trajectory[self.lag_time:, :, index])
+                            for trajectory in standardized) / (103 - 2 * self.lag_time) for index in range(3)]
+        np_testing.assert_array_almost_equal([0.5 * (corr + corr.T) for corr in correlations],
+                                             statistics.lagged_correlation_tensor())
+
+
+class TestRunningTensorStatisticsForLagTimes(unittest.TestCase):
+    def setUp(self):
+        self.data_tensor = np.random.RandomState(42).rand(103, 5, 3) * 10 + 1e4
+        self.lag_times = [4, 1, 10, 4]
+
+    def test_equals_update(self):
+        for data in [self.data_tensor, self.data_tensor.reshape(103, 15)]:
+            for lag_time, statistics in zip(self.lag_times,
+                                            RunningTensorStatistics.for_lag_times(data, self.lag_times)):
+                expected = RunningTensorStatistics(lag_time)
+                for chunk in np.array_split(data, 3):
+                    expected.update(chunk)
+                self.assertEqual(expected.shape, statistics.shape)
+                np_testing.assert_array_almost_equal(expected.std, statistics.std)
+                np_testing.assert_array_almost_equal(expected.covariance_tensor(lagged=True),
+                                                     statistics.covariance_tensor(lagged=True))
+                np_testing.assert_array_almost_equal(expected.lagged_correlation_tensor(),
+                                                     statistics.lagged_correlation_tensor())
+
+    def test_fft_lagged_products(self):
+        layers = np.ascontiguousarray(np.moveaxis(self.data_tensor - np.mean(self.data_tensor, axis=0), 2, 0))
+        lag_times = list(range(1, 102))
+        lagged_products = RunningTensorStatistics._lagged_products(layers, lag_times, fft_cost_factor=0)
+        np_testing.assert_array_almost_equal(
+            [np.matmul(np.swapaxes(layers[:, :-lag_time], 1, 2), layers[:, lag_time:]) for lag_time in lag_times],
+            lagged_products)
+
+    def test_invalid_lag_times(self):
+        for lag_times in [[], [0, 1], [102]]:
+            with self.assertRaises(ValueError):
+                RunningTensorStatistics.for_lag_times(self.data_tensor, lag_times)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,61 @@
+import unittest
+
+import numpy as np
+
+from utils.stage_cache import StageCache, fingerprint
+
+
+class TestStageCache(unittest.TestCase):
+    def test_least_recently_used_eviction(self):
+        cache = StageCache(max_size=2)
+        cache.get('a', lambda: 1)
+        cache.get('b', lambda: 2)
+        self.assertEqual(1, cache.get('a', lambda: None))
+        cache.get('c', lambda: 3)
+        self.assertEqual(2, len(cache))
+        self.assertEqual(1, cache.get('a', lambda: None))
+        self.assertIsNone(cache.get('b', lambda: None))
+        self.assertEqual((2, 4), (cache.hits, cache.misses))
+
+    def test_cached_arrays_are_read_only(self):
+        cache = StageCache()
+        standardized, mean = cache.get('stage', lambda: (np.ones((3, 2)), np.zeros(2)))
+        self.assertFalse(standardized.flags.writeable)
+        self.assertFalse(mean.flags.writeable)
+
+    def test_active_cache(self):
+        self.assertIsNone(StageCache.active())
+        with StageCache() as outer:
+            with StageCache() as inner:
+                self.assertIs(inner, StageCache.active())
+            self.assertIs(outer, StageCache.active())
+        self.assertIsNone(StageCache.active())
+
+    def test_invalid_max_size(self):
+        with self.assertRaises(ValueError):
+            StageCache(max_size=0)
+
+
+class TestInputKey(unittest.TestCase):
+    def setUp(self):
+        self.data = np.random.RandomState(42).rand(50, 4, 3)
+
+    def test_equal_content_equal_key(self):
+        cache = StageCache()
+        self.assertEqual(cache.input_key(self.data), cache.input_key(self.data.copy()))
+        self.assertEqual(fingerprint(self.data[:, :, ::2]), fingerprint(self.data[:, :, ::2].copy()))
+        self.assertNotEqual(cache.input_key(self.data), cache.input_key(self.data[:, :, :2]))
+        self.assertNotEqual(fingerprint(self.data), fingerprint(self.data.astype(np.float32)))
+
+    def test_views_are_not_hashed_again(self):
+        cache = StageCache()
+        key = cache.input_key(self.data.view())
+        self.data[0, 0, 0] = -1  # not detected (views of a known region)
+        self.assertEqual(key, cache.input_key(self.data.view()))
+        cache.forget(self.data)
+        self.assertNotEqual(key, cache.input_key(self.data.view()))
+
+    def test_dead_arrays_are_discarded(self):
+        cache = StageCache()
+        cache.input_key(np.ones((10, 2)))
+        self.assertEqual(0, len(cache._input_keys))
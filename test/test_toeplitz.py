@@ -0,0 +1,73 @@
+import unittest
+
+import numpy as np
+import numpy.testing as np_testing
+import scipy.linalg
+
+from utils.matrix_tools import banded_storage
+from utils.toeplitz import ToeplitzMatrix, toeplitz_view
+
+
+class TestToeplitzView(unittest.TestCase):
+    def test_diagonal_values(self):
+        profile = np.array([10, 20, 30, 40, 50])
+        expected = np.array([[30, 40, 50],
+                             [20, 30, 40],
+                             [10, 20, 30]])
+        view = toeplitz_view(profile, (3, 3))
+        np_testing.assert_array_equal(view, expected)
+        self.assertFalse(view.flags.writeable)
+        self.assertTrue(np.shares_memory(view, profile))
+
+    def test_rectangular_shapes(self):
+        profile = np.arange(6.)
+        np_testing.assert_array_equal(toeplitz_view(profile, (2, 5)),
+                                      scipy.linalg.toeplitz(profile[1::-1], profile[1:]))
+        np_testing.assert_array_equal(toeplitz_view(profile, (5, 2)),
+                                      scipy.linalg.toeplitz(profile[4::-1], profile[4:]))
+
+    def test_invalid_profile(self):
+        with self.assertRaises(ValueError):
+            toeplitz_view(np.arange(4), (3, 3))
+
+
+class TestToeplitzMatrix(unittest.TestCase):
+    def setUp(self):
+        self.profile = np.random.RandomState(42).rand(9)
+        self.kernel_matrix = ToeplitzMatrix(self.profile, (5, 5))
+        self.dense = scipy.linalg.toeplitz(self.profile[4::-1], self.profile[4:])
+
+    def test_toarray(self):
+        dense = self.kernel_matrix.toarray()
+        np_testing.assert_array_equal(self.dense, dense)
+        self.assertTrue(dense.flags.writeable)
+        np_testing.assert_array_equal(self.dense, np.array(self.kernel_matrix))
+
+    def test_elementwise_combination(self):
+        covariance_matrix = np.random.RandomState(1).rand(5, 5)
+        difference = covariance_matrix.copy()
+        difference -= self.kernel_matrix
+        np_testing.assert_array_equal(covariance_matrix - self.dense, difference)
+        product = covariance_matrix.copy()
+        product *= self.kernel_matrix
+        np_testing.assert_array_equal(covariance_matrix * self.dense, product)
+
+    def test_matvec(self):
+        vectors = np.random.RandomState(1).rand(5, 3)
+        np_testing.assert_array_almost_equal(self.dense @ vectors, self.kernel_matrix @ vectors)
+        np_testing.assert_array_almost_equal(self.dense @ vectors[:, 0], self.kernel_matrix.matvec(vectors[:, 0]))
+
+    def test_profile_is_copied(self):
+        self.profile[0] = -1
+        self.assertNotEqual(-1, self.kernel_matrix.toarray()[4, 0])
+        self.assertEqual(np.float32, ToeplitzMatrix(self.profile, (5, 5), dtype=np.float32).dtype)
+
+    def test_bandwidth(self):
+        self.assertEqual(4, self.kernel_matrix.bandwidth)
+        self.assertEqual(2, ToeplitzMatrix([0, 0, 1, 2, 3, 2, 1, 0, 0], (5, 5)).bandwidth)
+        self.assertEqual(0, ToeplitzMatrix(np.zeros(9), (5, 5)).bandwidth)
+
+    def test_lower_band(self):
+        profile = np.array([0, 0, 1, 2, 3, 2, 1, 0, 0], dtype=float)
+        kernel_matrix = ToeplitzMatrix(profile, (5, 5))
+        np_testing.assert_array_equal(banded_storage(kernel_matrix.toarray(), 2), kernel_matrix.lower_band(2))
@@ -0,0 +1,113 @@
+import os
+import tempfile
+import unittest
+import warnings
+from unittest.mock import patch
+
+import mdtraj as md
+import numpy as np
+import numpy.testing as np_testing
+
+from utils.param_keys import *
+from utils.param_keys.model import ALGORITHM_NAME, NDIM, KERNEL_MAP
+from utils.param_keys.traj_dims import TIME_FRAMES
+
+try:
+    from trajectory import ProteinTrajectory, StreamingProteinTrajectory
+except ImportError:  # The interfaces of the original algorithms need deeptime and pyemma
+    ProteinTrajectory = StreamingProteinTrajectory = None
+
+
+def _save_test_trajectory(folder_path, n_frames=60, n_residues=6):
+    topology = md.Topology()
+    chain = topology.add_chain()
+    for _ in range(n_residues):
+        residue = topology.add_residue('ALA', chain)
+        for name, symbol in [('N', 'N'), ('CA', 'C'), ('C', 'C')]:
+            topology.add_atom(name, md.element.get_by_symbol(symbol), residue)
+    random_state = np.random.RandomState(42)
+    n_atoms = topology.n_atoms
+    xyz = (np.arange(n_atoms)[np.newaxis, :, np.newaxis] * np.array([0.15, 0.02, 0.01]) +
+           np.cumsum(random_state.randn(n_frames, n_atoms, 3) * 0.01, axis=0))
+    trajectory = md.Trajectory(xyz.astype(np.float32), topology)
+    trajectory[0].save_pdb(os.path.join(folder_path, 'topology.pdb'))
+    trajectory.save_dcd(os.path.join(folder_path, 'trajectory.dcd'))
+
+
+@unittest.skipIf(ProteinTrajectory is None, 'The trajectory module needs deeptime and pyemma.')
+class TestProteinTrajectory(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.folder = tempfile.TemporaryDirectory()
+        _save_test_trajectory(cls.folder.name)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.folder.cleanup()
+
+    def setUp(self):
+        warnings.simplefilter("ignore", category=UserWarning)
+        self.trajectory = ProteinTrajectory('trajectory.dcd', 'topology.pdb', folder_path=self.folder.name,
+                                            params={SUPERPOSING_INDEX: 0})
+
+    def test_in_place_model_keeps_coordinates(self):
+        coordinates = np.copy(self.trajectory.atom_coordinates)
+        model_params = {ALGORITHM_NAME: 'pca', NDIM: TENSOR_NDIM, 'kernel_kwargs': {KERNEL_MAP: None}}
+        expected_model, _ = self.trajectory.get_model_and_projection(model_params, log=False)
+        model, _ = self.trajectory.get_model_and_projection(dict(model_params, copy=False), log=False)
+        self.assertTrue(self.trajectory.atom_coordinates.flags.writeable)
+        np_testing.assert_array_equal(coordinates, self.trajectory.atom_coordinates)
+        np_testing.assert_array_almost_equal(expected_model.explained_variance_, model.explained_variance_)
+
+
+@unittest.skipIf(StreamingProteinTrajectory is None, 'The trajectory module needs deeptime and pyemma.')
+class TestStreamingProteinTrajectory(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.folder = tempfile.TemporaryDirectory()
+        _save_test_trajectory(cls.folder.name)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.folder.cleanup()
+
+    def setUp(self):
+        warnings.simplefilter("ignore", category=UserWarning)
+        self.model_params = {ALGORITHM_NAME: 'pca', NDIM: TENSOR_NDIM, 'kernel_kwargs': {KERNEL_MAP: None}}
+
+    def _load(self, trajectory_class, **params):
+        return trajectory_class('trajectory.dcd', 'topology.pdb', folder_path=self.folder.name,
+                                params=dict({SUPERPOSING_INDEX: 0}, **params))
+
+    def test_default_params(self):
+        trajectory = StreamingProteinTrajectory('trajectory.dcd', 'topology.pdb', folder_path=self.folder.name)
+        self.assertEqual(60, trajectory.dim[TIME_FRAMES])
+
+    def test_equal_in_memory_trajectory(self):
+        for params in [{}, {CARBON_ATOMS_ONLY: False}, {BASIS_TRANSFORMATION: True}]:
+            in_memory = self._load(ProteinTrajectory, **params)
+            for chunk_size in [7, 16, 60, 100]:
+                streaming = self._load(StreamingProteinTrajectory, **{CHUNK_SIZE: chunk_size}, **params)
+                for n_dim in [TENSOR_NDIM, MATRIX_NDIM]:
+                    np_testing.assert_allclose(in_memory.data_input({NDIM: n_dim}),
+                                               streaming.data_input({NDIM: n_dim}), atol=1e-4)
+
+    def test_equal_in_memory_components(self):
+        in_memory_model, in_memory_projection = self._load(ProteinTrajectory).get_model_and_projection(
+            self.model_params, log=False)
+        for chunk_size in [7, 16, 60]:
+            streaming = self._load(StreamingProteinTrajectory, **{CHUNK_SIZE: chunk_size})
+            model, projection = streaming.get_model_and_projection(self.model_params, log=False)
+            np_testing.assert_allclose(in_memory_model.explained_variance_, model.explained_variance_,
+                                       rtol=1e-3, atol=1e-6)
+            np_testing.assert_allclose(np.abs(in_memory_projection), np.abs(projection), atol=1e-2)
+
+    def test_random_reference_frame_without_counting_pass(self):
+        with patch.object(StreamingProteinTrajectory, '_iterload',
+                          autospec=True, side_effect=StreamingProteinTrajectory._iterload) as iterload:
+            self._load(StreamingProteinTrajectory, **{SUPERPOSING_INDEX: -1})
+        self.assertEqual(1, iterload.call_count)  # only the statistics pass
+
+
+if __name__ == '__main__':
+    unittest.main()
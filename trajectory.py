@@ -13,12 +13,13 @@ from utils.algorithms.dropp import DROPP
 from utils.algorithms.interfaces import DeeptimeTICAInterface, PyemmaTICAInterface, PyemmaPCAInterface
 from utils.algorithms.tsne import MyTSNE, MyTimeLaggedTSNE
 from utils.errors import InvalidSubsetTrajectory
-from utils.math import basis_transform, explained_variance
+from utils.math import basis_transform, explained_variance, basis_transformation_matrix
 from utils.matrix_tools import reconstruct_matrix
 from utils.param_keys import *
 from utils.param_keys.model import ALGORITHM_NAME, NDIM, LAG_TIME
 from utils.param_keys.model_result import MODEL, PROJECTION, TITLE_PREFIX, EXPLAINED_VAR, INPUT_PARAMS
 from utils.param_keys.traj_dims import TIME_FRAMES, TIME_DIM, ATOMS, ATOM_DIM, COORDINATES, COORDINATE_DIM
+from utils.running_statistics import RunningTensorStatistics
 
 
 class TrajectoryFile:
@@ -82,7 +83,8 @@ class DataTrajectory(TrajectoryFile):
         model, projection = self.get_model_and_projection(model_parameters, log=log)
         try:
             # TODO@Oli&Prio4: Explained Variance not correctly calculated
-            ex_var = explained_variance(model.explained_variance_, self.params[N_COMPONENTS])
+            ex_var = explained_variance(model.explained_variance_, self.params[N_COMPONENTS],
+                                        getattr(model, 'total_variance_', None))
         except AttributeError as e:
             if not isinstance(model, FastICA):
                 warnings.warn(str(e))
@@ -121,7 +123,8 @@ class DataTrajectory(TrajectoryFile):
         if log:
             print(f'Running {model_parameters}...')
 
-        if inp is None:
+        owned_input = inp is None
+        if owned_input:
             inp = self.data_input(model_parameters)
 
         if ALGORITHM_NAME not in model_parameters.keys():
@@ -157,6 +160,9 @@ class DataTrajectory(TrajectoryFile):
                                 f'Original algorithms take only 2-n-dimensional ndarray')
         else:
             model = DROPP(**model_parameters)
+            if not model.copy and owned_input:
+                # The data can be owned by the trajectory, the model standardizes its own copy in place
+                inp = np.array(inp, dtype=model.dtype)
             return model, model.fit_transform(inp, n_components=self.params[N_COMPONENTS])
 
 
@@ -406,6 +412,184 @@ class ProteinTrajectory(DataTrajectory):
                                                  self.dim[COORDINATES]))
 
 
+class StreamingProteinTrajectory(DataTrajectory):
+    def __init__(self, filename, topology_filename=None, folder_path='data/2f4k', params=None, atoms=None, **kwargs):
+        """
+        Protein trajectory, which streams the frames from the disk in chunks (`md.iterload`),
+        instead of loading the whole trajectory into the memory like the `ProteinTrajectory`.
+        The peak memory is bounded by the chunk size and not by the length of the trajectory.
+        The frames are superposed on a fixed reference frame, and standardized with the statistics
+        of a first pass over the trajectory (two-pass standardization).
+        DROPP models are fitted chunk by chunk with `partial_fit`, and the chunks are transformed one by one.
+        @param filename: str
+            Filename of the trajectory
+        @param topology_filename: str
+            Filename of the topology (pdb), which is also the reference for SUPERPOSING_INDEX None
+        @param folder_path: str
+            Folder path of the files
+        @param params: dict
+            Trajectory parameters, additionally with CHUNK_SIZE (default: 1000 frames)
+        @param atoms: list
+            Atom indices to load (default: None -> all atoms)
+        """
+        super().__init__(filename, folder_path, extra_filename=topology_filename, params=params, **kwargs)
+        if params is None:
+            params = {}
+        self.atoms = atoms
+        try:
+            print(f"Loading topology {self.extra_filename}...")
+            self.reference_pdb = md.load_pdb(self.extra_filepath, atom_indices=atoms)
+        except IOError:
+            raise FileNotFoundError(f"Cannot load {self.extra_filepath}.")
+
+        self.params.update({
+            CARBON_ATOMS_ONLY: params.get(CARBON_ATOMS_ONLY, True),
+            BASIS_TRANSFORMATION: params.get(BASIS_TRANSFORMATION, False),
+            RANDOM_SEED: params.get(RANDOM_SEED, 42),
+            USE_ANGLES: params.get(USE_ANGLES, False),
+            SUPERPOSING_INDEX: params.get(SUPERPOSING_INDEX, -1),
+            CHUNK_SIZE: params.get(CHUNK_SIZE, 1000)
+        })
+
+        self._check_init_params()
+        self._init_preprocessing()
+
+    def _iterload(self):
+        """
+        @return: generator of the (not preprocessed) trajectory chunks
+        """
+        try:
+            return md.iterload(self.filepath, chunk=self.params[CHUNK_SIZE], top=self.extra_filepath,
+                               atom_indices=self.atoms)
+        except IOError:
+            raise FileNotFoundError(f"Cannot load {self.filepath}.")
+
+    def _init_preprocessing(self):
+        """
+        Determines the reference frame of the superposition and the basis transformation, and
+        calculates the mean and standard deviation of the superposed coordinates in a first pass.
+        """
+        if self.params[SUPERPOSING_INDEX] is None:
+            self.reference_frame = self.reference_pdb
+        else:
+            superposing_frame = self.params[SUPERPOSING_INDEX]
+            if superposing_frame < 0:
+                superposing_frame = random.randint(0, self._count_frames() - 1)
+                print(f'Random frame: {superposing_frame}')
+            self.reference_frame = md.load_frame(self.filepath, superposing_frame, top=self.extra_filepath,
+                                                 atom_indices=self.atoms)
+
+        statistics = RunningTensorStatistics()
+        for chunk in self._iterload():
+            statistics.update(self._superpose(chunk).xyz)
+        self.mean = statistics.mean[np.newaxis, :, :]
+        self.std = statistics.std
+        self.dim: dict = {TIME_FRAMES: statistics.n_samples,
+                          ATOMS: statistics.shape[ATOM_DIM],
+                          COORDINATES: statistics.shape[COORDINATE_DIM]}
+        if self.params[BASIS_TRANSFORMATION]:
+            # Drawn once, so that all the chunks are transformed into the same basis
+            np.random.seed(self.params[RANDOM_SEED])
+            self.transformation_matrix = basis_transformation_matrix(self.dim[COORDINATES])
+        print(f"Trajectory `{self.filename}` with {self.dim} successfully preprocessed.")
+
+    def _count_frames(self) -> int:
+        """
+        @return: The number of frames of the trajectory, from the header of the file if the format stores it,
+            otherwise from a pass over the trajectory
+        """
+        try:
+            with md.open(self.filepath) as trajectory_file:
+                return len(trajectory_file)
+        except (TypeError, NotImplementedError, IOError):
+            return sum(chunk.n_frames for chunk in self._iterload())
+
+    def _superpose(self, chunk: Trajectory) -> Trajectory:
+        return chunk.superpose(self.reference_frame).center_coordinates(mass_weighted=True)
+
+    @property
+    def max_components(self) -> int:
+        if self.params[USE_ANGLES]:
+            return md.compute_phi(self.reference_pdb)[ANGLE_INDICES].shape[0] * 2
+        else:
+            if self.params[CARBON_ATOMS_ONLY]:
+                return len(self.alpha_carbon_indexes) * self.dim[COORDINATES]
+            return self.dim[ATOMS] * self.dim[COORDINATES]
+
+    @property
+    def alpha_carbon_indexes(self) -> list:
+        return [a.index for a in self.reference_pdb.topology.atoms if a.name == 'CA']
+
+    def iter_data_input(self, model_parameters: dict = None):
+        """
+        Streams the input data for the model chunk by chunk,
+        the concatenated chunks are equal to the `data_input` of the `ProteinTrajectory`.
+        @param model_parameters: dict
+            The input parameters for the model.
+        @return: generator of np.ndarray
+            The chunks of the input data for the model
+        """
+        try:
+            n_dim = TENSOR_NDIM if model_parameters is None else model_parameters[NDIM]
+        except KeyError as e:
+            raise KeyError(f'Model-parameter-dict needs the key: {e}. Set to ´2´ or ´3´.')
+
+        for chunk in self._iterload():
+            if self.params[USE_ANGLES]:
+                phi = md.compute_phi(chunk)[DIHEDRAL_ANGLE_VALUES]
+                psi = md.compute_psi(chunk)[DIHEDRAL_ANGLE_VALUES]
+                if n_dim == MATRIX_NDIM:
+                    yield np.concatenate([phi, psi], axis=1)
+                else:
+                    yield np.concatenate([phi[:, :, np.newaxis], psi[:, :, np.newaxis]], axis=2)
+                continue
+
+            coordinates = (self._superpose(chunk).xyz - self.mean) / self.std
+            if self.params[BASIS_TRANSFORMATION]:
+                coordinates = basis_transform(coordinates, self.dim[COORDINATES], self.transformation_matrix)
+            if self.params[CARBON_ATOMS_ONLY]:
+                coordinates = coordinates[:, self.alpha_carbon_indexes, :]
+
+            if n_dim == MATRIX_NDIM:
+                yield coordinates.reshape(coordinates.shape[TIME_DIM], -1)
+            else:
+                yield coordinates
+
+    def data_input(self, model_parameters: dict = None) -> np.ndarray:
+        """
+        Loads the whole input data into the memory (e.g. for the original algorithms).
+        Use `iter_data_input` to stream the data.
+        """
+        return np.concatenate(list(self.iter_data_input(model_parameters)), axis=TIME_DIM)
+
+    def get_model_and_projection(self, model_parameters: dict, inp: np.ndarray = None, log: bool = True):
+        """
+        Fits a DROPP model chunk by chunk and transforms the chunks on the model.
+        Other models and a given inp(ut) are handled in memory as in the `DataTrajectory`.
+        @param model_parameters: dict
+            The input parameters for the model.
+        @param inp: np.ndarray
+            Input data for the model (optional), (default: None -> streamed on the basis of the model_parameters)
+        @param log: bool
+            Enables the log output while running the program (default: True)
+        @return: fitted model and transformed data
+        """
+        if inp is not None or model_parameters.get(ALGORITHM_NAME, 'original').startswith('original'):
+            return super().get_model_and_projection(model_parameters, inp, log)
+
+        if log:
+            print(f'Running {model_parameters} on chunks of {self.params[CHUNK_SIZE]} frames...')
+
+        model = DROPP(**model_parameters)
+        for chunk in self.iter_data_input(model_parameters):
+            model.partial_fit(chunk)
+        model.finalize(n_components=self.params[N_COMPONENTS])
+        # Standardize the chunks with the statistics of the whole trajectory, not with the statistics of the chunk
+        projection = [model.transform(chunk, use_fitted_statistics=True)
+                      for chunk in self.iter_data_input(model_parameters)]
+        return model, np.concatenate(projection, axis=TIME_DIM)
+
+
 class SubTrajectoryDecorator(DataTrajectory):
     def __init__(self,
                  data_trajectory: DataTrajectory,
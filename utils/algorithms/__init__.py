@@ -2,8 +2,10 @@ import numpy as np
 from sklearn.base import TransformerMixin, BaseEstimator
 
 from utils.errors import ModelNotFittedError
-from utils.matrix_tools import diagonal_block_expand
-from utils.param_keys import N_COMPONENTS
+from utils.math import centered_std
+from utils.matrix_tools import diagonal_block_expand, partial_eigh
+from utils.param_keys import N_COMPONENTS, OUT
+from utils.param_keys.model import FULL_SOLVER, COPY
 from utils.param_keys.traj_dims import TIME_DIM, COORDINATE_DIM, FEATURE_DIM, COMBINED_DIM
 
 
@@ -14,8 +16,14 @@ class MyModel(TransformerMixin, BaseEstimator):
     and commented with the help of:
     https://www.askpython.com/python/examples/principal-component-analysis
     """
-    def __init__(self):
+    def __init__(self, copy=True):
+        """
+        :param copy: If False, the data passed to `fit` is standardized in place and overwritten (default: True).
+            The data has to be a writable numpy array with the dtype of the model (see `_get_standardization_buffer`).
+        """
+        self.copy = copy
         self.explained_variance_ = None
+        self.total_variance_ = None
         self.components_ = None
         self._standardized_data_ = None
         self.n_components = None
@@ -33,30 +41,74 @@ class MyModel(TransformerMixin, BaseEstimator):
         return self._standardized_data_
 
     def fit_transform(self, data_ndarray, **fit_params):
+        """
+        Fit the model and project the training data,
+        which is already standardized by the fit (no second standardization pass).
+        """
         self.fit(data_ndarray, **fit_params)
-        return self.transform(data_ndarray)
+        return self._project(self._standardized_data)
 
     def fit(self, data_matrix, **fit_params):
+        """
+        :param data_matrix: Data as matrix
+        :param fit_params: 'n_components' (default: 2) and 'out', a buffer for the standardized data (optional),
+            which is kept by the model as its standardized data.
+        :return: self
+        """
         self.n_samples = data_matrix.shape[0]
         self.n_components = fit_params.get(N_COMPONENTS, 2)
-        self._standardized_data_ = self._standardize_data(data_matrix)
+        self._standardized_data_ = self._standardize_data(
+            data_matrix, out=self._get_standardization_buffer(data_matrix, fit_params.get(OUT)))
         self._covariance_matrix = self.get_covariance_matrix()
         self.components_ = self._get_eigenvectors()[:, :self.n_components].T
         return self
 
-    @staticmethod
-    def _standardize_data(matrix):
+    @property
+    def _dtype(self):
+        return np.dtype(np.float64)
+
+    def _standardize_data(self, matrix, out=None):
         """
         Subtract mean and divide by standard deviation column-wise.
         Doing this proves to be very helpful when calculating the covariance matrix.
         https://towardsdatascience.com/understanding-the-covariance-matrix-92076554ea44
         Mean-Center the data
         :param matrix: Data as matrix
+        :param out: Array for the standardized data (optional, default: a new array).
+            The matrix itself can be passed to standardize it in place.
         :return: Standardized data matrix
         """
-        numerator = matrix - np.mean(matrix, axis=0)
-        denominator = np.std(matrix, axis=0)
-        return numerator / denominator
+        standardized_matrix = np.subtract(matrix, np.mean(matrix, axis=0, dtype=np.float64), out=out, dtype=self._dtype)
+        standardized_matrix /= centered_std(standardized_matrix)
+        return standardized_matrix
+
+    def _get_standardization_buffer(self, data, out=None):
+        """
+        Get the array for the standardized data of the fit and enforce the ownership rules of the data:
+        - The data is only overwritten, if the model is initialized with `copy=False` or if it is passed as `out`.
+        - The buffer has to be a writable numpy array with the shape of the data and the dtype of the model,
+          so read-only arrays (e.g. the coordinates of a trajectory) are never overwritten.
+        - The buffer is either the data itself or does not share memory with the data.
+        The model keeps the buffer as its standardized data, so it should not be changed after the fit.
+        :param data: Input data of the fit
+        :param out: Buffer for the standardized data (optional)
+        :return: The buffer, or None if a new array is allocated
+        """
+        if out is None:
+            if self.copy:
+                return None
+            out = data
+
+        name = f"'{OUT}'" if out is not data else f"The data for '{COPY}=False'"
+        if not isinstance(out, np.ndarray) or not out.flags.writeable:
+            raise ValueError(f"{name} has to be a writable numpy array to be standardized in place.")
+        if out.shape != data.shape or out.dtype != self._dtype:
+            raise ValueError(f"{name} has the shape {out.shape} and dtype {out.dtype}, "
+                             f"but the standardized data has the shape {data.shape} and dtype {self._dtype}.")
+        if out is not data and np.may_share_memory(out, data):
+            raise ValueError(f"'{OUT}' shares memory with the data, "
+                             "pass the data itself to standardize it in place.")
+        return out
 
     def get_covariance_matrix(self):
         """
@@ -74,22 +126,32 @@ class MyModel(TransformerMixin, BaseEstimator):
         :return: Data reduced to lower dimensions from higher dimensions
         """
         data_matrix_standardized = self._standardize_data(data_matrix)
-        return np.dot(data_matrix_standardized, self.components_.T)
+        return self._project(data_matrix_standardized)
+
+    def _project(self, standardized_matrix):
+        """
+        Project standardized data onto the components.
+        :param standardized_matrix: Standardized data matrix
+        :return: Data reduced to lower dimensions
+        """
+        return np.dot(standardized_matrix, self.components_.T)
 
 
 class TensorDR(MyModel):
-    def __init__(self, cov_stat_func=np.mean):
-        super().__init__()
+    def __init__(self, cov_stat_func=np.mean, solver=FULL_SOLVER, copy=True):
+        super().__init__(copy)
 
         if isinstance(cov_stat_func, str):
             cov_stat_func = eval(cov_stat_func)
 
         self.cov_stat_func = cov_stat_func
+        self.solver = solver  # full, subset, lanczos
 
     def fit(self, data_tensor, **fit_params):
         self.n_samples = data_tensor.shape[TIME_DIM]
         self.n_components = fit_params.get(N_COMPONENTS, 2)
-        self._standardized_data_ = self._standardize_data(data_tensor)
+        self._standardized_data_ = self._standardize_data(
+            data_tensor, out=self._get_standardization_buffer(data_tensor, fit_params.get(OUT)))
         self._covariance_matrix = self.get_covariance_matrix()
         self._update_cov()
         self.components_ = self._get_eigenvectors()[:, :self.n_components].T
@@ -103,18 +165,22 @@ class TensorDR(MyModel):
         self._covariance_matrix = diagonal_block_expand(averaged_cov, self._covariance_matrix.shape[0])
 
     def _get_eigenvectors(self):
-        # calculate eigenvalues & eigenvectors of covariance matrix
-        eigenvalues, eigenvectors = np.linalg.eigh(self._covariance_matrix)
-
-        # sort eigenvalues descending
-        sorted_eigenvalue_indexes = np.argsort(eigenvalues)[::-1]
-        self.explained_variance_ = eigenvalues[sorted_eigenvalue_indexes]
-        return eigenvectors[:, sorted_eigenvalue_indexes]
+        # calculate the sorted (descending) eigenvalues & eigenvectors of covariance matrix
+        if self.solver == FULL_SOLVER:
+            self.explained_variance_, eigenvectors = partial_eigh(self._covariance_matrix)
+        else:
+            self.explained_variance_, eigenvectors = partial_eigh(self._covariance_matrix, self.n_components,
+                                                                  solver=self.solver)
+            self.total_variance_ = np.trace(self._covariance_matrix)
+        return eigenvectors
 
     def transform(self, data_tensor):
         data_matrix = self.convert_to_matrix(data_tensor)
         return super(TensorDR, self).transform(data_matrix)
 
+    def _project(self, standardized_tensor):
+        return super()._project(self.convert_to_matrix(standardized_tensor))
+
     def convert_to_matrix(self, tensor):
         return tensor.reshape(tensor.shape[TIME_DIM],
                               self._standardized_data.shape[FEATURE_DIM] *
@@ -1,24 +1,40 @@
+import functools
+import importlib
+import json
 import warnings
 
 import numpy as np
 import scipy
-from sklearn.decomposition import PCA
+from scipy.sparse.linalg import LinearOperator
 from sklearn.metrics import mean_squared_error
 
 from research_evaluations.plotter import ArrayPlotter, MultiArrayPlotter
 from utils import statistical_zero
 from utils.algorithms import TensorDR
-from utils.errors import NonInvertibleEigenvectorException, InvalidComponentNumberException
-from utils.math import is_matrix_orthogonal
-from utils.matrix_tools import diagonal_block_expand, calculate_symmetrical_kernel_matrix, ensure_matrix_symmetry
-from utils.param_keys import N_COMPONENTS, MATRIX_NDIM, TENSOR_NDIM
+from utils.array_tools import load_npz
+from utils.errors import NonInvertibleEigenvectorException, InvalidComponentNumberException, ModelNotFittedError
+from utils.math import is_matrix_orthogonal, centered_std, implied_timescales
+from utils.matrix_tools import diagonal_block_expand, calculate_symmetrical_kernel_matrix, ensure_matrix_symmetry, \
+    coordinate_block_expand, partial_eigh, randomized_eigh, accumulated_gram, symmetric_toeplitz_eigh, \
+    banded_storage, banded_eigh, eigenvalue_sum, banded_eigenvalue_sum
+from utils.param_keys import N_COMPONENTS, MATRIX_NDIM, TENSOR_NDIM, OUT
 from utils.param_keys.analyses import CORRELATION_MATRIX_PLOT, EIGENVECTOR_MATRIX_ANALYSE, COVARIANCE_MATRIX_PLOT
 from utils.param_keys.kernel_functions import MY_GAUSSIAN, KERNEL_ONLY, KERNEL_DIFFERENCE, KERNEL_MULTIPLICATION, \
-    GAUSSIAN
+    GAUSSIAN, ITERATIVE_KERNEL_FIT
 from utils.param_keys.model import *
 from utils.param_keys.traj_dims import TIME_DIM, FEATURE_DIM, COMBINED_DIM
+from utils.running_statistics import RunningTensorStatistics, FFT_COST_FACTOR
+from utils.stage_cache import StageCache, fingerprint
 from utils.timer import Timer
 
+# Version of the file layout of `DROPP.save`
+MODEL_FORMAT_VERSION = 1
+
+# Largest ratio of the kernel bandwidth to the matrix size, up to which the eigenproblem is solved in the banded
+# form. The reduction of the band is slower than the dense subset solver for wider bands, e.g. for n=2000:
+# bandwidth 100 (5 %) 0.53s banded vs 0.81s dense, but bandwidth 200 (10 %) 0.99s banded vs 0.76s dense.
+MAX_BANDED_SOLVER_RATIO = 0.05
+
 
 class DROPP(TensorDR):
     def __init__(self,
@@ -34,6 +50,14 @@ class DROPP(TensorDR):
                  analyse_plot_type: str = '',
                  use_std: bool = True,
                  center_over_time: bool = True,
+                 use_kronecker_structure: bool = True,
+                 solver: str = FULL_SOLVER,  # full, subset, lanczos, randomized
+                 n_oversamples: int = 10,
+                 n_power_iterations: int = 4,
+                 random_state: [int, None] = None,
+                 dtype: [type, str] = np.float64,
+                 copy: bool = True,
+                 regularization: float = 0.,
                  performance_test: bool = False
                  ):
         """
@@ -52,7 +76,8 @@ class DROPP(TensorDR):
             Use 3 for tensor or 2 for matrix. Default is TENSOR_NDIM.
         kernel_kwargs : dict or None, optional
             Additional arguments for the kernel function used in the algorithm.
-            Default is None.
+            'iterative_kernel_fit' set to True fits the kernel curve only with `curve_fit`, instead of the
+            closed-form estimates (see `get_fitted_y_curve`). Default is None.
         cov_function : callable or str, optional
             Function to compute the covariance or correlation matrix.
             Choose from np.cov, np.corrcoef, or 'co_mad'. Default is np.cov.
@@ -74,6 +99,48 @@ class DROPP(TensorDR):
         center_over_time : bool, optional
             Center data over time before dimensionality reduction. Default is True.
             (Preprocessing is still recommended)
+        use_kronecker_structure : bool, optional
+            Exploit the block structure of the tensor covariance matrix. Default is True.
+            The block expanded matrix equals the Kronecker product of the combined covariance matrix
+            and the identity, so only the (_feature_dim x _feature_dim) matrix is decomposed.
+            Set to False to decompose the dense block expanded matrix (reference implementation).
+        solver : str, optional
+            Eigensolver for the decomposition. Choose from 'full', 'subset', 'lanczos', or 'randomized'.
+            Default is 'full'.
+            The partial solvers calculate only the eigenpairs needed for `n_components` and `nth_eigenvector`,
+            the total variance for the explained variance ratio is then calculated with the trace.
+            Time-lagged models need a positive definite covariance matrix for these solvers.
+            'randomized' never materializes the covariance matrix and uses only products with the
+            standardized data (X^T (X v) / (T - 1)). It supports 'pca' with `np.cov`, `np.mean` and no kernel map.
+        n_oversamples : int, optional
+            Number of additional random vectors of the 'randomized' solver. Default is 10.
+        n_power_iterations : int, optional
+            Number of power iterations of the 'randomized' solver. Default is 4.
+        random_state : int or None, optional
+            Seed of the random vectors of the 'randomized' solver. Default is None.
+        dtype : type or str, optional
+            Floating point type of the standardized data, the matrix products, the covariance matrices
+            in the full feature space (matrix models and block expanded matrices), the components and the projection.
+            Default is np.float64. With np.float32 the memory is halved and the matrix products run in single
+            precision, but the reductions (means, standard deviations and the sums of the covariance products)
+            are accumulated in float64, and the combined (_feature_dim x _feature_dim) matrices of Kronecker
+            structured models are decomposed in float64.
+            Accuracy of np.float32 compared with np.float64 (eps = 6e-8, standardized data):
+            the covariance entries deviate by about 1e-6 (at most 4096 * eps = 2.4e-4, the block size of
+            `accumulated_gram`), the eigenvalues by at most the spectral norm of the covariance deviation (Weyl),
+            the eigenvectors by this deviation divided by the gap to the next eigenvalue,
+            and projections by about 1e-6 relatively for well separated eigenvalues.
+            For the generalized eigenproblem of time-lagged models in the full feature space,
+            the deviation is additionally amplified by the condition number of the covariance matrix.
+        copy : bool, optional
+            If False, the data passed to `fit` is standardized in place and overwritten, instead of a copy.
+            Default is True. The data has to be a writable numpy array with the 'dtype' of the model,
+            otherwise a ValueError is raised (see `_get_standardization_buffer`). Alternatively,
+            a buffer for the standardized data can be passed to `fit` with the fit parameter 'out'.
+        regularization : float, optional
+            Regularization of the covariance matrix for the generalized eigenproblem of 'tica' and 'kica'.
+            The covariance matrix C is replaced by C + regularization * mean(diag(C)) * I,
+            to stabilize near-singular covariance matrices. Default is 0. (no regularization).
         performance_test: bool, optional
             Use timing for performance tests. Default is False.
 
@@ -101,7 +168,7 @@ class DROPP(TensorDR):
         >>> custom_dropp = custom_dropp.fit(data)
         >>> transformed_data = custom_dropp.transform(data)
         """
-        super().__init__(cov_stat_func)
+        super().__init__(cov_stat_func, solver, copy)
 
         self.algorithm_name = algorithm_name
         self.ndim = ndim
@@ -115,7 +182,8 @@ class DROPP(TensorDR):
             KERNEL_STAT_FUNC: kernel_kwargs.get(KERNEL_STAT_FUNC, statistical_zero),
             USE_ORIGINAL_DATA: kernel_kwargs.get(USE_ORIGINAL_DATA, False),
             CORR_KERNEL: kernel_kwargs.get(CORR_KERNEL, False),
-            ONES_ON_KERNEL_DIAG: kernel_kwargs.get(ONES_ON_KERNEL_DIAG, False)
+            ONES_ON_KERNEL_DIAG: kernel_kwargs.get(ONES_ON_KERNEL_DIAG, False),
+            ITERATIVE_KERNEL_FIT: kernel_kwargs.get(ITERATIVE_KERNEL_FIT, False)
         }
 
         self.cov_function = cov_function
@@ -128,7 +196,19 @@ class DROPP(TensorDR):
         self.analyse_plot_type = analyse_plot_type
         self.use_std = use_std
         self.center_over_time = center_over_time
+        self.use_kronecker_structure = use_kronecker_structure
+        self.n_oversamples = n_oversamples
+        self.n_power_iterations = n_power_iterations
+        self.random_state = random_state
+        self.dtype = dtype
+        self.regularization = regularization
         self.performance_test = performance_test
+        self._running_statistics = None
+        self._loaded_data_shape = None
+        self._stage_key = None
+        self._kernel_matrix = None
+        self.mean = None
+        self._std = None
         self.__check_init_params__()
 
     def __check_init_params__(self):
@@ -147,6 +227,15 @@ class DROPP(TensorDR):
             - If 'algorithm_name' indicates a time-lagged approach, but 'lag_time' is 0.
             - If 'kernel_kwargs[KERNEL_STAT_FUNC]' is a string, it's evaluated to a callable.
               Note: Using 'eval' on user input may be risky. Ensure security.
+            - If 'extra_dr_layer' is True and a partial 'solver' is set,
+              the full spectrum is calculated as the layer needs all eigenvectors.
+
+        Raises
+        ------
+        ValueError
+            If 'solver' is not a valid eigensolver name,
+            or the 'randomized' solver is used with a model, which needs the materialized covariance matrix,
+            or 'dtype' is not np.float32 or np.float64, or 'regularization' is negative.
 
         Notes
         -----
@@ -179,6 +268,31 @@ class DROPP(TensorDR):
 
             self.kernel_kwargs[KERNEL_STAT_FUNC] = eval(self.kernel_kwargs[KERNEL_STAT_FUNC])
 
+        if self.solver not in [FULL_SOLVER, SUBSET_SOLVER, LANCZOS_SOLVER, RANDOMIZED_SOLVER]:
+            raise ValueError(f"The '{SOLVER}' parameter ('{self.solver}') is not valid. "
+                             f"Choose from: {[FULL_SOLVER, SUBSET_SOLVER, LANCZOS_SOLVER, RANDOMIZED_SOLVER]}")
+
+        if self.solver == RANDOMIZED_SOLVER and (self.algorithm_name != 'pca' or
+                                                 self.kernel_kwargs[KERNEL_MAP] is not None or
+                                                 self.cov_function is not np.cov or
+                                                 self.cov_stat_func is not np.mean):
+            raise ValueError(f"The '{RANDOMIZED_SOLVER}' solver calculates the covariance matrix implicitly, "
+                             f"which is only supported for the '{ALGORITHM_NAME}' 'pca' with the "
+                             f"'{KERNEL_MAP}' None, the '{COV_FUNCTION}' np.cov and the '{COV_STAT_FUNC}' np.mean.")
+
+        if self.extra_dr_layer and self.solver != FULL_SOLVER:
+            warnings.warn(f"The '{SOLVER}' parameter (with value: '{self.solver}') is ignored because "
+                          f"the parameter '{EXTRA_DR_LAYER}' is set to True. "
+                          "The extra layer needs the full spectrum of eigenvectors.",
+                          UserWarning)
+
+        if self.regularization < 0:
+            raise ValueError(f"The '{REGULARIZATION}' parameter ({self.regularization}) has to be non-negative.")
+
+        if np.dtype(self.dtype) not in [np.float32, np.float64]:
+            raise ValueError(f"The '{DTYPE}' parameter ('{self.dtype}') is not valid. "
+                             "Choose from: np.float32 or np.float64")
+
     def __str__(self):
         """
         Return a string representation of the DROPP instance.
@@ -253,6 +367,80 @@ class DROPP(TensorDR):
         """
         return self._use_kernel_as_correlation_matrix() or self._is_time_lagged_model
 
+    @property
+    def _is_kronecker_structured(self) -> bool:
+        """
+        Check if the eigenvalue decomposition is done on the combined (not block expanded) matrices.
+
+        Returns
+        -------
+        bool
+            True if the model is tensor-based and 'use_kronecker_structure' is enabled, False otherwise.
+
+        """
+        return not self._is_matrix_model and self.use_kronecker_structure
+
+    @property
+    def _use_compact_components(self) -> bool:
+        """
+        Check if the components are stored as factor vectors with coordinate indices.
+
+        Returns
+        -------
+        bool
+            True if the model is Kronecker structured and no extra dimensionality reduction layer is used,
+            since this layer mixes the coordinates of the eigenvectors. False otherwise.
+
+        """
+        return self._is_kronecker_structured and not self.extra_dr_layer
+
+    @property
+    def components_(self) -> [np.ndarray, None]:
+        """
+        Get the components (eigenvectors in the rows) of the model.
+
+        For compact stored components the dense matrix is created on demand.
+
+        Returns
+        -------
+        np.ndarray or None
+            Components with shape (n_components, _feature_dim*_combined_dim)
+            or (n_components, _feature_dim) for matrix-based models.
+
+        """
+        if self._component_factors is None:
+            return self._components
+        else:
+            return coordinate_block_expand(self._component_factors, self._component_coordinates,
+                                           self._combine_dim).T
+
+    @components_.setter
+    def components_(self, components: [np.ndarray, None]):
+        self._components = components
+        self._component_factors = None
+        self._component_coordinates = None
+        self._inverse_components = None
+
+    def _set_compact_components(self, factors: np.ndarray, coordinates: np.ndarray):
+        """
+        Store the components compact as factor vectors and coordinate indices.
+
+        The component `j` is the Kronecker product of `factors[:, j]` and the unit vector of the coordinate
+        `coordinates[j]`, so all the other entries of the dense component are zero.
+
+        Parameters
+        ----------
+        factors : np.ndarray
+            Factor vectors with shape (_feature_dim, n_components).
+        coordinates : np.ndarray
+            Coordinate index of each component with shape (n_components,).
+
+        """
+        self._components = None
+        self._component_factors = factors
+        self._component_coordinates = coordinates
+        self._inverse_components = None
+
     @property
     def _use_evs(self) -> bool:
         """
@@ -266,6 +454,107 @@ class DROPP(TensorDR):
         """
         return self.extra_dr_layer or self.nth_eigenvector > 1
 
+    @property
+    def _use_covariance_operator(self) -> bool:
+        """
+        Check if the covariance matrix is only used implicitly as operator (see `_get_covariance_operator`).
+
+        Returns
+        -------
+        bool
+            True if the 'randomized' solver is used and no extra dimensionality reduction layer
+            (which needs the full spectrum) is enabled, False otherwise.
+
+        """
+        return self.solver == RANDOMIZED_SOLVER and not self.extra_dr_layer
+
+    @property
+    def _use_toeplitz_solver(self) -> bool:
+        """
+        Check if the eigenvalue problem is solved with the structure of a symmetric Toeplitz matrix.
+
+        Returns
+        -------
+        bool
+            True if the kernel replaces the covariance matrix ('kernel_map' 'only') of a 'pca' model,
+            and the matrix of the eigenvalue problem is not block expanded. False otherwise.
+
+        """
+        return (self.kernel_kwargs[KERNEL_MAP] == KERNEL_ONLY and not self._use_correlation_matrix() and
+                not self._use_covariance_operator and (self._is_matrix_model or self._is_kronecker_structured))
+
+    def _get_banded_covariance_matrix(self) -> [np.ndarray, None]:
+        """
+        Get the covariance matrix of a compact support kernel in the lower banded form (see `banded_storage`).
+
+        Returns
+        -------
+        np.ndarray or None
+            The banded covariance matrix, if the kernel replaces or multiplies the covariance matrix
+            ('kernel_map' 'only' or 'multi') of a 'pca' model, the matrix of the eigenvalue problem is not
+            block expanded and the bandwidth of the kernel is below `MAX_BANDED_SOLVER_RATIO` of its size.
+            None otherwise.
+
+        Notes
+        -----
+        - The reduction of the band to a tridiagonal matrix needs O(n^2 b) operations and is faster than
+          the dense solvers only for narrow bands.
+        - The bandwidth is read from the profile of the fitted kernel matrix, which limits the support of
+          the mapped covariance matrix. Only the diagonals within this support are stored.
+
+        """
+        if (self.kernel_kwargs[KERNEL_MAP] not in [KERNEL_ONLY, KERNEL_MULTIPLICATION] or
+                self._use_correlation_matrix() or self._use_covariance_operator or self._kernel_matrix is None or
+                not (self._is_matrix_model or self._is_kronecker_structured)):
+            return None
+        bandwidth = self._kernel_matrix.bandwidth
+        if bandwidth >= MAX_BANDED_SOLVER_RATIO * self._kernel_matrix.shape[0]:
+            return None
+        if self.kernel_kwargs[KERNEL_MAP] == KERNEL_MULTIPLICATION:
+            return banded_storage(self._covariance_matrix, bandwidth)
+        band = self._kernel_matrix.lower_band(bandwidth)
+        if self.kernel_kwargs[ONES_ON_KERNEL_DIAG]:
+            band[0] = 1.0
+        return band.astype(self._covariance_matrix.dtype, copy=False)
+
+    @property
+    def _n_required_eigenpairs(self) -> [int, None]:
+        """
+        Get the number of the largest eigenpairs, which are calculated with a partial eigensolver.
+
+        Returns
+        -------
+        int or None
+            Number of eigenpairs needed for `n_components`, or None if the full spectrum is calculated
+            ('solver' is 'full' or 'extra_dr_layer' is enabled).
+
+        """
+        if self.solver == FULL_SOLVER or self.extra_dr_layer:
+            return None
+        return self._get_n_eigenpairs(self.n_components)
+
+    def _get_n_eigenpairs(self, n_eigenvalues: int) -> int:
+        """
+        Get the number of eigenpairs of the decomposed matrix needed for the first `n_eigenvalues` selected
+        eigenvalues. The selection strides over the (block expanded) eigenvalues with `nth_eigenvector`
+        and every eigenpair of a Kronecker structured matrix is repeated `_combine_dim` times.
+
+        Parameters
+        ----------
+        n_eigenvalues : int
+            Number of selected eigenvalues.
+
+        Returns
+        -------
+        int
+            Number of the largest eigenpairs of the decomposed matrix.
+
+        """
+        n_expanded = (n_eigenvalues - 1) * self.nth_eigenvector + 1
+        if self._is_kronecker_structured:
+            return -(-n_expanded // self._combine_dim)
+        return n_expanded
+
     @property
     def _combine_dim(self) -> int:
         """
@@ -280,7 +569,7 @@ class DROPP(TensorDR):
             Size of the combined dimension (3rd dimension) from the tensor.
 
         """
-        return self._standardized_data.shape[COMBINED_DIM]
+        return self._data_shape[COMBINED_DIM]
 
     @property
     def _feature_dim(self) -> int:
@@ -293,9 +582,64 @@ class DROPP(TensorDR):
             Size of the feature dimension, which represents the size of correlated features in the data.
 
         """
-        return self._standardized_data.shape[FEATURE_DIM]
+        return self._data_shape[FEATURE_DIM]
+
+    @property
+    def _dtype(self) -> np.dtype:
+        """
+        Get the floating point type of the standardized data and the matrix products.
+
+        Returns
+        -------
+        np.dtype
+            The 'dtype' parameter as numpy dtype.
+
+        """
+        return np.dtype(self.dtype)
+
+    @property
+    def _data_shape(self) -> tuple:
+        """
+        Get the shape of the fitted data.
+
+        Returns
+        -------
+        tuple
+            Shape of the standardized data, or of the accumulated chunks if the model is fitted with `partial_fit`,
+            or the stored shape if the model is loaded (see `load`).
+
+        """
+        if self._running_statistics is not None:
+            return self._running_statistics.shape
+        if self._standardized_data_ is None and self._loaded_data_shape is not None:
+            return self._loaded_data_shape
+        return self._standardized_data.shape
 
     def fit_transform(self, data_tensor, **fit_params):
+        """
+        Fit the DROPP model and project the input data onto the components.
+
+        The standardized data of the fit is projected directly, so the input is standardized only once.
+        The result is the same as `fit(data_tensor).transform(data_tensor)`.
+
+        Parameters
+        ----------
+        data_tensor : ndarray or list[ndarray]
+            Input data tensor with shape (n_samples, correlation_dim, combine_dim) for tensor data,
+            or (n_samples, feature_dim) for matrix data, or a list of trajectories (see `fit`).
+        **fit_params
+            Additional parameters for the fitting process (see `fit`).
+
+        Returns
+        -------
+        transformed_data : np.ndarray or list[np.ndarray]
+            Projected data with shape (n_samples, n_components),
+            or the projection of each trajectory for a list of trajectories.
+
+        """
+        if isinstance(data_tensor, (list, tuple)):
+            self.fit(data_tensor, **fit_params)
+            return [self.transform(trajectory, use_fitted_statistics=True) for trajectory in data_tensor]
         return super().fit_transform(data_tensor, **fit_params)
 
     def fit(self, data_tensor, **fit_params):
@@ -307,18 +651,26 @@ class DROPP(TensorDR):
 
         Parameters
         ----------
-        data_tensor : ndarray
+        data_tensor : ndarray or list[ndarray]
             Input data tensor with shape (n_samples, correlation_dim, combine_dim) for tensor data,
             or (n_samples, feature_dim) for matrix data.
+            A list (or tuple) of several trajectories (e.g. memory-mapped arrays) with the same feature dimensions
+            is fitted without concatenating them: only the statistics of the trajectories are pooled
+            (see `partial_fit`), and the time lagged pairs never span two trajectories.
         **fit_params
             Additional parameters for the fitting process. Available keys include:
             - 'n_components' (int, optional): Number of components to retain.
               Defaults to 2 if not provided.
+            - 'out' (ndarray, optional): Writable array with the shape of the data and the 'dtype' of the model,
+              to store the standardized data. The model keeps it as its standardized data.
+              Not available for a list of trajectories.
 
         Raises
         ------
         ValueError
-            If the input data tensor shape is incompatible with the model type (matrix or tensor).
+            If the input data tensor shape is incompatible with the model type (matrix or tensor),
+            or the data cannot be standardized in place (`copy=False`) or into 'out'.
+            For a list of trajectories, also if the model can not be fitted on statistics (see `partial_fit`).
 
         Returns
         -------
@@ -328,6 +680,7 @@ class DROPP(TensorDR):
         Notes
         -----
         - The resulting eigenvectors are stored in the ´components_´ attribute.
+          Kronecker structured models store them compact (see `_set_compact_components`).
         - Set 'analyse_plot_type' to 'EIGENVECTOR_MATRIX_ANALYSE' to visualize a subset of the eigenvectors.
 
         Examples
@@ -338,6 +691,9 @@ class DROPP(TensorDR):
         >>> transformed_data = dropp_instance.transform(data)
 
         """
+        if isinstance(data_tensor, (list, tuple)):
+            return self._fit_trajectories(data_tensor, **fit_params)
+
         with Timer(name='fit', enable_timer=self.performance_test):
             if self._is_matrix_model and data_tensor.ndim != MATRIX_NDIM:
                 raise ValueError("The input data tensor shape is incompatible with the model type. "
@@ -346,183 +702,520 @@ class DROPP(TensorDR):
 
             self.n_samples = data_tensor.shape[TIME_DIM]
             self.n_components = fit_params.get(N_COMPONENTS, 2)
+            self._running_statistics = None
             with Timer(name='standardize_data', enable_timer=self.performance_test):
-                self._standardized_data_ = self._standardize_data(data_tensor)
-            self._covariance_matrix = self.get_covariance_matrix()
-            eigenvectors = self._get_eigenvectors()
-            self.components_ = eigenvectors[:, :self.n_components].T
-            if self.analyse_plot_type == EIGENVECTOR_MATRIX_ANALYSE:
-                ArrayPlotter(
-                    interactive=False,
-                    title_prefix=EIGENVECTOR_MATRIX_ANALYSE,
-                    x_label='Eigenvector Number',
-                    y_label='Eigenvector Dimension',
-                    xtick_start=1,
-                    for_paper=True
-                ).matrix_plot(eigenvectors[:12, :15], show_values=True)
-            return self
-
-    def _standardize_data(self, tensor):
+                out = self._get_standardization_buffer(data_tensor, fit_params.get(OUT))
+                if out is None and StageCache.active() is not None:
+                    self._standardize_with_stage_cache(data_tensor)
+                else:
+                    if out is data_tensor and StageCache.active() is not None:
+                        StageCache.active().forget(data_tensor)
+                    self._stage_key = None
+                    self._standardized_data_ = self._standardize_data(data_tensor, out=out)
+            return self._fit_components()
+
+    def _standardize_with_stage_cache(self, data_tensor):
         """
-        Standardize the input tensor data.
-
-        This method standardizes the input tensor data by centering it
-        and optionally scaling it by the standard deviation.
+        Standardize the data, or reuse the standardized data of a previous fit on the same input from the active
+        stage cache (see `StageCache`). The standardization depends only on the content of the input,
+        'use_std', 'dtype' and the shape of the mean. The key of this stage is the base of the keys of the
+        following stages (see `_data_stage_key`).
 
         Parameters
         ----------
-        tensor : ndarray
-            Input data tensor with shape (n_samples, feature_dim, combine_dim) for tensor data,
-            or (n_samples, feature_dim) for matrix data.
-
-        Returns
-        -------
-        standardized_data : ndarray
-            Standardized tensor data with the same shape as the input tensor.
-
-        Notes
-        -----
-        - If 'use_std' is True, the data is scaled by the standard deviation.
-        - If 'use_std' is False, the data is only centered.
-
-        Examples
-        --------
-        >>> dropp_instance = DROPP()
-        >>> tensor_data = np.random.rand(100, 10, 5)  # Example tensor data
-        >>> standardized_tensor = dropp_instance._standardize_data(tensor_data)
+        data_tensor : ndarray
+            Input data tensor or matrix, which is not changed by the fit (`copy=True` and no 'out' buffer).
 
         """
-        centered_data = self._center_data(tensor)
+        self._stage_key = (StageCache.active().input_key(data_tensor), self.use_std, self._dtype.str,
+                           self._is_matrix_model or not self.center_over_time)
 
-        if self.use_std:
-            self._std = np.std(tensor, axis=0)
-            return centered_data / self._std
-        else:
-            self._std = 1
-            return centered_data
+        def standardize():
+            standardized_data = self._standardize_data(data_tensor)
+            return standardized_data, self.mean, self._std
 
-    def _center_data(self, tensor):
+        self._standardized_data_, self.mean, self._std = StageCache.active().get(
+            ('standardized_data',) + self._stage_key, standardize)
+
+    def _data_stage_key(self, stage: str, *dependencies) -> [tuple, None]:
         """
-        Center the input data tensor by subtracting the mean vector.
+        Get the cache key of a stage, which is calculated on the standardized data.
 
         Parameters
         ----------
-        tensor : ndarray
-            Input data tensor with shape (n_samples, feature_dim, combine_dim) for tensor data,
-            or (n_samples, feature_dim) for matrix data.
+        stage : str
+            Name of the stage.
+        *dependencies
+            Hyperparameters (and derived values), which the stage depends on.
 
         Returns
         -------
-        centered_data : ndarray
-            Data tensor or matrix after centering.
-
-        Notes
-        -----
-        - For matrix data or when 'center_over_time' is False, the mean vector is computed along axis 0.
-        - For tensor data and when 'center_over_time' is True,
-          the mean tensor is computed along axis 0 (time dimension).
-          The mean tensor is broadcasted to match the shape of the input tensor for subtraction.
+        key : tuple or None
+            Key of the stage, or None if the standardized data is not cached
+            (no active cache during the fit, a fit on statistics, or an in-place standardization).
 
         """
-        if self._is_matrix_model or not self.center_over_time:
-            self.mean = np.mean(tensor, axis=0)
-        else:
-            self.mean = np.mean(tensor, axis=0)[np.newaxis, :, :]
-        return tensor - self.mean
+        if self._stage_key is None:
+            return None
+        return (stage,) + self._stage_key + dependencies
 
-    def get_covariance_matrix(self) -> np.ndarray:
+    def _cached_stage(self, key: [tuple, None], compute: callable):
         """
-        Compute and return the covariance matrix.
+        Get the result of a stage from the active stage cache, or compute it.
 
-        The calculation of the covariance matrix depends on the dimensionality (ndim) of the model:
-        - For matrix data, the covariance matrix is calculated conventionally.
-        - For tensor data, the covariance matrix is calculated over the combined dimension, and not correlated
-          values are enforced to have zero correlations by block expanding and setting off-diagonal values to zeros.
-          The DROPP algorithm maps a Gaussian curve onto the covariance matrix by default.
+        Stages are not cached without a key or an active cache, or if an 'analyse_plot_type' is set,
+        since the plots are created while computing the stages.
+
+        Parameters
+        ----------
+        key : tuple or None
+            Key of the stage (see `_data_stage_key`).
+        compute : callable
+            Function without arguments, which calculates the result of the stage.
 
         Returns
         -------
-        cov_matrix : np.ndarray
-            Covariance matrix with shape (_feature_dim*_combined_dim x _feature_dim*_combined_dim)
-            or (_feature_dim x _feature_dim) if the model is matrix-based.
+        result : object
+            Result of the stage. Cached arrays are read-only.
 
-        Notes
-        -----
-        - The 'kernel_kwargs[KERNEL_MAP]' parameter can modify the covariance matrix using a kernel function.
-        - Set 'kernel_kwargs[KERNEL_MAP]' to None to disable kernel mapping.
-        - The covariance matrix is used in the DROPP algorithm to capture correlations between features.
         """
-        with Timer(name='get_covariance_matrix', enable_timer=self.performance_test):
-            if self._is_matrix_model:
-                cov = self._get_matrix_covariance()
-                if self.kernel_kwargs[KERNEL_MAP] is not None and not self._use_kernel_as_correlation_matrix():
-                    cov = self._map_kernel_on(cov)
-                return cov
-            else:
-                ccm = self.get_combined_covariance_matrix()
-                if self.kernel_kwargs[KERNEL_MAP] is not None and not self._use_kernel_as_correlation_matrix():
-                    ccm = self._map_kernel_on(ccm)
-                with Timer(name='block_expand', enable_timer=self.performance_test):
-                    dbe = diagonal_block_expand(ccm, self._combine_dim)
-                return dbe
+        cache = StageCache.active()
+        if key is None or cache is None or self.analyse_plot_type != '':
+            return compute()
+        return cache.get(key, compute)
 
-    def _get_matrix_covariance(self) -> np.ndarray:
+    def _fit_trajectories(self, trajectories, **fit_params):
         """
-        Calculate the covariance matrix for standardized data in matrix shape.
+        Fit the DROPP model on the pooled statistics of several trajectories.
 
-        Depending on the algorithm and lag_time, this method computes either a standard covariance matrix
-        or a time-lagged covariance matrix by truncating the lag_time from the matrix.
+        Parameters
+        ----------
+        trajectories : list[ndarray]
+            Input data of the trajectories, with the same feature dimensions.
+        **fit_params
+            Additional parameters for the fitting process (see `fit`).
 
         Returns
         -------
-        covariance_matrix : np.ndarray
-            Covariance matrix for matrix-shaped standardized data.
-
-        Notes
-        -----
-        - If the algorithm is time-lagged (e.g., 'tica') and lag_time is greater than 0,
-          the time-lagged covariance matrix is calculated.
-        - If not time-lagged, the standard covariance matrix is used.
+        self : DROPP
+            Returns the instance of the DROPP model after fitting.
 
         """
-        if self._is_time_lagged_model and self.lag_time > 0:
-            return np.cov(self._standardized_data[:-self.lag_time].T)
-        else:
-            return super().get_covariance_matrix()
-
-    def get_combined_covariance_matrix(self):
+        if len(trajectories) == 0:
+            raise ValueError('The list of trajectories is empty.')
+        if fit_params.get(OUT) is not None:
+            raise ValueError(f"The '{OUT}' buffer can not be used for a list of trajectories.")
+
+        with Timer(name='fit_trajectories', enable_timer=self.performance_test):
+            self._running_statistics = None
+            for trajectory in trajectories:
+                self.partial_fit(trajectory, new_trajectory=True)
+            return self.finalize(**fit_params)
+
+    def partial_fit(self, data_tensor, y=None, new_trajectory: bool = False):
         """
-        Calculate the combined covariance matrix.
+        Accumulate the statistics of a chunk of the data, to fit the model incrementally.
 
-        This method computes the combined covariance matrix from the tensor covariance matrix,
-        using the specified statistic function for the covariance matrix along axis 0.
+        Instead of keeping the (standardized) data in memory, the counts, means, co-moments and
+        (for a lag time) the time lagged co-moments of the chunks are accumulated per combined dimension
+        (see `RunningTensorStatistics`). The chunks have to be passed in the order of the trajectory,
+        the time lagged pairs are built over the chunk borders, unless a chunk starts a new trajectory.
+        Call `finalize` to calculate the components.
+
+        Parameters
+        ----------
+        data_tensor : ndarray
+            Chunk of the input data with shape (chunk_samples, correlation_dim, combine_dim) for tensor data,
+            or (chunk_samples, feature_dim) for matrix data.
+        y : None
+            Ignored. This parameter exists only for compatibility with scikit-learns API.
+        new_trajectory : bool, optional
+            If True, the chunk is the start of another trajectory, so no time lagged pairs are built
+            with the previous chunks. Default is False.
+
+        Raises
+        ------
+        ValueError
+            If the chunk shape is incompatible with the model type, or the model needs the whole data
+            (a 'cov_function' other than np.cov or np.corrcoef, or the 'randomized' solver).
 
         Returns
         -------
-        combined_cov_matrix : np.ndarray
-            Combined covariance matrix resulting from applying the covariance statistic function.
+        self : DROPP
+            Returns the instance of the DROPP model with the updated statistics.
 
-        Notes
-        -----
-        - The 'cov_stat_func' parameter determines the statistical function applied along axis 0.
-        - If 'analyse_plot_type' is set to 'COVARIANCE_MATRIX_PLOT', a plot of tensor layers and the combined
-          covariance matrix is generated.
+        Examples
+        --------
+        >>> dropp_instance = DROPP()
+        >>> for chunk in np.array_split(np.random.rand(1000, 10, 3), 10):
+        ...     dropp_instance = dropp_instance.partial_fit(chunk)
+        >>> dropp_instance = dropp_instance.finalize(n_components=2)
 
         """
-        with Timer(name='combined_cov_matrix', enable_timer=self.performance_test):
-            tensor_cov = self._get_covariance_tensor()
-            cov = self.cov_stat_func(tensor_cov, axis=0)
-            if self.analyse_plot_type == COVARIANCE_MATRIX_PLOT:
-                MultiArrayPlotter().plot_tensor_layers(tensor_cov, cov, 'Covariance')
-            return cov
+        self._check_statistics_input(data_tensor)
 
-    def _get_covariance_tensor(self):
+        if self._running_statistics is None:
+            self._running_statistics = RunningTensorStatistics(self.lag_time)
+            self._standardized_data_ = None
+            self._stage_key = None
+        self._running_statistics.update(data_tensor, new_trajectory)
+        return self
+
+    def _check_statistics_input(self, data_tensor):
         """
-        Calculate the tensor covariance tensor.
+        Check if the model can be fitted on the statistics of the input data (see `RunningTensorStatistics`).
 
-        This method computes the covariance tensor or a time-lagged covariance tensor for tensor data,
-        where the tensor dimensions represent samples, features, and combined dimensions.
-        The calculation depends on the model and lag_time.
+        Parameters
+        ----------
+        data_tensor : ndarray
+            Input data, or a chunk of it.
+
+        Raises
+        ------
+        ValueError
+            If the data shape is incompatible with the model type, or the model needs the whole data
+            (a 'cov_function' other than np.cov or np.corrcoef, or the 'randomized' solver).
+
+        """
+        if self._is_matrix_model and data_tensor.ndim != MATRIX_NDIM:
+            raise ValueError("The input data tensor shape is incompatible with the model type. "
+                             "For tensor data, use shape (n_samples, correlation_dim, combine_dim), "
+                             "or for matrix data, use shape (n_samples, feature_dim).")
+        if not self._is_matrix_model and self.cov_function not in [np.cov, np.corrcoef]:
+            raise ValueError(f"The '{COV_FUNCTION}' ({self.cov_function}) can not be accumulated chunk by chunk. "
+                             f"Use np.cov or np.corrcoef for fitting the model incrementally.")
+        if self._use_covariance_operator:
+            raise ValueError(f"The '{RANDOMIZED_SOLVER}' solver needs the whole data. "
+                             f"Use '{SUBSET_SOLVER}' or '{LANCZOS_SOLVER}' for fitting the model incrementally.")
+
+    def finalize(self, **fit_params):
+        """
+        Calculate the components from the statistics of the chunks, which are accumulated with `partial_fit`.
+
+        The resulting model is the same as fitting the model with the concatenated chunks.
+
+        Parameters
+        ----------
+        **fit_params
+            Additional parameters for the fitting process. Available keys include:
+            - 'n_components' (int, optional): Number of components to retain.
+              Defaults to 2 if not provided.
+
+        Raises
+        ------
+        ModelNotFittedError
+            If no chunk is accumulated with `partial_fit`.
+
+        Returns
+        -------
+        self : DROPP
+            Returns the instance of the DROPP model after fitting.
+
+        """
+        if self._running_statistics is None:
+            raise ModelNotFittedError(f"The model `{self}` has no accumulated statistics. "
+                                      "Please call `partial_fit` before finalizing the model.")
+
+        with Timer(name='finalize', enable_timer=self.performance_test):
+            self.n_samples = self._running_statistics.n_samples
+            self.n_components = fit_params.get(N_COMPONENTS, 2)
+            self.mean = self._running_statistics.mean
+            if not self._is_matrix_model and self.center_over_time:
+                self.mean = self.mean[np.newaxis, :, :]
+            self._std = self._running_statistics.std if self.use_std else 1
+            return self._fit_components()
+
+    def fit_lag_times(self, data_tensor, lag_times: list, fft_cost_factor: float = FFT_COST_FACTOR,
+                      **fit_params) -> tuple:
+        """
+        Fit a copy of the time-lagged model for each lag time, at about the cost of a single fit.
+
+        The statistics of the data are calculated only once for all the lag times
+        (see `RunningTensorStatistics.for_lag_times`), so the data is not standardized again for each lag time,
+        and the time lagged correlation tensors are calculated together. Each model is then finalized on
+        the statistics of its lag time, which gives the same model as fitting it on the data.
+
+        Parameters
+        ----------
+        data_tensor : ndarray
+            Input data tensor with shape (n_samples, correlation_dim, combine_dim) for tensor data,
+            or (n_samples, feature_dim) for matrix data.
+        lag_times : list
+            Positive lag times of the models, smaller than n_samples - 1.
+        fft_cost_factor : float, optional
+            The time lagged products are calculated with the FFT for more than fft_cost_factor * log2(n_fft)
+            lag times, with the FFT length n_fft of about n_samples + max(lag_times). 0 always uses the FFT
+            and np.inf never. Default is `FFT_COST_FACTOR`.
+        **fit_params
+            Additional parameters for the fitting process (see `fit`).
+
+        Returns
+        -------
+        models : list[DROPP]
+            Fitted models with the parameters of this model and the lag times.
+        timescales : np.ndarray
+            Implied timescales -lag_time / ln|eigenvalue| of the components with shape (n_lag_times, n_components).
+
+        Raises
+        ------
+        ValueError
+            If the model is not time-lagged, a lag time is invalid,
+            or the model can not be fitted on statistics (see `partial_fit`).
+
+        Examples
+        --------
+        >>> dropp_instance = DROPP(algorithm_name='tica')
+        >>> models, timescales = dropp_instance.fit_lag_times(np.random.rand(1000, 10, 3), [1, 2, 5, 10, 20])
+
+        """
+        if not self._is_time_lagged_model:
+            raise ValueError(f"The '{ALGORITHM_NAME}' ('{self.algorithm_name}') is not time-lagged.")
+        self._check_statistics_input(data_tensor)
+
+        with Timer(name='fit_lag_times', enable_timer=self.performance_test):
+            models = []
+            for lag_time, statistics in zip(lag_times, RunningTensorStatistics.for_lag_times(
+                    data_tensor, lag_times, fft_cost_factor)):
+                model = self.__class__(**{**self.get_params(), LAG_TIME: lag_time})
+                model._running_statistics = statistics
+                models.append(model.finalize(**fit_params))
+            timescales = np.asarray([implied_timescales(model.explained_variance_[:model.n_components],
+                                                        model.lag_time) for model in models])
+        return models, timescales
+
+    def _fit_components(self):
+        """
+        Calculate the covariance matrix of the fitted data, the eigenvectors and store the components.
+
+        Returns
+        -------
+        self : DROPP
+            Returns the instance of the DROPP model after fitting.
+
+        """
+        self._kernel_matrix = None
+        if self._use_covariance_operator:
+            self._covariance_matrix = None
+        else:
+            self._covariance_matrix = self.get_covariance_matrix(block_expand=not self._is_kronecker_structured)
+        if self._use_compact_components:
+            factors, coordinates = self._get_compact_eigenvectors()
+            self._set_compact_components(self._as_component_dtype(factors[:, :self.n_components]),
+                                         coordinates[:self.n_components])
+            eigenvectors = coordinate_block_expand(factors[:, :15], coordinates[:15], self._combine_dim)
+        else:
+            eigenvectors = self._get_eigenvectors()
+            self.components_ = self._as_component_dtype(eigenvectors[:, :self.n_components].T)
+        if self.analyse_plot_type == EIGENVECTOR_MATRIX_ANALYSE:
+            ArrayPlotter(
+                interactive=False,
+                title_prefix=EIGENVECTOR_MATRIX_ANALYSE,
+                x_label='Eigenvector Number',
+                y_label='Eigenvector Dimension',
+                xtick_start=1,
+                for_paper=True
+            ).matrix_plot(eigenvectors[:12, :15], show_values=True)
+        return self
+
+    def _as_component_dtype(self, eigenvectors: np.ndarray) -> np.ndarray:
+        """
+        Cast real eigenvectors to the 'dtype' of the model.
+        Complex eigenvectors (of the general eigensolver, see `_get_generalized_eigenpairs`) are not changed.
+        """
+        return eigenvectors if np.iscomplexobj(eigenvectors) else eigenvectors.astype(self._dtype, copy=False)
+
+    def _standardize_data(self, tensor, out=None):
+        """
+        Standardize the input tensor data.
+
+        This method standardizes the input tensor data by centering it
+        and optionally scaling it by the standard deviation.
+
+        Parameters
+        ----------
+        tensor : ndarray
+            Input data tensor with shape (n_samples, feature_dim, combine_dim) for tensor data,
+            or (n_samples, feature_dim) for matrix data.
+        out : ndarray, optional
+            Array for the standardized data, with the shape of the tensor and the 'dtype' of the model.
+            The tensor itself can be passed to standardize it in place. Default is None (a new array).
+
+        Returns
+        -------
+        standardized_data : ndarray
+            Standardized tensor data with the same shape as the input tensor.
+
+        Notes
+        -----
+        - If 'use_std' is True, the data is scaled by the standard deviation.
+        - If 'use_std' is False, the data is only centered.
+        - The standard deviation is calculated on the centered data, so besides the result no copy of the data
+          is allocated (and none at all for `out`).
+
+        Examples
+        --------
+        >>> dropp_instance = DROPP()
+        >>> tensor_data = np.random.rand(100, 10, 5)  # Example tensor data
+        >>> standardized_tensor = dropp_instance._standardize_data(tensor_data)
+
+        """
+        centered_data = self._center_data(tensor, out)
+
+        if self.use_std:
+            self._std = centered_std(centered_data)
+            centered_data /= self._std.astype(self._dtype)
+        else:
+            self._std = 1
+        return centered_data
+
+    def _center_data(self, tensor, out=None):
+        """
+        Center the input data tensor by subtracting the mean vector.
+
+        Parameters
+        ----------
+        tensor : ndarray
+            Input data tensor with shape (n_samples, feature_dim, combine_dim) for tensor data,
+            or (n_samples, feature_dim) for matrix data.
+        out : ndarray, optional
+            Array for the centered data (see `_standardize_data`). Default is None (a new array).
+
+        Returns
+        -------
+        centered_data : ndarray
+            Data tensor or matrix after centering.
+
+        Notes
+        -----
+        - For matrix data or when 'center_over_time' is False, the mean vector is computed along axis 0.
+        - For tensor data and when 'center_over_time' is True,
+          the mean tensor is computed along axis 0 (time dimension).
+          The mean tensor is broadcasted to match the shape of the input tensor for subtraction.
+
+        """
+        if self._is_matrix_model or not self.center_over_time:
+            self.mean = np.mean(tensor, axis=0, dtype=np.float64)
+        else:
+            self.mean = np.mean(tensor, axis=0, dtype=np.float64)[np.newaxis, :, :]
+        return np.subtract(tensor, self.mean, out=out, dtype=self._dtype)
+
+    def get_covariance_matrix(self, block_expand: bool = True) -> np.ndarray:
+        """
+        Compute and return the covariance matrix.
+
+        The calculation of the covariance matrix depends on the dimensionality (ndim) of the model:
+        - For matrix data, the covariance matrix is calculated conventionally.
+        - For tensor data, the covariance matrix is calculated over the combined dimension, and not correlated
+          values are enforced to have zero correlations by block expanding and setting off-diagonal values to zeros.
+          The DROPP algorithm maps a Gaussian curve onto the covariance matrix by default.
+
+        Parameters
+        ----------
+        block_expand : bool, optional
+            Block expand the combined covariance matrix of tensor data. Default is True.
+            Ignored for matrix-based models.
+
+        Returns
+        -------
+        cov_matrix : np.ndarray
+            Covariance matrix with shape (_feature_dim*_combined_dim x _feature_dim*_combined_dim)
+            or (_feature_dim x _feature_dim) if the model is matrix-based or `block_expand` is False.
+
+        Notes
+        -----
+        - The 'kernel_kwargs[KERNEL_MAP]' parameter can modify the covariance matrix using a kernel function.
+        - Set 'kernel_kwargs[KERNEL_MAP]' to None to disable kernel mapping.
+        - The covariance matrix is used in the DROPP algorithm to capture correlations between features.
+        """
+        with Timer(name='get_covariance_matrix', enable_timer=self.performance_test):
+            if self._is_matrix_model:
+                cov = self._cached_stage(
+                    self._data_stage_key('matrix_covariance', self._covariance_time_indices.stop),
+                    self._get_matrix_covariance)
+                if self.kernel_kwargs[KERNEL_MAP] is not None and not self._use_kernel_as_correlation_matrix():
+                    cov = self._map_kernel_on(cov)
+                return cov.astype(self._dtype, copy=False)
+            else:
+                ccm = self._cached_stage(
+                    self._data_stage_key('combined_covariance', self._covariance_time_indices.stop,
+                                         self.cov_function, self.cov_stat_func),
+                    self.get_combined_covariance_matrix)
+                if self.kernel_kwargs[KERNEL_MAP] is not None and not self._use_kernel_as_correlation_matrix():
+                    ccm = self._map_kernel_on(ccm)
+                if not block_expand:
+                    return ccm
+                with Timer(name='block_expand', enable_timer=self.performance_test):
+                    dbe = diagonal_block_expand(ccm.astype(self._dtype, copy=False), self._combine_dim)
+                return dbe
+
+    def _get_matrix_covariance(self) -> np.ndarray:
+        """
+        Calculate the covariance matrix for standardized data in matrix shape.
+
+        Depending on the algorithm and lag_time, this method computes either a standard covariance matrix
+        or a time-lagged covariance matrix by truncating the lag_time from the matrix.
+
+        Returns
+        -------
+        covariance_matrix : np.ndarray
+            Covariance matrix for matrix-shaped standardized data.
+
+        Notes
+        -----
+        - If the algorithm is time-lagged (e.g., 'tica') and lag_time is greater than 0,
+          the time-lagged covariance matrix is calculated.
+        - If not time-lagged, the standard covariance matrix is used.
+        - For a lower precision 'dtype', the products are accumulated in float64 (see `accumulated_gram`),
+          instead of converting the whole data to float64 as np.cov does.
+
+        """
+        if self._running_statistics is not None:
+            return self._get_accumulated_covariance_tensor()[0]
+
+        data = self._standardized_data[self._covariance_time_indices]
+        if data.dtype == np.float64:
+            return np.cov(data.T)
+        centered_data = data - np.mean(data, axis=0, dtype=np.float64).astype(data.dtype)
+        return accumulated_gram(centered_data) / (data.shape[TIME_DIM] - 1)
+
+    def get_combined_covariance_matrix(self):
+        """
+        Calculate the combined covariance matrix.
+
+        This method computes the combined covariance matrix from the tensor covariance matrix,
+        using the specified statistic function for the covariance matrix along axis 0.
+
+        Returns
+        -------
+        combined_cov_matrix : np.ndarray
+            Combined covariance matrix resulting from applying the covariance statistic function.
+
+        Notes
+        -----
+        - The 'cov_stat_func' parameter determines the statistical function applied along axis 0.
+        - If 'analyse_plot_type' is set to 'COVARIANCE_MATRIX_PLOT', a plot of tensor layers and the combined
+          covariance matrix is generated.
+        - For 'cov_stat_func' np.mean and 'cov_function' np.cov the covariance tensor is not calculated,
+          see `_get_fused_covariance_matrix`.
+
+        """
+        with Timer(name='combined_cov_matrix', enable_timer=self.performance_test):
+            if self._use_fused_mean_reduction and self.cov_function is np.cov:
+                return self._get_fused_covariance_matrix()
+
+            tensor_cov = self._get_covariance_tensor()
+            cov = self.cov_stat_func(tensor_cov, axis=0)
+            if self.analyse_plot_type == COVARIANCE_MATRIX_PLOT:
+                MultiArrayPlotter().plot_tensor_layers(tensor_cov, cov, 'Covariance')
+            return cov
+
+    def _get_covariance_tensor(self):
+        """
+        Calculate the tensor covariance tensor.
+
+        This method computes the covariance tensor or a time-lagged covariance tensor for tensor data,
+        where the tensor dimensions represent samples, features, and combined dimensions.
+        The calculation depends on the model and lag_time.
 
         Returns
         -------
@@ -535,20 +1228,162 @@ class DROPP(TensorDR):
         -----
         - The covariance tensor is calculated by applying the specified covariance function
           (e.g. np.cov) along axis 0 for each combined dimension.
+          For np.cov and np.corrcoef all the covariance matrices are calculated with one batched matrix product
+          on the contiguous layers of the data (see `_get_data_layers`).
         - If the algorithm is time-lagged (e.g., 'tica') and lag_time is greater than 0,
           the covariance tensor is calculated over the truncated data.
         - If not time-lagged, the covariance tensor is calculated using the full data.
 
+        """
+        if self._running_statistics is not None:
+            return self._get_accumulated_covariance_tensor()
+
+        if self.cov_function not in [np.cov, np.corrcoef]:
+            tensor_data = self._standardized_data[self._covariance_time_indices]
+            return np.asarray([
+                self.cov_function(tensor_data[:, :, index].T) for index in range(self._combine_dim)
+            ])
+
+        layers = self._get_data_layers(self._covariance_time_indices, center=True)
+        covariance_tensor = accumulated_gram(layers) / (layers.shape[1] - 1)
+        if self.cov_function is np.corrcoef:
+            std = np.sqrt(np.diagonal(covariance_tensor, axis1=1, axis2=2))
+            covariance_tensor /= std[:, :, np.newaxis] * std[:, np.newaxis, :]
+            np.clip(covariance_tensor, -1, 1, out=covariance_tensor)
+        return covariance_tensor
+
+    @property
+    def _covariance_time_indices(self) -> slice:
+        """
+        Get the time indices of the samples for the covariance matrix.
+
+        Returns
+        -------
+        slice
+            All the samples, or without the last lag_time samples if the algorithm is time-lagged.
+
         """
         if self._is_time_lagged_model and self.lag_time > 0:
-            cov_indices = slice(None, -self.lag_time)
+            return slice(None, -self.lag_time)
         else:
-            cov_indices = slice(None)
+            return slice(None)
+
+    @property
+    def _use_fused_mean_reduction(self) -> bool:
+        """
+        Check if the mean over the combined dimension is fused into the matrix product.
+
+        Returns
+        -------
+        bool
+            True if the 'cov_stat_func' is np.mean, the model is fitted on the whole data and
+            no analyse plot needs the tensor layers, False otherwise.
+
+        """
+        return (self.cov_stat_func is np.mean and self._running_statistics is None and
+                self.analyse_plot_type not in [COVARIANCE_MATRIX_PLOT, CORRELATION_MATRIX_PLOT])
+
+    def _get_data_layers(self, time_indices: slice, center: bool = False) -> np.ndarray:
+        """
+        Get the standardized tensor data in the contiguous layout (_combined_dim, n_samples, _feature_dim).
+
+        In this layout every layer of the combined dimension is a contiguous matrix, so the covariance matrices
+        of all the layers are calculated with one batched matrix product, instead of a loop over strided slices.
+
+        Parameters
+        ----------
+        time_indices : slice
+            Time indices of the used samples.
+        center : bool, optional
+            Center every layer by its mean over the used samples (as np.cov). Default is False.
+
+        Returns
+        -------
+        layers : np.ndarray
+            Copy of the data with shape (_combined_dim, n_used_samples, _feature_dim).
+
+        """
+        layers = np.array(np.moveaxis(self._standardized_data[time_indices], COMBINED_DIM, 0), order='C')
+        if center:
+            layers -= np.mean(layers, axis=1, keepdims=True, dtype=np.float64).astype(layers.dtype)
+        return layers
+
+    def _get_fused_covariance_matrix(self) -> np.ndarray:
+        """
+        Calculate the mean of the covariance matrices over the combined dimension, without the covariance tensor.
 
-        tensor_data = self._standardized_data[cov_indices]
-        return np.asarray([
-            self.cov_function(tensor_data[:, :, index].T) for index in range(self._combine_dim)
-        ])
+        The mean of the layer covariance matrices X_c^T X_c / (n - 1) equals one matrix product of the stacked
+        layers [X_1; ...; X_C]^T [X_1; ...; X_C] / (C (n - 1)), so the (_combined_dim, _feature_dim, _feature_dim)
+        tensor is never created.
+
+        Returns
+        -------
+        combined_cov_matrix : np.ndarray
+            Combined covariance matrix with shape (_feature_dim, _feature_dim).
+
+        """
+        layers = self._get_data_layers(self._covariance_time_indices, center=True)
+        stacked = layers.reshape(-1, self._feature_dim)
+        return accumulated_gram(stacked) / (self._combine_dim * (layers.shape[1] - 1))
+
+    def _get_covariance_operator(self) -> LinearOperator:
+        """
+        Get the covariance matrix as linear operator, without materializing it.
+
+        The products with the covariance matrix are calculated with the (centered) standardized data X,
+        as X^T (X v) / (n_samples - 1). For tensor data the combined covariance matrix is the mean
+        over the covariance matrices of the combined dimension, which is applied to each coordinate
+        of the block expanded vectors if the model is not Kronecker structured.
+
+        Returns
+        -------
+        covariance_operator : LinearOperator
+            Symmetric operator with the shape of the covariance matrix, which `get_covariance_matrix` returns.
+
+        """
+        data = self._standardized_data
+        normalization = self.n_samples - 1
+
+        if self._is_matrix_model:
+            def matmat(vectors):
+                return np.dot(data.T, np.dot(data, vectors)) / normalization
+
+            size = self._feature_dim
+        else:
+            def combined_matmat(vectors):
+                projection = np.einsum('tfc,fk->tck', data, vectors, optimize=True)
+                return np.einsum('tfc,tck->fk', data, projection, optimize=True) / (normalization * self._combine_dim)
+
+            if self._is_kronecker_structured:
+                matmat = combined_matmat
+                size = self._feature_dim
+            else:
+                def matmat(vectors):
+                    coordinate_vectors = vectors.reshape(self._feature_dim, -1)
+                    return combined_matmat(coordinate_vectors).reshape(vectors.shape)
+
+                size = self._feature_dim * self._combine_dim
+
+        return LinearOperator((size, size), matvec=lambda vector: matmat(vector.reshape(-1, 1)).ravel(),
+                              matmat=matmat, rmatmat=matmat, dtype=data.dtype)
+
+    def _get_accumulated_covariance_tensor(self) -> np.ndarray:
+        """
+        Calculate the covariance tensor from the statistics accumulated with `partial_fit`.
+
+        Returns
+        -------
+        tensor_cov_tensor : np.ndarray
+            Covariance tensor with shape (_combined_dim, _feature_dim, _feature_dim), or (1, _feature_dim,
+            _feature_dim) for matrix-based models, equal to `_get_covariance_tensor` of the concatenated chunks.
+
+        """
+        covariance_tensor = self._running_statistics.covariance_tensor(
+            lagged=self._is_time_lagged_model and self.lag_time > 0, use_std=self.use_std)
+        if self.cov_function is np.corrcoef and not self._is_matrix_model:
+            std = np.sqrt(np.diagonal(covariance_tensor, axis1=1, axis2=2))
+            covariance_tensor = covariance_tensor / (std[:, :, np.newaxis] * std[:, np.newaxis, :])
+        return covariance_tensor
 
     def _map_kernel_on(self, covariance_matrix):
         """
@@ -565,77 +1400,317 @@ class DROPP(TensorDR):
 
         Returns
         -------
-        mapped_matrix : np.ndarray
-           Covariance matrix after kernel mapping has been applied.
-
-        Notes
-        -----
-        - Kernel mapping can modify the input covariance matrix according to the specified kernel mapping mode.
-        - The kernel mapping is determined by the 'kernel_kwargs' attribute.
+        mapped_matrix : np.ndarray
+           Covariance matrix after kernel mapping has been applied.
+
+        Notes
+        -----
+        - Kernel mapping can modify the input covariance matrix according to the specified kernel mapping mode.
+        - The kernel mapping is determined by the 'kernel_kwargs' attribute.
+        - The kernel fit depends only on the matrix, 'kernel_function', 'kernel_stat_func', 'use_original_data' and
+          'iterative_kernel_fit', so the kernel matrix is reused from the active stage cache for the other kernel
+          parameters.
+          A read-only (cached) input matrix is copied before the mapping.
+        - The kernel matrix is a lazy `ToeplitzMatrix`, which is subtracted or multiplied through its strided view,
+          without creating the dense kernel matrix. It is kept as '_kernel_matrix' for the banded solver
+          (see `_get_banded_covariance_matrix`).
+
+        """
+        with Timer(name='calculate_symmetrical_kernel_matrix', enable_timer=self.performance_test):
+            kernel_key = (('kernel_matrix', fingerprint(covariance_matrix), self._is_matrix_model,
+                           self.kernel_kwargs[KERNEL_FUNCTION], self.kernel_kwargs[KERNEL_STAT_FUNC],
+                           self.kernel_kwargs[USE_ORIGINAL_DATA], self.kernel_kwargs[ITERATIVE_KERNEL_FIT])
+                          if StageCache.active() is not None else None)
+            kernel_matrix = self._cached_stage(
+                kernel_key,
+                lambda: calculate_symmetrical_kernel_matrix(
+                    covariance_matrix,
+                    flattened=self._is_matrix_model,
+                    analyse_mode=self.analyse_plot_type,
+                    as_toeplitz=True,
+                    performance_test=self.performance_test,
+                    **self.kernel_kwargs
+                ))
+        self._kernel_matrix = kernel_matrix
+        if not covariance_matrix.flags.writeable:
+            covariance_matrix = covariance_matrix.copy()
+        if self.kernel_kwargs[KERNEL_MAP] == KERNEL_ONLY:
+            covariance_matrix = np.array(kernel_matrix)
+        elif self.kernel_kwargs[KERNEL_MAP] == KERNEL_DIFFERENCE:
+            covariance_matrix -= kernel_matrix
+        elif self.kernel_kwargs[KERNEL_MAP] == KERNEL_MULTIPLICATION:
+            covariance_matrix *= kernel_matrix
+
+        if self.kernel_kwargs[ONES_ON_KERNEL_DIAG]:
+            np.fill_diagonal(covariance_matrix, 1.0)
+
+        return covariance_matrix
+
+    def _get_eigenvectors(self):
+        """
+        Calculate the eigenvectors of the covariance matrix.
+
+        This method computes the eigenvectors of the covariance matrix based on the specified algorithm.
+        The eigenvalues and eigenvectors can be sorted and processed according to various settings.
+
+        Returns
+        -------
+        eigenvectors : np.ndarray
+            Eigenvectors of the covariance matrix, either with or without dimensionality reduction layer.
+
+        Notes
+        -----
+        - The eigenvalues and eigenvectors are calculated and sorted in `_get_sorted_eigenpairs`.
+        - If the model is Kronecker structured, the eigenvalue problem is solved on the combined matrices.
+          Every eigenpair (w, v) of these matrices results in the `_combined_dim` eigenpairs (w, v ⊗ e_c)
+          of the block expanded matrices, with e_c as unit vectors.
+        - If 'extra_dr_layer' is enabled, an additional dimensionality reduction layer is applied to the eigenvectors.
+
+        """
+        with Timer(name='eigenvector_decomposition', enable_timer=self.performance_test):
+            eigenvalues, eigenvectors = self._get_sorted_eigenpairs(self._n_required_eigenpairs)
+
+            if self._is_kronecker_structured:
+                eigenvalues = np.repeat(eigenvalues, self._combine_dim)
+                eigenvectors = diagonal_block_expand(eigenvectors, self._combine_dim)
+            self.explained_variance_ = eigenvalues
+
+            if self.extra_dr_layer:
+                return self._get_eigenvectors_with_dr_layer(eigenvectors)
+            else:
+                self.explained_variance_ = self.explained_variance_[::self.nth_eigenvector]
+                return eigenvectors[:, ::self.nth_eigenvector]
+
+    def _get_compact_eigenvectors(self):
+        """
+        Calculate the eigenvectors of the block expanded covariance matrix in the compact form.
+
+        The eigenvectors of the block expanded matrix are the Kronecker products v ⊗ e_c, of the eigenvectors v
+        of the combined matrix and the unit vectors e_c. Instead of creating the dense eigenvectors,
+        the factor vectors v and the coordinate indices c are returned in the same order as `_get_eigenvectors`.
+
+        Returns
+        -------
+        factors : np.ndarray
+            Factor vectors of the eigenvectors with shape (_feature_dim, n_eigenvectors).
+        coordinates : np.ndarray
+            Coordinate index of the eigenvectors with shape (n_eigenvectors,).
 
         """
-        with Timer(name='calculate_symmetrical_kernel_matrix', enable_timer=self.performance_test):
-            kernel_matrix = calculate_symmetrical_kernel_matrix(
-                covariance_matrix,
-                flattened=self._is_matrix_model,
-                analyse_mode=self.analyse_plot_type,
-                performance_test=self.performance_test,
-                **self.kernel_kwargs
-            )
-        if self.kernel_kwargs[KERNEL_MAP] == KERNEL_ONLY:
-            covariance_matrix = kernel_matrix
-        elif self.kernel_kwargs[KERNEL_MAP] == KERNEL_DIFFERENCE:
-            covariance_matrix -= kernel_matrix
-        elif self.kernel_kwargs[KERNEL_MAP] == KERNEL_MULTIPLICATION:
-            covariance_matrix *= kernel_matrix
-
-        if self.kernel_kwargs[ONES_ON_KERNEL_DIAG]:
-            np.fill_diagonal(covariance_matrix, 1.0)
+        with Timer(name='eigenvector_decomposition', enable_timer=self.performance_test):
+            eigenvalues, eigenvectors = self._get_sorted_eigenpairs(self._n_required_eigenpairs)
 
-        return covariance_matrix
+            expanded_indices = np.arange(0, eigenvalues.size * self._combine_dim, self.nth_eigenvector)
+            factor_indices, coordinates = np.divmod(expanded_indices, self._combine_dim)
+            self.explained_variance_ = eigenvalues[factor_indices]
+            return eigenvectors[:, factor_indices], coordinates
 
-    def _get_eigenvectors(self):
+    def _get_sorted_eigenpairs(self, n_eigenpairs: [int, None] = None, eigvals_only: bool = False):
         """
-        Calculate the eigenvectors of the covariance matrix.
+        Calculate the eigenvalues and eigenvectors of the covariance matrix sorted descending.
 
-        This method computes the eigenvectors of the covariance matrix based on the specified algorithm.
-        The eigenvalues and eigenvectors can be sorted and processed according to various settings.
+        Parameters
+        ----------
+        n_eigenpairs : int or None, optional
+            Number of the largest eigenpairs, calculated with the partial 'solver'.
+            Default is None, the full spectrum is calculated.
+        eigvals_only : bool, optional
+            Calculate only the eigenvalues. Default is False.
 
         Returns
         -------
+        eigenvalues : np.ndarray
+            Sorted eigenvalues.
         eigenvectors : np.ndarray
-            Eigenvectors of the covariance matrix, either with or without dimensionality reduction layer.
+            Eigenvectors in the columns, sorted as the eigenvalues. Only returned if `eigvals_only` is False.
 
         Notes
         -----
-        - The eigenvalues and eigenvectors of the covariance matrix are computed based on the chosen algorithm.
         - If the algorithm is 'tica' or 'kica', the correlation matrix is calculated and used to compute
-          the eigenvalues and eigenvectors.
+          the eigenvalues and eigenvectors of the symmetric generalized problem (see `_get_generalized_eigenpairs`).
         - Eigenvalues are sorted in descending order, and the eigenvectors are reordered accordingly.
         - The 'abs_eigenvalue_sorting' option determines whether to sort eigenvalues by absolute values or
           if complex eigenvalues are encountered, their absolute values are used.
-        - If 'extra_dr_layer' is enabled, an additional dimensionality reduction layer is applied to the eigenvectors.
+        - For Kronecker structured models the eigenpairs of the combined (not block expanded) matrices are returned.
+        - With `n_eigenpairs` the symmetric (generalized) problem is solved with `partial_eigh` and
+          the 'total_variance_' is set to the sum of the full spectrum (see `eigenvalue_sum`), which is the trace of
+          the (generalized) problem, or the sum of the absolute eigenvalues with 'abs_eigenvalue_sorting'
+          as the denominator of the explained variance of the full solver. The generalized eigenvectors are
+          normalized to unit length as with the full solver.
+        - The 'randomized' solver uses the covariance operator, and sets the 'approximation_error_'
+          to the largest relative residual norm ||C v - w v|| / |w| of the calculated eigenpairs.
+        - If the covariance matrix is the symmetric Toeplitz kernel matrix (see `_use_toeplitz_solver`), the two
+          half-sized problems of its symmetric and skew-symmetric eigenvectors are solved
+          (see `symmetric_toeplitz_eigh`).
+        - If a compact support kernel restricts the covariance matrix to a narrow band
+          (see `_get_banded_covariance_matrix`), the partial problem is solved in the banded form
+          (see `banded_eigh`).
 
         """
-        with Timer(name='eigenvector_decomposition', enable_timer=self.performance_test):
-            if self.algorithm_name in ['tica', 'kica']:
-                correlation_matrix = self._get_correlations_matrix()
-                eigenvalues, eigenvectors = scipy.linalg.eig(correlation_matrix, b=self._covariance_matrix)
+        self.approximation_error_ = None
+        band = None if n_eigenpairs is None else self._get_banded_covariance_matrix()
+        if self._use_covariance_operator and n_eigenpairs is not None:
+            eigenvalues, eigenvectors, residuals = randomized_eigh(
+                self._get_covariance_operator(), n_eigenpairs, n_oversamples=self.n_oversamples,
+                n_power_iterations=self.n_power_iterations, random_state=self.random_state)
+            result = eigenvalues if eigvals_only else (eigenvalues, eigenvectors)
+            self.approximation_error_ = np.max(residuals)
+            # The covariance matrix without kernel is positive semi-definite, so its trace is the sum of |w|
+            standardized_data = self._standardized_data.ravel()  # the sum of squares without a squared copy
+            self.total_variance_ = np.vdot(standardized_data, standardized_data) / (self.n_samples - 1)
+            if self._is_kronecker_structured:
+                self.total_variance_ /= self._combine_dim
+        elif self.algorithm_name in ['tica', 'kica']:
+            correlation_matrix = self._get_correlations_matrix(block_expand=not self._is_kronecker_structured)
+            covariance_matrix = self._get_regularized_covariance_matrix()
+            result = self._get_generalized_eigenpairs(correlation_matrix, covariance_matrix, n_eigenpairs,
+                                                      eigvals_only)
+            if n_eigenpairs is not None:
+                self.total_variance_ = eigenvalue_sum(correlation_matrix, covariance_matrix,
+                                                      by_magnitude=self.abs_eigenvalue_sorting)
+        elif band is not None:
+            result = banded_eigh(band, n_eigenpairs, by_magnitude=self.abs_eigenvalue_sorting,
+                                 eigvals_only=eigvals_only)
+            self.total_variance_ = banded_eigenvalue_sum(band, by_magnitude=self.abs_eigenvalue_sorting)
+        elif self._use_toeplitz_solver:
+            result = symmetric_toeplitz_eigh(self._covariance_matrix[:, 0], n_eigenpairs,
+                                             solver=FULL_SOLVER if n_eigenpairs is None else self.solver,
+                                             by_magnitude=self.abs_eigenvalue_sorting, eigvals_only=eigvals_only)
+            if n_eigenpairs is not None:
+                self.total_variance_ = eigenvalue_sum(self._covariance_matrix,
+                                                      by_magnitude=self.abs_eigenvalue_sorting)
+        else:
+            if n_eigenpairs is None:
+                result = (np.linalg.eigvalsh(self._covariance_matrix) if eigvals_only
+                          else np.linalg.eigh(self._covariance_matrix))
             else:
-                eigenvalues, eigenvectors = np.linalg.eigh(self._covariance_matrix)
+                result = partial_eigh(self._covariance_matrix, n_eigenpairs, solver=self.solver,
+                                      by_magnitude=self.abs_eigenvalue_sorting, eigvals_only=eigvals_only)
+                self.total_variance_ = eigenvalue_sum(self._covariance_matrix,
+                                                      by_magnitude=self.abs_eigenvalue_sorting)
+
+        if n_eigenpairs is None:
+            self.total_variance_ = None
+        elif self._is_kronecker_structured:
+            self.total_variance_ *= self._combine_dim
+
+        eigenvalues, eigenvectors = (result, None) if eigvals_only else result
+        if self.abs_eigenvalue_sorting or np.any(np.iscomplex(eigenvalues)):
+            eigenvalues = np.abs(eigenvalues)
+
+        sorted_indices = np.argsort(eigenvalues)[::-1]
+        eigenvalues = np.real_if_close(eigenvalues[sorted_indices])
+        if eigvals_only:
+            return eigenvalues
+
+        eigenvectors = eigenvectors[:, sorted_indices]
+        if self._use_correlation_matrix():
+            eigenvectors = eigenvectors / np.linalg.norm(eigenvectors, axis=0)
+        return eigenvalues, np.real_if_close(eigenvectors)
+
+    def _get_regularized_covariance_matrix(self) -> np.ndarray:
+        """
+        Get the covariance matrix of the generalized eigenproblem with the 'regularization'.
 
-            if self.abs_eigenvalue_sorting or np.any(np.iscomplex(eigenvalues)):
-                eigenvalues = np.abs(eigenvalues)
+        Returns
+        -------
+        covariance_matrix : np.ndarray
+            The covariance matrix C, or C + regularization * mean(diag(C)) * I.
+
+        """
+        if self.regularization == 0:
+            return self._covariance_matrix
+        shift = self.regularization * np.mean(np.diag(self._covariance_matrix))
+        return self._covariance_matrix + shift * np.eye(len(self._covariance_matrix),
+                                                        dtype=self._covariance_matrix.dtype)
+
+    def _get_generalized_eigenpairs(self, correlation_matrix: np.ndarray, covariance_matrix: np.ndarray,
+                                    n_eigenpairs: [int, None] = None, eigvals_only: bool = False):
+        """
+        Solve the generalized eigenproblem correlation_matrix v = w covariance_matrix v.
 
-            sorted_indices = np.argsort(eigenvalues)[::-1]
-            self.explained_variance_ = np.real_if_close(eigenvalues[sorted_indices])
-            eigenvectors = np.real_if_close(eigenvectors[:, sorted_indices])
+        Both matrices are symmetric by construction, so for a positive definite covariance matrix the problem
+        is reduced to a symmetric standard problem with the Cholesky factor of the covariance matrix
+        (see `partial_eigh`). This gives real eigenpairs and is much faster than the general QZ algorithm.
+        Kronecker structured models solve the problem of the combined (_feature_dim x _feature_dim) matrices.
 
-            if self.extra_dr_layer:
-                return self._get_eigenvectors_with_dr_layer(eigenvectors)
+        Parameters
+        ----------
+        correlation_matrix : np.ndarray
+            Symmetric (time lagged) correlation matrix.
+        covariance_matrix : np.ndarray
+            Symmetric covariance matrix.
+        n_eigenpairs : int or None, optional
+            Number of the largest eigenpairs, calculated with the partial 'solver'.
+            Default is None, the full spectrum is calculated.
+        eigvals_only : bool, optional
+            Calculate only the eigenvalues. Default is False.
+
+        Returns
+        -------
+        eigenvalues : np.ndarray
+            Eigenvalues (unsorted for the general solver).
+        eigenvectors : np.ndarray
+            Eigenvectors in the columns. Only returned if `eigvals_only` is False.
+
+        Warnings
+        --------
+        UserWarning
+            If the full spectrum is calculated and the covariance matrix is not positive definite,
+            the general (QZ) solver `scipy.linalg.eig` is used, which can return complex eigenpairs.
+            A 'regularization' can make a near-singular covariance matrix positive definite.
+
+        Raises
+        ------
+        LinAlgError
+            If a partial 'solver' is used and the covariance matrix is not positive definite.
+
+        """
+        solver = FULL_SOLVER if n_eigenpairs is None else self.solver
+        try:
+            return partial_eigh(correlation_matrix, n_eigenpairs, b=covariance_matrix, solver=solver,
+                                by_magnitude=self.abs_eigenvalue_sorting, eigvals_only=eigvals_only)
+        except np.linalg.LinAlgError:
+            if n_eigenpairs is not None:
+                raise
+            warnings.warn(f"The covariance matrix is not positive definite, so the general eigensolver is used "
+                          f"for '{self.algorithm_name}'. Consider to set the '{REGULARIZATION}' parameter.",
+                          UserWarning)
+            return scipy.linalg.eig(correlation_matrix, b=covariance_matrix, right=not eigvals_only)
+
+    def get_eigenvalues(self, n_eigenvalues: [int, None] = None) -> np.ndarray:
+        """
+        Get the largest (selected) eigenvalues of the fitted model, without calculating the eigenvectors.
+
+        The eigenvalues are selected in the same way as the 'explained_variance_' of the components.
+        For a partial 'solver' only the needed eigenvalues are calculated,
+        otherwise the eigenvalues of the full spectrum are already calculated while fitting.
+
+        Parameters
+        ----------
+        n_eigenvalues : int or None, optional
+            Number of the largest eigenvalues. Default is None (all eigenvalues).
+
+        Returns
+        -------
+        eigenvalues : np.ndarray
+            Selected eigenvalues in descending order.
+
+        """
+        if self.solver == FULL_SOLVER or self.extra_dr_layer:
+            return self.explained_variance_[:n_eigenvalues]
+
+        with Timer(name='eigenvalue_decomposition', enable_timer=self.performance_test):
+            if n_eigenvalues is None:
+                n_eigenpairs = self._feature_dim
+                if not self._is_matrix_model and not self._is_kronecker_structured:
+                    n_eigenpairs *= self._combine_dim
             else:
-                self.explained_variance_ = self.explained_variance_[::self.nth_eigenvector]
-                return eigenvectors[:, ::self.nth_eigenvector]
+                n_eigenpairs = self._get_n_eigenpairs(n_eigenvalues)
+            eigenvalues = self._get_sorted_eigenpairs(n_eigenpairs, eigvals_only=True)
+            if self._is_kronecker_structured:
+                eigenvalues = np.repeat(eigenvalues, self._combine_dim)
+            return eigenvalues[::self.nth_eigenvector][:n_eigenvalues]
 
     def _get_eigenvectors_with_dr_layer(self, eigenvectors):
         """
@@ -658,31 +1733,30 @@ class DROPP(TensorDR):
         Notes
         -----
         - The dimensionality reduction (DR) layer is applied to each feature's eigenvectors independently.
-        - The DR layer uses PCA (Principal Component Analysis) with n_components=1 for each feature.
+        - The DR layer is a PCA (Principal Component Analysis) with n_components=1 for each feature.
+          The PCAs of all the features are calculated with one batched SVD of the centered eigenvector blocks
+          (_feature_dim, n_rows, _combine_dim), with the sign convention of scikit-learn
+          (the largest absolute value of each component is positive).
         - The DR layer modifies the eigenvalues and eigenvectors to capture essential information
           while reducing the dimensionality.
 
         """
-        eigenvalues2 = []
-        eigenvectors2 = []
-        for component in range(self._feature_dim):
-            vector_from = component * self._combine_dim
-            vector_to = (component + 1) * self._combine_dim
-            model = PCA(n_components=1)
-            model.fit_transform(eigenvectors[:, vector_from:vector_to])
-
-            ew2 = model.explained_variance_[0]
-            # eigenvalues2.append(np.mean(self.eigenvalues[vector_from:vector_to] * ew2))
-            eigenvalues2.append(np.sum(self.explained_variance_[vector_from:vector_to] * ew2))
-
-            ev2 = model.components_[0]
-            ev = np.dot(eigenvectors[:, vector_from:vector_to], ev2)
-            eigenvectors2.append(ev)
-
-        self.explained_variance_ = np.asarray(eigenvalues2).T
-        return np.asarray(eigenvectors2).T
-
-    def _get_correlations_matrix(self):
+        n_rows = eigenvectors.shape[0]
+        blocks = np.moveaxis(eigenvectors.reshape(n_rows, self._feature_dim, self._combine_dim), 0, 1)
+        centered_blocks = blocks - np.mean(blocks, axis=1, keepdims=True)
+        _, singular_values, right_vectors = np.linalg.svd(centered_blocks, full_matrices=False)
+
+        components = right_vectors[:, 0, :]
+        max_indices = np.argmax(np.abs(components), axis=1)
+        components *= np.sign(components[np.arange(self._feature_dim), max_indices])[:, np.newaxis]
+        layer_variances = singular_values[:, 0] ** 2 / (n_rows - 1)
+
+        self.explained_variance_ = np.sum(
+            self.explained_variance_.reshape(self._feature_dim, self._combine_dim) * layer_variances[:, np.newaxis],
+            axis=1)
+        return np.einsum('frc,fc->rf', blocks, components)
+
+    def _get_correlations_matrix(self, block_expand: bool = True):
         """
         Calculate the correlations matrix based on the model's configuration.
 
@@ -690,6 +1764,12 @@ class DROPP(TensorDR):
         kernel mapping mode. The correlations matrix can involve operations such as correlation matrix calculation,
         kernel mapping, and diagonal expansion.
 
+        Parameters
+        ----------
+        block_expand : bool, optional
+            Block expand the combined correlations matrix of tensor data. Default is True.
+            Ignored for matrix-based models.
+
         Returns
         -------
         corr_matrix : np.ndarray
@@ -709,23 +1789,49 @@ class DROPP(TensorDR):
         """
 
         if self._is_matrix_model:
-            corr = self._get_matrix_correlation()
+            corr = self._cached_stage(
+                self._data_stage_key('matrix_correlation', self.lag_time, self._covariance_time_indices.stop),
+                self._get_matrix_correlation)
 
             if self.kernel_kwargs[CORR_KERNEL] or self._use_kernel_as_correlation_matrix():
                 corr = self._map_kernel_on(corr)
 
-            return corr
+            return corr.astype(self._dtype, copy=False)
         else:
-            tensor_corr = self._get_tensor_correlation()
-            corr = self.cov_stat_func(tensor_corr, axis=0)
-
-            if self.analyse_plot_type == CORRELATION_MATRIX_PLOT:
-                MultiArrayPlotter().plot_tensor_layers(tensor_corr, corr, 'Correlation')
+            corr = self._cached_stage(
+                self._data_stage_key('combined_correlation', self.lag_time, self._covariance_time_indices.stop,
+                                     self._use_kernel_as_correlation_matrix(), self.cov_function, self.cov_stat_func),
+                self._get_combined_correlation_matrix)
 
             if self.kernel_kwargs[CORR_KERNEL] or self._use_kernel_as_correlation_matrix():
                 corr = self._map_kernel_on(corr)
 
-            return diagonal_block_expand(corr, tensor_corr.shape[0])
+            if not block_expand:
+                return corr
+            return diagonal_block_expand(corr.astype(self._dtype, copy=False), self._combine_dim)
+
+    def _get_combined_correlation_matrix(self) -> np.ndarray:
+        """
+        Calculate the combined correlation matrix of tensor data (before the kernel mapping).
+
+        Returns
+        -------
+        combined_corr_matrix : np.ndarray
+            Combined correlation matrix with shape (_feature_dim, _feature_dim), which is the
+            'cov_stat_func' of the tensor correlation over the combined dimension.
+
+        """
+        is_lagged = not self._use_kernel_as_correlation_matrix() and self.lag_time > 0
+        if self._use_fused_mean_reduction and is_lagged:
+            return self._get_fused_correlation_matrix()
+        elif self._use_fused_mean_reduction and self.cov_function is np.cov:
+            return self._get_fused_covariance_matrix()
+
+        tensor_corr = self._get_tensor_correlation()
+        corr = self.cov_stat_func(tensor_corr, axis=0)
+        if self.analyse_plot_type == CORRELATION_MATRIX_PLOT:
+            MultiArrayPlotter().plot_tensor_layers(tensor_corr, corr, 'Correlation')
+        return corr
 
     def _get_matrix_correlation(self):
         """
@@ -750,9 +1856,11 @@ class DROPP(TensorDR):
 
         if self.lag_time <= 0:
             return self._get_matrix_covariance()
+        elif self._running_statistics is not None:
+            return self._running_statistics.lagged_correlation_tensor(self.use_std)[0]
         else:
-            corr = np.dot(self._standardized_data[:-self.lag_time].T,
-                          self._standardized_data[self.lag_time:]) / (self.n_samples - self.lag_time)
+            corr = accumulated_gram(self._standardized_data[:-self.lag_time],
+                                    self._standardized_data[self.lag_time:]) / (self.n_samples - self.lag_time)
             return ensure_matrix_symmetry(corr)
 
     def _get_tensor_correlation(self):
@@ -775,22 +1883,38 @@ class DROPP(TensorDR):
         - If kernel mapping is used for the correlations matrix or lag time is not used (lag_time <= 0),
           the covariance tensor is returned instead.
         - The resulting tensor correlation is ensured to have symmetric matrices for each combined dimension.
+        - The time lagged products of all the combined dimensions are calculated with one batched matrix product.
 
         """
 
         if self._use_kernel_as_correlation_matrix() or self.lag_time <= 0:
             return self._get_covariance_tensor()
+        elif self._running_statistics is not None:
+            return self._running_statistics.lagged_correlation_tensor(self.use_std)
         else:
-            temp_list = []
-            for index in range(self._combine_dim):
-                dot_i = np.dot(self._standardized_data[:-self.lag_time, :, index].T,
-                               self._standardized_data[self.lag_time:, :, index]) / (
-                                self.n_samples - self.lag_time)
-                sym_i = ensure_matrix_symmetry(dot_i)
-                temp_list.append(sym_i)
-            return np.asarray(temp_list)
+            layers = self._get_data_layers(slice(None))
+            corr = accumulated_gram(layers[:, :-self.lag_time], layers[:, self.lag_time:]) / (
+                    self.n_samples - self.lag_time)
+            return 0.5 * (corr + np.swapaxes(corr, 1, 2))
+
+    def _get_fused_correlation_matrix(self) -> np.ndarray:
+        """
+        Calculate the mean of the time lagged correlation matrices over the combined dimension,
+        without the correlation tensor (see `_get_fused_covariance_matrix`).
+
+        Returns
+        -------
+        combined_corr_matrix : np.ndarray
+            Symmetric combined correlation matrix with shape (_feature_dim, _feature_dim).
+
+        """
+        layers = self._get_data_layers(slice(None))
+        stacked_from = layers[:, :-self.lag_time].reshape(-1, self._feature_dim)
+        stacked_to = layers[:, self.lag_time:].reshape(-1, self._feature_dim)
+        corr = accumulated_gram(stacked_from, stacked_to) / (self._combine_dim * (self.n_samples - self.lag_time))
+        return ensure_matrix_symmetry(corr)
 
-    def transform(self, data_tensor):
+    def transform(self, data_tensor, use_fitted_statistics: bool = False):
         """
         Transform input data tensor or matrix into a reduced-dimensional representation.
 
@@ -802,6 +1926,12 @@ class DROPP(TensorDR):
         data_tensor : np.ndarray
             Input data tensor or matrix with shape (n_samples, _feature_dim, _combined_dim) for tensor data,
             or (n_samples, _feature_dim) for matrix data.
+        use_fitted_statistics : bool, optional
+            If True, the input is standardized with the mean and standard deviation of the fitted data.
+            The statistics of the model are not changed and no reduction over the input is calculated,
+            so chunks of a trajectory can be transformed independently (see `partial_fit`).
+            If False (default), the input is standardized with its own statistics,
+            which replace the statistics of the model.
 
         Returns
         -------
@@ -809,10 +1939,71 @@ class DROPP(TensorDR):
             Reduced-dimensional representation of the input data tensor or matrix with shape
             (n_samples, n_components).
 
+        Raises
+        ------
+        ModelNotFittedError
+            If `use_fitted_statistics` is True and the model is not fitted.
+
+        """
+        if use_fitted_statistics:
+            data_tensor_standardized = self._standardize_with_fitted_statistics(data_tensor)
+        else:
+            data_tensor_standardized = self._standardize_data(data_tensor)
+        return self._project(data_tensor_standardized)
+
+    def _standardize_with_fitted_statistics(self, tensor: np.ndarray) -> np.ndarray:
+        """
+        Standardize the input data with the mean and standard deviation of the fitted data.
+
+        Parameters
+        ----------
+        tensor : np.ndarray
+            Input data tensor or matrix with the same feature shape as the fitted data.
+
+        Returns
+        -------
+        standardized_data : np.ndarray
+            Standardized data with the same shape as the input.
+
+        """
+        if self.mean is None:
+            raise ModelNotFittedError(f"The model `{self}` is not yet fitted. "
+                                      "Please fit the model before transforming with the fitted statistics.")
+        centered_data = np.subtract(tensor, self.mean, dtype=self._dtype)
+        if self.use_std:
+            centered_data /= np.asarray(self._std, dtype=self._dtype)
+        return centered_data
+
+    def _project(self, standardized_tensor: np.ndarray) -> np.ndarray:
+        """
+        Project standardized data onto the components.
+
+        For compact stored components the projection is calculated directly on the tensor.
+        Every component uses only one coordinate layer, so the components are grouped by their coordinate
+        and each layer (n_samples, _feature_dim) is multiplied with the factors of its group.
+        This needs `_combined_dim` times less operations than the dense matrix product.
+
+        Parameters
+        ----------
+        standardized_tensor : np.ndarray
+            Standardized data tensor or matrix with shape (n_samples, _feature_dim, _combined_dim) for tensor data,
+            or (n_samples, _feature_dim) for matrix data.
+
+        Returns
+        -------
+        projection : np.ndarray
+            Projected data with shape (n_samples, n_components).
+
         """
-        data_tensor_standardized = self._standardize_data(data_tensor)
-        data_matrix = self.convert_to_matrix(data_tensor_standardized)
-        return np.dot(data_matrix, self.components_.T)
+        if self._component_factors is None:
+            return np.dot(self.convert_to_matrix(standardized_tensor), self.components_.T)
+
+        projection = np.empty((standardized_tensor.shape[TIME_DIM], self._component_factors.shape[1]),
+                              dtype=np.result_type(standardized_tensor, self._component_factors))
+        for coordinate in np.unique(self._component_coordinates):
+            mask = self._component_coordinates == coordinate
+            projection[:, mask] = np.dot(standardized_tensor[:, :, coordinate], self._component_factors[:, mask])
+        return projection
 
     def convert_to_matrix(self, tensor):
         """
@@ -835,7 +2026,7 @@ class DROPP(TensorDR):
         if self._is_matrix_model:
             return tensor
         else:
-            return super().convert_to_matrix(tensor)
+            return tensor.reshape(tensor.shape[TIME_DIM], self._feature_dim * self._combine_dim)
 
     def convert_to_tensor(self, matrix):
         """
@@ -857,7 +2048,7 @@ class DROPP(TensorDR):
         if self._is_matrix_model:
             return matrix
         else:
-            return super().convert_to_tensor(matrix)
+            return matrix.reshape(matrix.shape[TIME_DIM], self._feature_dim, self._combine_dim)
 
     def inverse_transform(self, projection_data: np.ndarray, component_count: int):
         """
@@ -885,19 +2076,102 @@ class DROPP(TensorDR):
             If eigenvectors are non-orthogonal and non-squared, and `use_evs` flag is not set.
 
         """
-        if is_matrix_orthogonal(self.components_.T):
-            return np.dot(
-                projection_data,
-                self.components_[:component_count]
-            )  # Da orthogonal --> Transform = inverse
+        if self._component_factors is not None:
+            return self.convert_to_matrix(self._inverse_transform_tensor(projection_data, component_count))
         else:
-            if self._use_evs:
+            return np.dot(projection_data, self._get_inverse_components()[:component_count])
+
+    def _get_inverse_components(self) -> np.ndarray:
+        """
+        Get the inverse of the components for the inverse transformation.
+
+        The inverse is calculated at the first inverse transformation after the fit and cached on the model.
+        Setting new components (e.g. by a refit) invalidates the cache.
+
+        Returns
+        -------
+        inverse_components : np.ndarray
+            The components, if they are orthogonal (then the transformation is its inverse),
+            or the inverse of the components with the same shape.
+
+        Raises
+        ------
+        NonInvertibleEigenvectorException
+            If eigenvectors are non-orthogonal and non-squared, and `use_evs` flag is set.
+
+        """
+        if self._inverse_components is None:
+            if is_matrix_orthogonal(self.components_.T):
+                self._inverse_components = self.components_
+            elif self._use_evs:
                 raise NonInvertibleEigenvectorException('Eigenvectors are Non-Orthogonal and Non-Squared. ')
             else:
-                return np.dot(
-                    projection_data,
-                    np.linalg.inv(self.components_.T)[:component_count]
-                )
+                self._inverse_components = np.linalg.inv(self.components_.T)
+        return self._inverse_components
+
+    def _inverse_transform_tensor(self, projection_data: np.ndarray, component_count: int) -> np.ndarray:
+        """
+        Transform the projection back to the original tensor space with the compact components.
+
+        Parameters
+        ----------
+        projection_data : np.ndarray
+            Reduced-dimensional projection data with shape (n_samples, component_count).
+        component_count : int
+            Number of components to use for the inverse transformation.
+
+        Returns
+        -------
+        tensor : np.ndarray
+            Inverse-transformed data with shape (n_samples, _feature_dim, _combined_dim).
+
+        """
+        factors = self._get_inverse_factors()[:, :component_count]
+        coordinates = self._component_coordinates[:component_count]
+
+        tensor = np.zeros((projection_data.shape[TIME_DIM], self._feature_dim, self._combine_dim),
+                          dtype=np.result_type(projection_data, factors))
+        for coordinate in np.unique(coordinates):
+            mask = coordinates == coordinate
+            tensor[:, :, coordinate] = np.dot(projection_data[:, mask], factors[:, mask].T)
+        return tensor
+
+    def _get_inverse_factors(self) -> np.ndarray:
+        """
+        Calculate the factor vectors of the inverse of the compact components.
+
+        Components with different coordinates are orthogonal to each other, so the Gram matrix and the inverse
+        of the components are calculated separately for each coordinate.
+        As for the dense components (see `_get_inverse_components`), the inverse factors are cached.
+
+        Returns
+        -------
+        inverse_factors : np.ndarray
+            Factor vectors of the inverse components with shape (_feature_dim, n_components).
+            The coordinate indices are the same as for the components.
+
+        Raises
+        ------
+        NonInvertibleEigenvectorException
+            If eigenvectors are non-orthogonal and non-squared, and `use_evs` flag is set.
+
+        """
+        if self._inverse_components is not None:
+            return self._inverse_components
+
+        factors = self._component_factors
+        coordinates = self._component_coordinates
+        gram_matrix = np.dot(factors.T, factors) * (coordinates[:, np.newaxis] == coordinates[np.newaxis, :])
+        if np.allclose(gram_matrix, np.eye(factors.shape[1])):
+            self._inverse_components = factors
+        elif self._use_evs:
+            raise NonInvertibleEigenvectorException('Eigenvectors are Non-Orthogonal and Non-Squared. ')
+        else:
+            self._inverse_components = np.empty_like(factors)
+            for coordinate in np.unique(coordinates):
+                mask = coordinates == coordinate
+                self._inverse_components[:, mask] = np.linalg.inv(factors[:, mask]).T
+        return self._inverse_components
 
     def reconstruct(self, projection_matrix, component_count=None):
         """
@@ -932,9 +2206,11 @@ class DROPP(TensorDR):
             raise InvalidComponentNumberException(f'Model does not have {component_count} many components. '
                                                   f'Max: {self.components_.shape[0]}')
 
-        inverse_matrix = self.inverse_transform(projection_matrix, component_count)
-
-        reconstructed_tensor = self.convert_to_tensor(inverse_matrix)
+        if self._component_factors is None:
+            inverse_matrix = self.inverse_transform(projection_matrix, component_count)
+            reconstructed_tensor = self.convert_to_tensor(inverse_matrix)
+        else:
+            reconstructed_tensor = self._inverse_transform_tensor(projection_matrix, component_count)
         if self.use_std:
             reconstructed_tensor *= self._std
         reconstructed_tensor += self.mean
@@ -951,8 +2227,9 @@ class DROPP(TensorDR):
 
         Parameters
         ----------
-        data_tensor : np.ndarray
-            Original data tensor with shape (n_samples, _feature_dim, _combined_dim).
+        data_tensor : np.ndarray or list[np.ndarray]
+            Original data tensor with shape (n_samples, _feature_dim, _combined_dim),
+            or a list of trajectories (e.g. the test trajectories of a cross validation).
 
         y : None
             Ignored. This parameter exists only for compatibility with scikit-learns pipeline.
@@ -961,6 +2238,7 @@ class DROPP(TensorDR):
         -------
         rmse : float
             Root mean squared error (RMSE) between original data and its reconstruction.
+            For a list of trajectories, the mean RMSE of the trajectories.
 
         See Also
         --------
@@ -977,6 +2255,9 @@ class DROPP(TensorDR):
         [1] StackExchange. "What does RMSE tell us?" URL: https://stats.stackexchange.com/q/229093
         """
 
+        if isinstance(data_tensor, (list, tuple)):
+            return np.mean([self.score(trajectory) for trajectory in data_tensor])
+
         if y is not None:  # "use" variable, to not have a PyCharm warning
             data_projection = y
         else:
@@ -988,3 +2269,269 @@ class DROPP(TensorDR):
         reconstructed_matrix = self.convert_to_matrix(reconstructed_tensor)
 
         return mean_squared_error(data_matrix, reconstructed_matrix, squared=False)
+
+    def score_curve(self, data_tensor, data_projection=None, max_components=None):
+        """
+        Calculate the RMSE of the reconstructions with the first k components for every k in one pass.
+
+        The result is equal to `score` (with the projection truncated to k components) for k = 1, ..., max_components,
+        but no reconstructed tensor is materialized. The squared residual of each feature column with k components
+        is expanded into the Gram matrix of the projection and the products of the projection with the centered data:
+        ||y - sum_i p_i w_i||^2 = ||y||^2 - 2 sum_i w_i p_i^T y + sum_i sum_j w_i w_j p_i^T p_j,
+        where w_i are the (scaled) inverse components. Adding the k-th component only adds the terms with i = k or
+        j = k, so the residuals of all the component counts are the cumulative sum of these increments.
+        For orthogonal components, which project the same data, the increments summed over the columns reduce to
+        the projected energy ||X w_k||^2.
+
+        Parameters
+        ----------
+        data_tensor : np.ndarray
+            Original data tensor with shape (n_samples, _feature_dim, _combined_dim).
+
+        data_projection : np.ndarray, optional
+            Projection of the data tensor with shape (n_samples, n_components).
+            If not provided, the data tensor is transformed (as in `score`).
+
+        max_components : int, optional
+            Largest number of components of the curve. If not provided, all the components of the projection are used.
+
+        Returns
+        -------
+        rmse_curve : np.ndarray
+            Root mean squared errors (as `score`) of the reconstructions with 1, ..., max_components components.
+
+        Raises
+        ------
+        InvalidComponentNumberException
+            If `max_components` exceeds the available number of components in the model.
+        NonInvertibleEigenvectorException
+            If eigenvectors are non-orthogonal and non-squared, and `use_evs` flag is set.
+
+        """
+        if data_projection is None:
+            data_projection = self.transform(data_tensor)
+
+        n_components = min(data_projection.shape[1], self.components_.shape[0])
+        if max_components is None:
+            max_components = n_components
+        elif max_components > n_components:
+            raise InvalidComponentNumberException(f'Model does not have {max_components} many components. '
+                                                  f'Max: {n_components}')
+
+        projection = np.asarray(data_projection[:, :max_components], dtype=np.float64)
+        centered_data = np.subtract(data_tensor, self.mean, dtype=np.float64)
+        scale = np.asarray(self._std, dtype=np.float64) if self.use_std else np.ones(centered_data.shape[1:])
+
+        if self._component_factors is None:
+            inverse_components = self._get_inverse_components()[:max_components] * self.convert_to_matrix(
+                scale[np.newaxis])
+            increments = self._residual_increments(self.convert_to_matrix(centered_data), projection,
+                                                   inverse_components)
+        else:
+            factors = self._get_inverse_factors()[:, :max_components]
+            coordinates = self._component_coordinates[:max_components]
+            increments = np.zeros((max_components, self._feature_dim, self._combine_dim))
+            for coordinate in np.unique(coordinates):
+                mask = coordinates == coordinate
+                increments[mask, :, coordinate] = self._residual_increments(
+                    centered_data[:, :, coordinate], projection[:, mask],
+                    factors[:, mask].T * scale[:, coordinate])
+            increments = increments.reshape(max_components, -1)
+
+        squared_residuals = (np.sum(self.convert_to_matrix(centered_data) ** 2, axis=TIME_DIM) -
+                             np.cumsum(increments, axis=0))
+        # As `mean_squared_error`, the RMSE of each column is averaged over the columns
+        column_errors = np.sqrt(np.maximum(squared_residuals, 0) / centered_data.shape[TIME_DIM])
+        return np.mean(column_errors, axis=1)
+
+    @staticmethod
+    def _residual_increments(centered_data: np.ndarray, projection: np.ndarray,
+                             inverse_components: np.ndarray) -> np.ndarray:
+        """
+        Calculate the decrease of the squared residual of each column by adding the components one by one.
+
+        Parameters
+        ----------
+        centered_data : np.ndarray
+            Centered data matrix with shape (n_samples, n_columns).
+        projection : np.ndarray
+            Projection with shape (n_samples, n_components).
+        inverse_components : np.ndarray
+            Inverse components, which map the projection back to the centered data, with shape
+            (n_components, n_columns).
+
+        Returns
+        -------
+        increments : np.ndarray
+            Decrease of the squared residual of each column by the k-th component with shape
+            (n_components, n_columns).
+
+        """
+        cross_products = np.dot(projection.T, centered_data)
+        gram_matrix = np.dot(projection.T, projection)
+        preceding_products = np.dot(np.tril(gram_matrix, -1), inverse_components)
+        return inverse_components * (2 * cross_products - 2 * preceding_products -
+                                     np.diag(gram_matrix)[:, np.newaxis] * inverse_components)
+
+    def save(self, path):
+        """
+        Save the fitted model to a compact, versioned npz file.
+
+        The file contains the hyperparameters (as JSON), the components (compact factors and coordinates for
+        Kronecker structured models), the eigenvalues, and the mean and standard deviation of the fitted data,
+        which are needed to transform and reconstruct data. The covariance matrix and the (standardized) data
+        are not stored. The arrays are stored uncompressed, so they can be memory-mapped by `load`.
+
+        Parameters
+        ----------
+        path : str or os.PathLike
+            Path of the file. The extension '.npz' is appended, if it is missing (as `np.savez`).
+
+        Raises
+        ------
+        ModelNotFittedError
+            If the model is not fitted.
+        ValueError
+            If a hyperparameter can not be stored, e.g. a lambda function as 'cov_stat_func'.
+
+        Examples
+        --------
+        >>> dropp_instance = DROPP().fit(np.random.rand(100, 10, 3))
+        >>> dropp_instance.save('dropp_model.npz')
+        >>> loaded_instance = DROPP.load('dropp_model.npz', mmap_mode='r')
+
+        """
+        if self.mean is None or self.explained_variance_ is None:
+            raise ModelNotFittedError(f"The model `{self}` is not yet fitted. "
+                                      "Please fit the model before saving it.")
+
+        arrays = {
+            'format_version': np.asarray(MODEL_FORMAT_VERSION),
+            'params': np.asarray(json.dumps(self._encode_param(self.get_params()))),
+            'n_components': np.asarray(self.n_components),
+            'n_samples': np.asarray(self.n_samples),
+            'data_shape': np.asarray(self._data_shape),
+            'explained_variance_': np.asarray(self.explained_variance_),
+            'mean': np.asarray(self.mean),
+            'std': np.asarray(self._std),
+        }
+        if self.total_variance_ is not None:
+            arrays['total_variance_'] = np.asarray(self.total_variance_)
+        if getattr(self, 'approximation_error_', None) is not None:
+            arrays['approximation_error_'] = np.asarray(self.approximation_error_)
+        if self._component_factors is not None:
+            arrays['component_factors'] = self._component_factors
+            arrays['component_coordinates'] = self._component_coordinates
+        else:
+            arrays['components'] = np.asarray(self.components_)
+        np.savez(path, **arrays)
+
+    @classmethod
+    def load(cls, path, mmap_mode: [str, None] = None):
+        """
+        Load a model, which is saved with `save`.
+
+        The loaded model can transform, reconstruct and score data directly, without a refit.
+
+        Parameters
+        ----------
+        path : str or os.PathLike
+            Path of the npz file.
+        mmap_mode : str or None, optional
+            If None (default), the arrays are read into memory. Otherwise, a mode of `np.memmap`
+            ('r', 'r+' or 'c'): the components, eigenvalues, mean and standard deviation are memory-mapped,
+            so large models are not read at once and can be shared by several processes (see `load_npz`).
+
+        Returns
+        -------
+        model : DROPP
+            The fitted model.
+
+        Raises
+        ------
+        ValueError
+            If the file has an unknown format version.
+
+        """
+        arrays = load_npz(path, mmap_mode)
+        format_version = int(arrays['format_version'])
+        if format_version != MODEL_FORMAT_VERSION:
+            raise ValueError(f"The model file '{path}' has the format version {format_version}, "
+                             f"but only version {MODEL_FORMAT_VERSION} is supported.")
+
+        model = cls(**cls._decode_param(json.loads(str(arrays['params']))))
+        model.n_components = int(arrays['n_components'])
+        model.n_samples = int(arrays['n_samples'])
+        model._loaded_data_shape = tuple(int(size) for size in arrays['data_shape'])
+        model.explained_variance_ = arrays['explained_variance_']
+        model.total_variance_ = arrays['total_variance_'].item() if 'total_variance_' in arrays else None
+        model.approximation_error_ = (arrays['approximation_error_'].item()
+                                      if 'approximation_error_' in arrays else None)
+        model.mean = arrays['mean']
+        model._std = arrays['std']
+        if 'components' in arrays:
+            model.components_ = arrays['components']
+        else:
+            model._set_compact_components(arrays['component_factors'], arrays['component_coordinates'])
+        return model
+
+    @classmethod
+    def _encode_param(cls, value):
+        """
+        Encode a hyperparameter as JSON-serializable value.
+
+        Functions (e.g. np.mean or co_mad) are stored by their module and name, numpy types by their name.
+
+        Parameters
+        ----------
+        value : object
+            Hyperparameter value, or a dictionary of them.
+
+        Returns
+        -------
+        encoded_value : object
+            JSON-serializable value.
+
+        Raises
+        ------
+        ValueError
+            If the value can not be encoded, e.g. a lambda or a nested function.
+
+        """
+        if isinstance(value, dict):
+            return {key: cls._encode_param(item) for key, item in value.items()}
+        if value is None or isinstance(value, (bool, int, float, str)):
+            return value
+        if isinstance(value, np.generic):
+            return value.item()
+        if isinstance(value, np.dtype) or (isinstance(value, type) and issubclass(value, np.generic)):
+            return {'__dtype__': np.dtype(value).name}
+        if callable(value) and '<' not in getattr(value, '__qualname__', '<'):
+            return {'__callable__': f'{value.__module__}:{value.__qualname__}'}
+        raise ValueError(f"The hyperparameter value `{value}` can not be saved. "
+                         "Use a module level function, a string, a number or None.")
+
+    @classmethod
+    def _decode_param(cls, value):
+        """
+        Decode a hyperparameter, which is encoded with `_encode_param`.
+
+        Parameters
+        ----------
+        value : object
+            Encoded hyperparameter value, or a dictionary of them.
+
+        Returns
+        -------
+        decoded_value : object
+            Hyperparameter value.
+
+        """
+        if not isinstance(value, dict):
+            return value
+        if '__dtype__' in value:
+            return np.dtype(value['__dtype__']).type
+        if '__callable__' in value:
+            module_name, qualified_name = value['__callable__'].split(':')
+            return functools.reduce(getattr, qualified_name.split('.'), importlib.import_module(module_name))
+        return {key: cls._decode_param(item) for key, item in value.items()}
@@ -1,3 +1,6 @@
+import struct
+import zipfile
+
 import numpy as np
 
 
@@ -57,3 +60,40 @@ def extinct_side_values(symmetrical_array, smaller_than=0):
     new_y = np.zeros_like(symmetrical_array)
     new_y[center_i - right_i:center_i + right_i] = symmetrical_array[center_i - right_i:center_i + right_i]
     return new_y
+
+
+def load_npz(file_path, mmap_mode: [str, None] = None) -> dict:
+    """
+    Load all the arrays of a npz file into a dictionary.
+    `np.load` ignores the `mmap_mode` for npz files, but the members saved by `np.savez` are stored uncompressed,
+    so each array can be memory-mapped directly at its offset in the zip archive.
+    Compressed members, arrays of objects and scalars are read into memory.
+    :param file_path: path of the npz file
+    :param mmap_mode: None (default) to read the arrays into memory, or a mode of `np.memmap` ('r', 'r+', 'c')
+    :return: dictionary with the arrays (or memory-mapped arrays) of the file
+    """
+    if mmap_mode is None:
+        with np.load(file_path) as npz_file:
+            return {key: npz_file[key] for key in npz_file.files}
+
+    arrays = {}
+    with zipfile.ZipFile(file_path) as archive, open(file_path, 'rb') as file:
+        for info in archive.infolist():
+            key = info.filename[:-len('.npy')] if info.filename.endswith('.npy') else info.filename
+            if info.compress_type == zipfile.ZIP_STORED:
+                # The local file header (30 bytes) ends with the lengths of the filename and the extra field
+                file.seek(info.header_offset + 26)
+                filename_length, extra_length = struct.unpack('<HH', file.read(4))
+                file.seek(info.header_offset + 30 + filename_length + extra_length)
+                version = np.lib.format.read_magic(file)
+                if version == (1, 0):
+                    shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(file)
+                else:
+                    shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(file)
+                if len(shape) > 0 and np.prod(shape) > 0 and not dtype.hasobject:
+                    arrays[key] = np.memmap(file_path, dtype=dtype, mode=mmap_mode, shape=shape,
+                                            order='F' if fortran_order else 'C', offset=file.tell())
+                    continue
+            with archive.open(info) as member:
+                arrays[key] = np.lib.format.read_array(member)
+    return arrays
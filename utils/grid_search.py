@@ -0,0 +1,326 @@
+import math
+import os
+import time
+import warnings
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+from sklearn.model_selection import ParameterGrid, check_cv
+from threadpoolctl import threadpool_limits
+
+from utils.algorithms.dropp import DROPP
+from utils.stage_cache import StageCache
+
+HEAD_FRAMES = 'head'
+STRIDED_FRAMES = 'stride'
+
+_worker_state = {}
+
+
+class SharedArray:
+    """
+    Numpy array in shared memory, which is pickled by the name of the memory block (not by its content).
+    The processes of a pool attach to the block of the parent process, without a copy of the data.
+    The owning process creates and unlinks the block (`with SharedArray(array) as shared: ...`).
+    """
+    def __init__(self, array: np.ndarray):
+        """
+        :param array: Array, which is copied once into a new shared memory block
+        """
+        self.shape = array.shape
+        self.dtype = array.dtype
+        self._memory = shared_memory.SharedMemory(create=True, size=max(1, array.nbytes))
+        self._owner = True
+        self.array = np.ndarray(self.shape, dtype=self.dtype, buffer=self._memory.buf)
+        self.array[...] = array
+        self.array.flags.writeable = False
+
+    def __getstate__(self):
+        return {'name': self._memory.name, 'shape': self.shape, 'dtype': self.dtype}
+
+    def __setstate__(self, state):
+        self.shape = state['shape']
+        self.dtype = state['dtype']
+        self._memory = shared_memory.SharedMemory(name=state['name'])
+        self._owner = False
+        self.array = np.ndarray(self.shape, dtype=self.dtype, buffer=self._memory.buf)
+        self.array.flags.writeable = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        """
+        Detach from the memory block. The owner also frees the block.
+        """
+        self.array = None
+        self._memory.close()
+        if self._owner:
+            self._memory.unlink()
+
+
+def available_cores() -> int:
+    """
+    :return: The number of cores, which the process is allowed to run on
+    """
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:  # Not available on Windows and macOS
+        return os.cpu_count() or 1
+
+
+def negated_reconstruction_error(estimator: DROPP, data, y=None) -> float:
+    """
+    Scorer of the grid searches, which follows the rule of sklearn that higher scores are better.
+    It can be passed as `scoring` to the `GridSearchCV` of sklearn.
+    :param estimator: Fitted DROPP model
+    :param data: Data tensor (or matrix) of one trajectory, or a list of them
+    :param y: Ignored
+    :return: The negated reconstruction error (`DROPP.score`) of the data
+    """
+    return -estimator.score(data)
+
+
+def blas_threads_per_worker(n_workers: int) -> int:
+    """
+    Number of BLAS threads of a worker process, so that the workers together do not oversubscribe the cores.
+    :param n_workers: Number of worker processes
+    :return: At least one thread
+    """
+    return max(1, available_cores() // n_workers)
+
+
+class ParallelGridSearch:
+    """
+    Exhaustive search over the parameters of DROPP, which fits the candidates in a pool of processes.
+
+    The interface follows the `GridSearchCV` of sklearn (`fit`, `cv_results_`, `best_params_`), but the candidates are
+    created with `DROPP(**params)` and the best model is not refitted. The input (one trajectory or a list of
+    trajectories) is placed once into shared memory, instead of pickling it for every fit. Every worker limits
+    its BLAS threads to `blas_threads_per_worker`, and keeps a `StageCache` for the candidates it fits.
+    The candidates are scored with `negated_reconstruction_error`, so the candidate with the highest mean score
+    (lowest reconstruction error) has the rank 1, as in `GridSearchCV` with this scorer.
+    A fit, which fails with a numerical error, gets the score NaN (as the `error_score` of sklearn) and the last rank.
+    """
+    def __init__(self, param_grid, cv=None, n_jobs: int = -1, verbose: int = 0):
+        """
+        :param param_grid: Dictionary or list of dictionaries with the parameter names and the lists of their values
+        :param cv: Folds as in `GridSearchCV`: number of folds, splitter or list of (train, test) index pairs.
+            The folds of a list of trajectories are whole trajectories.
+        :param n_jobs: Number of worker processes, -1 uses all the available cores
+        :param verbose: Prints the number of fits, if positive
+        """
+        if n_jobs == 0 or n_jobs < -1:
+            raise ValueError(f'The number of jobs ({n_jobs}) has to be positive or -1.')
+        self.param_grid = param_grid
+        self.cv = cv
+        self.n_jobs = n_jobs
+        self.verbose = verbose
+
+    def fit(self, data, **fit_params):
+        """
+        Fit and score all the candidates on all the folds.
+        :param data: Data tensor (or matrix) of one trajectory, or a list of them
+        :param fit_params: Parameters of `DROPP.fit`, e.g. n_components
+        :return: self
+        """
+        candidates = list(ParameterGrid(self.param_grid))
+        folds = self._folds(data)
+        n_workers = self._n_workers(len(candidates) * len(folds))
+        if self.verbose > 0:
+            print(f'Fitting {len(folds)} folds for each of {len(candidates)} candidates, '
+                  f'totalling {len(candidates) * len(folds)} fits on {n_workers} processes')
+
+        with self._worker_pool(data, n_workers) as executor:
+            scores, fit_times = self._fit_and_score_candidates(executor, candidates, folds, fit_params)
+        self._set_results(candidates, scores, fit_times)
+        return self
+
+    def _folds(self, data) -> list[tuple]:
+        if isinstance(data, (list, tuple)):
+            return list(check_cv(self.cv).split(np.arange(len(data))))
+        else:
+            return list(check_cv(self.cv).split(data))
+
+    def _n_workers(self, n_tasks: int) -> int:
+        return max(1, min(available_cores() if self.n_jobs == -1 else self.n_jobs, n_tasks))
+
+    @contextmanager
+    def _worker_pool(self, data, n_workers: int):
+        is_trajectory_list = isinstance(data, (list, tuple))
+        shared_arrays = [SharedArray(np.asarray(array)) for array in (data if is_trajectory_list else [data])]
+        try:
+            with ProcessPoolExecutor(max_workers=n_workers, initializer=_init_worker,
+                                     initargs=(shared_arrays, is_trajectory_list,
+                                               blas_threads_per_worker(n_workers))) as executor:
+                yield executor
+        finally:
+            for shared_array in shared_arrays:
+                shared_array.close()
+
+    @staticmethod
+    def _fit_and_score_candidates(executor: ProcessPoolExecutor, candidates: list[dict], folds: list[tuple],
+                                  fit_params: dict, frame_subset: tuple = None) -> tuple[np.ndarray, np.ndarray]:
+        tasks = [(params, train, test, fit_params, frame_subset) for params in candidates for train, test in folds]
+        results = list(executor.map(_fit_and_score, *zip(*tasks)))
+        for (params, *_), (_, _, error) in zip(tasks, results):
+            if error is not None:
+                warnings.warn(f'Fitting the model `{params}` failed, the score is set to NaN:\n {error}')
+        scores = np.array([score for score, _, _ in results]).reshape(len(candidates), len(folds))
+        fit_times = np.array([fit_time for _, fit_time, _ in results]).reshape(len(candidates), len(folds))
+        return scores, fit_times
+
+    def _set_results(self, candidates: list[dict], scores: np.ndarray, fit_times: np.ndarray,
+                     ranking: np.ndarray = None, **columns):
+        mean_scores = scores.mean(axis=1)
+        if ranking is None:
+            ranking = self._ranking(mean_scores)
+        ranks = np.empty(len(candidates), dtype=int)
+        ranks[ranking] = np.arange(1, len(candidates) + 1)
+        self.cv_results_ = {
+            **columns,
+            'params': candidates,
+            'mean_fit_time': fit_times.mean(axis=1),
+            'std_fit_time': fit_times.std(axis=1),
+            **{f'split{fold}_test_score': scores[:, fold] for fold in range(scores.shape[1])},
+            'mean_test_score': mean_scores,
+            'std_test_score': scores.std(axis=1),
+            'rank_test_score': ranks,
+        }
+        self.best_index_ = ranking[0]
+        self.best_params_ = candidates[self.best_index_]
+        self.best_score_ = mean_scores[self.best_index_]
+
+    @staticmethod
+    def _ranking(mean_scores: np.ndarray) -> np.ndarray:
+        return np.argsort(-np.nan_to_num(mean_scores, nan=-np.inf), kind='stable')
+
+
+class SuccessiveHalvingSearch(ParallelGridSearch):
+    """
+    Successive halving over the parameters of DROPP, which fits the candidates on growing frame subsets.
+
+    All the candidates are scored first on a short subset of the frames, and only the best `1 / factor` of them
+    are promoted to the next iteration, which uses `factor` times more frames. The last iteration uses all the frames.
+    The number of iterations is limited by the candidates (until one is left) and by `min_frames`.
+    The frame subsets are the first frames (`HEAD_FRAMES`), which keeps the meaning of the lag time,
+    or every n-th frame (`STRIDED_FRAMES`) over the whole trajectory, which covers more of the sampled states,
+    but also stretches the lag time by the stride. The subsets of a list of trajectories are taken per trajectory.
+
+    The results have a row for each candidate in each iteration, with the additional columns `iter` and
+    `n_resources` (number of frames) as the `HalvingGridSearchCV` of sklearn. The candidates of later iterations are
+    ranked first, then by the mean score.
+    """
+    def __init__(self, param_grid, cv=None, n_jobs: int = -1, verbose: int = 0, factor: int = 3,
+                 min_frames: int = 1000, frame_subset: str = HEAD_FRAMES):
+        """
+        :param param_grid: Dictionary or list of dictionaries with the parameter names and the lists of their values
+        :param cv: Folds as in `GridSearchCV`, see `ParallelGridSearch`
+        :param n_jobs: Number of worker processes, -1 uses all the available cores
+        :param verbose: Prints the number of fits of each iteration, if positive
+        :param factor: Factor of the frames of consecutive iterations, the inverse of the promoted fraction
+        :param min_frames: Minimum number of frames of the first iteration
+        :param frame_subset: Subset of the frames, `HEAD_FRAMES` or `STRIDED_FRAMES`
+        """
+        super().__init__(param_grid, cv=cv, n_jobs=n_jobs, verbose=verbose)
+        if factor < 2:
+            raise ValueError(f'The factor ({factor}) has to be at least 2.')
+        if frame_subset not in [HEAD_FRAMES, STRIDED_FRAMES]:
+            raise ValueError(f'The frame subset `{frame_subset}` is not one of `{HEAD_FRAMES}`, `{STRIDED_FRAMES}`.')
+        self.factor = factor
+        self.min_frames = min_frames
+        self.frame_subset = frame_subset
+
+    def fit(self, data, **fit_params):
+        """
+        Fit and score the candidates, which are promoted to the iterations.
+        :param data: Data tensor (or matrix) of one trajectory, or a list of them
+        :param fit_params: Parameters of `DROPP.fit`, e.g. n_components
+        :return: self
+        """
+        candidates = list(ParameterGrid(self.param_grid))
+        folds = self._folds(data)
+        max_frames = max(len(trajectory) for trajectory in data) if isinstance(data, (list, tuple)) else len(data)
+        n_iterations = 1 + min(_floor_log(len(candidates), self.factor),
+                               _floor_log(max_frames / self.min_frames, self.factor))
+        n_workers = self._n_workers(len(candidates) * len(folds))
+
+        remaining = np.arange(len(candidates))
+        iterations = []
+        with self._worker_pool(data, n_workers) as executor:
+            for iteration in range(n_iterations):
+                n_frames = max_frames // self.factor ** (n_iterations - 1 - iteration)
+                if self.verbose > 0:
+                    print(f'Iteration {iteration}: fitting {len(folds)} folds for each of {len(remaining)} candidates '
+                          f'on {n_frames} frames on {n_workers} processes')
+                scores, fit_times = self._fit_and_score_candidates(
+                    executor, [candidates[index] for index in remaining], folds, fit_params,
+                    frame_subset=(self.frame_subset, n_frames))
+                iterations.append((remaining, n_frames, scores, fit_times))
+                promoted = self._ranking(scores.mean(axis=1))[:math.ceil(len(remaining) / self.factor)]
+                remaining = remaining[np.sort(promoted)]
+
+        scores = np.concatenate([scores for *_, scores, _ in iterations])
+        iteration_column = np.concatenate([np.full(len(indices), iteration)
+                                           for iteration, (indices, *_) in enumerate(iterations)])
+        self._set_results([candidates[index] for indices, *_ in iterations for index in indices], scores,
+                          np.concatenate([fit_times for *_, fit_times in iterations]),
+                          ranking=np.lexsort((-np.nan_to_num(scores.mean(axis=1), nan=-np.inf), -iteration_column)),
+                          iter=iteration_column,
+                          n_resources=np.concatenate([np.full(len(indices), n_frames)
+                                                      for indices, n_frames, *_ in iterations]))
+        self.n_iterations_ = n_iterations
+        return self
+
+
+def _floor_log(value: float, base: int) -> int:
+    """
+    :return: The largest integer k with base ** k <= value (at least 0)
+    """
+    exponent = 0
+    while base ** (exponent + 1) <= value:
+        exponent += 1
+    return exponent
+
+
+def _init_worker(shared_arrays: list[SharedArray], is_trajectory_list: bool, blas_threads: int):
+    _worker_state['shared_arrays'] = shared_arrays  # Keeps the memory blocks attached
+    _worker_state['data'] = ([shared_array.array for shared_array in shared_arrays] if is_trajectory_list
+                             else shared_arrays[0].array)
+    _worker_state['thread_limits'] = threadpool_limits(limits=blas_threads)
+    _worker_state['stage_cache'] = StageCache().__enter__()  # Active for the lifetime of the worker
+
+
+def _frame_subset(data, frame_subset: tuple):
+    if isinstance(data, list):
+        return [_frame_subset(trajectory, frame_subset) for trajectory in data]
+    subset_type, n_frames = frame_subset
+    if subset_type == STRIDED_FRAMES:
+        return data[::max(1, len(data) // n_frames)]
+    else:
+        return data[:n_frames]
+
+
+def _subset(data, indices):
+    if isinstance(data, list):
+        return data[indices] if isinstance(indices, slice) else [data[index] for index in indices]
+    else:
+        return data[indices]
+
+
+def _fit_and_score(params: dict, train, test, fit_params: dict, frame_subset: tuple = None):
+    train_data, test_data = (_subset(_worker_state['data'], indices) for indices in (train, test))
+    if frame_subset is not None:
+        train_data, test_data = _frame_subset(train_data, frame_subset), _frame_subset(test_data, frame_subset)
+    start = time.perf_counter()
+    try:
+        model = DROPP(**params).fit(train_data, **fit_params)
+        fit_time = time.perf_counter() - start
+        return negated_reconstruction_error(model, test_data), fit_time, None
+    except (np.linalg.LinAlgError, ValueError, RuntimeError) as e:
+        return np.nan, time.perf_counter() - start, repr(e)
@@ -19,14 +19,65 @@ def generate_independent_matrix(row, dimension):
     return matrix
 
 
-def basis_transform(matrix, dimension):
-    independent_matrix = generate_independent_matrix(dimension, dimension)
-    transformation_matrix = independent_matrix @ np.identity(dimension)
+def basis_transform(matrix, dimension, transformation_matrix=None):
+    """
+    Transforms the coordinates of a tensor into a random basis.
+    :param matrix: ndarray with the coordinates in the last dimension
+    :param dimension: Number of the coordinates
+    :param transformation_matrix: The transformation (e.g. to transform chunks of the same data the same way),
+        default: None -> a new one is drawn (see `basis_transformation_matrix`)
+    :return: The transformed tensor
+    """
+    if transformation_matrix is None:
+        transformation_matrix = basis_transformation_matrix(dimension)
     return np.einsum('tac,cc->tac', matrix, transformation_matrix)
 
 
-def explained_variance(eigenvalues, component):
-    return np.sum(eigenvalues[:component]) / np.sum(eigenvalues)
+def basis_transformation_matrix(dimension):
+    """
+    Draws a random transformation of a basis with `np.random`.
+    :param dimension: Number of the coordinates
+    :return: ndarray with the shape (dimension, dimension)
+    """
+    independent_matrix = generate_independent_matrix(dimension, dimension)
+    return independent_matrix @ np.identity(dimension)
+
+
+def explained_variance(eigenvalues, component, total=None):
+    """
+    Ratio of the variance of the first `component` eigenvalues to the total variance.
+    :param eigenvalues: Sorted eigenvalues
+    :param component: Number of used components
+    :param total: Total variance (e.g. the trace of the matrix) if the eigenvalues are not the full spectrum.
+        Default is None, the sum of the eigenvalues is used.
+    :return: explained variance ratio
+    """
+    if total is None:
+        total = np.sum(eigenvalues)
+    return np.sum(eigenvalues[:component]) / total
+
+
+def implied_timescales(eigenvalues, lag_time):
+    """
+    Implied timescales -lag_time / ln|eigenvalue| of the eigenvalues of a time lagged model (e.g. TICA).
+    :param eigenvalues: Eigenvalues of the model with the lag time
+    :param lag_time: Lag time of the model
+    :return: Implied timescales in the unit of the lag time (inf for an eigenvalue of 1,
+        negative for eigenvalues with an absolute value above 1 and nan for 0)
+    """
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return -lag_time / np.log(np.abs(eigenvalues))
+
+
+def centered_std(centered_data):
+    """
+    Standard deviation (ddof=0) over the first axis of data, which is already centered.
+    The squares are summed in float64 without a temporary copy of the data (as np.std needs).
+    :param centered_data: Data with zero mean over the first axis
+    :return: Standard deviation with the shape of a sample
+    """
+    sum_of_squares = np.einsum('t...,t...->...', centered_data, centered_data, dtype=np.float64)
+    return np.sqrt(sum_of_squares / centered_data.shape[0])
 
 
 def gaussian_kern_matrix(size, sig=1.):
@@ -1,6 +1,8 @@
 import numpy as np
+import scipy.linalg
 from numpy.linalg import LinAlgError
 from scipy.optimize import curve_fit
+from scipy.sparse.linalg import eigsh
 from sklearn.metrics import mean_squared_error
 from sklearn.model_selection import GridSearchCV, LeaveOneOut
 from sklearn.neighbors import KernelDensity
@@ -14,7 +16,9 @@ from utils.math import is_matrix_symmetric, exponential_2d, epanechnikov_2d, gau
 from utils.param_keys.analyses import PLOT_3D_MAP, WEIGHTED_DIAGONAL, FITTED_KERNEL_CURVES, KERNEL_COMPARE, \
     PLOT_KERNEL_MATRIX_3D
 from utils.param_keys.kernel_functions import *
+from utils.param_keys.model import FULL_SOLVER, SUBSET_SOLVER, LANCZOS_SOLVER
 from utils.timer import Timer
+from utils.toeplitz import ToeplitzMatrix, toeplitz_view
 
 kernel_funcs = {
     MY_EXPONENTIAL: exponential_2d,
@@ -58,7 +62,9 @@ def matrix_diagonals_calculation(matrix: np.ndarray, func: callable = np.sum, fu
     Calculate summary statistics along diagonals of a matrix.
 
     This function applies the specified summary function to each diagonal of the input matrix and returns an array
-    containing the calculated values.
+    containing the calculated values. The functions numpy.sum, numpy.mean, numpy.median, numpy.min and numpy.max
+    (without func_kwargs) are calculated for all the diagonals at once (see `diagonals_layout`),
+    other functions are called for each diagonal.
 
     Parameters
     ----------
@@ -80,6 +86,12 @@ def matrix_diagonals_calculation(matrix: np.ndarray, func: callable = np.sum, fu
     if func_kwargs is None:
         func_kwargs = {}
 
+    is_real = np.issubdtype(matrix.dtype, np.floating) or np.issubdtype(matrix.dtype, np.integer)
+    if not func_kwargs and matrix.size > 0 and is_real:
+        summary_values = _vectorized_diagonals_calculation(matrix, func)
+        if summary_values is not None:
+            return summary_values
+
     calculated_diagonals = []
     for diagonal_index in diagonal_indices(matrix):
         diagonal_values = np.diag(matrix, k=diagonal_index)
@@ -88,6 +100,81 @@ def matrix_diagonals_calculation(matrix: np.ndarray, func: callable = np.sum, fu
     return np.asarray(calculated_diagonals)
 
 
+def diagonals_layout(matrix: np.ndarray, fill_value=0) -> np.ndarray:
+    """
+    Arrange the diagonals of a matrix as the columns of a new array.
+
+    The row i of the (n, m) matrix is shifted by n - 1 - i columns into an array with the shape (n, n + m - 1),
+    so that the column d contains the diagonal with the index d - n + 1 (in the order of `diagonal_indices`).
+    The matrix is written through one strided view of the new array, without an index array.
+
+    Parameters
+    ----------
+    matrix : ndarray
+        The input matrix with the shape (n, m).
+    fill_value : scalar, optional
+        Value of the entries, which are not on the diagonal of their column. Default is 0.
+
+    Returns
+    -------
+    ndarray
+        An array with the shape (n, n + m - 1) and the diagonals in its columns.
+
+    """
+    n_rows, n_columns = matrix.shape
+    layout = np.full((n_rows, n_rows + n_columns - 1), fill_value, dtype=matrix.dtype)
+    shifted_rows = np.lib.stride_tricks.as_strided(
+        layout.reshape(-1)[n_rows - 1:],
+        shape=matrix.shape,
+        strides=((n_rows + n_columns - 2) * layout.itemsize, layout.itemsize)
+    )
+    shifted_rows[...] = matrix
+    return layout
+
+
+def _vectorized_diagonals_calculation(matrix: np.ndarray, func: callable):
+    """
+    Calculate the summary function for all the diagonals at once, if the function is known.
+    :param matrix: Numeric input matrix
+    :param func: Summary function
+    :return: The summary values of the diagonals, or None for another function
+    """
+    if func in [np.sum, np.mean]:
+        is_floating = np.issubdtype(matrix.dtype, np.floating)
+        summary_values = diagonals_layout(matrix).sum(axis=0, dtype=np.float64 if is_floating else None)
+        if func is np.mean:
+            summary_values = summary_values / _diagonal_lengths(matrix.shape)
+        return summary_values.astype(matrix.dtype, copy=False) if is_floating else summary_values
+
+    if func in [np.min, np.amin, np.max, np.amax, np.median]:
+        if np.issubdtype(matrix.dtype, np.floating):
+            if func is np.median and np.isnan(matrix).any():
+                return None  # The sorted NaN values would shift the medians
+            upper_bound = np.inf
+        else:
+            upper_bound = np.iinfo(matrix.dtype).max
+
+        if func in [np.max, np.amax]:
+            return diagonals_layout(matrix, -upper_bound if upper_bound == np.inf else
+                                    np.iinfo(matrix.dtype).min).max(axis=0)
+        if func in [np.min, np.amin]:
+            return diagonals_layout(matrix, upper_bound).min(axis=0)
+
+        sorted_diagonals = np.sort(diagonals_layout(matrix, upper_bound), axis=0)  # fill values at the end
+        lengths = _diagonal_lengths(matrix.shape)
+        columns = np.arange(sorted_diagonals.shape[1])
+        return (sorted_diagonals[(lengths - 1) // 2, columns] + sorted_diagonals[lengths // 2, columns]) / 2
+
+    return None
+
+
+def _diagonal_lengths(shape: tuple) -> np.ndarray:
+    n_rows, n_columns = shape
+    diagonals = np.arange(n_rows + n_columns - 1)
+    return np.minimum.reduce([diagonals + 1, n_rows + n_columns - 1 - diagonals,
+                              np.full_like(diagonals, min(n_rows, n_columns))])
+
+
 def expand_diagonals_to_matrix(matrix: np.ndarray, array: np.ndarray):
     """
     Expand values on the minor diagonals to their corresponding off-diagonals.
@@ -116,11 +203,8 @@ def expand_diagonals_to_matrix(matrix: np.ndarray, array: np.ndarray):
     -----
     - The function expects a square matrix and an array with a length equal to the number of diagonals in the matrix.
     - The values on the minor diagonals of the matrix are expanded to their corresponding off-diagonal positions.
-
-    References
-    ----------
-    - Stack Overflow: "Affect diagonal elements of matrix prior to 1.10"
-      https://stackoverflow.com/questions/27875931/numpy-affect-diagonal-elements-of-matrix-prior-to-1-10
+    - The result is the Toeplitz matrix of the array, which is copied from a strided view in O(n^2)
+      (see `toeplitz_view`).
 
     """
 
@@ -129,18 +213,13 @@ def expand_diagonals_to_matrix(matrix: np.ndarray, array: np.ndarray):
     if not array.ndim == 1:
         raise ValueError(f'Input should be an array, but it\'s n-dimension is: {array.ndim}')
 
-    new_matrix = np.zeros_like(matrix)
-    diag_indices = diagonal_indices(new_matrix)
+    diag_indices = diagonal_indices(matrix)
 
     if len(diag_indices) != len(array):
         raise ValueError(f"Input matrix should have as many diagonals ({len(diag_indices)}) "
                          f"as the length of the input array ({len(array)}).")
 
-    i, j = np.indices(new_matrix.shape)
-    for array_index, diagonal_index in enumerate(diag_indices):
-        new_matrix[i + diagonal_index == j] = array[array_index]
-
-    return new_matrix
+    return np.array(toeplitz_view(array, matrix.shape), dtype=matrix.dtype)
 
 
 def diagonal_block_expand(matrix, n_repeats):
@@ -167,7 +246,36 @@ def diagonal_block_expand(matrix, n_repeats):
       https://stackoverflow.com/questions/74054138/fastest-way-to-resize-a-numpy-matrix-in-diagonal-blocks
 
     """
-    return np.einsum('ij,kl->ikjl', matrix, np.eye(n_repeats)).reshape(len(matrix) * n_repeats, -1)
+    return np.einsum('ij,kl->ikjl', matrix, np.eye(n_repeats, dtype=matrix.dtype)).reshape(
+        len(matrix) * n_repeats, -1)
+
+
+def coordinate_block_expand(factors, coordinates, n_repeats):
+    """
+    Expand factor vectors with their coordinate indices to the columns of a block expanded matrix.
+
+    The column `j` of the result is the Kronecker product of `factors[:, j]` and the unit vector `e_c`
+    with `c = coordinates[j]`. This is the inverse of storing only the non-zero entries of the eigenvectors
+    of a `diagonal_block_expand` matrix.
+
+    Parameters
+    ----------
+    factors : ndarray
+        Factor vectors in the columns with shape (n_features, n_columns).
+    coordinates : ndarray
+        Integer coordinate index for each column with shape (n_columns,).
+    n_repeats : int
+        The size of the diagonal blocks.
+
+    Returns
+    -------
+    ndarray
+        The expanded matrix with shape (n_features * n_repeats, n_columns).
+
+    """
+    expanded = np.zeros((factors.shape[0], n_repeats, factors.shape[1]), dtype=factors.dtype)
+    expanded[:, coordinates, np.arange(factors.shape[1])] = factors
+    return expanded.reshape(factors.shape[0] * n_repeats, factors.shape[1])
 
 
 def calculate_symmetrical_kernel_matrix(
@@ -177,7 +285,8 @@ def calculate_symmetrical_kernel_matrix(
         analyse_mode: str = '',
         flattened: bool = False,
         use_original_data: bool = False,
-        **kwargs) -> np.ndarray:
+        as_toeplitz: bool = False,
+        **kwargs) -> [np.ndarray, ToeplitzMatrix]:
     """
     Create a symmetrical kernel matrix out of a symmetrical matrix.
 
@@ -196,10 +305,12 @@ def calculate_symmetrical_kernel_matrix(
         If True, permits discontinuous input values.
     use_original_data : bool, optional
         If True, uses only the original data without rescaling.
+    as_toeplitz : bool, optional
+        If True, returns the kernel matrix as a lazy `ToeplitzMatrix`, which stores only the fitted kernel curve.
 
     Returns
     -------
-    ndarray
+    ndarray or ToeplitzMatrix
         The kernel matrix.
     """
     if not is_matrix_symmetric(matrix):
@@ -234,7 +345,7 @@ def calculate_symmetrical_kernel_matrix(
             interp_range=[kernel_stat_func(original_ydata), np.max(original_ydata)]
         )
 
-    kernel_matrix = expand_diagonals_to_matrix(matrix, fit_y)
+    kernel_matrix = ToeplitzMatrix(fit_y, matrix.shape, dtype=matrix.dtype)
 
     if analyse_mode != '':
         if analyse_mode == KERNEL_COMPARE:
@@ -254,7 +365,7 @@ def calculate_symmetrical_kernel_matrix(
                 x_label='\nCarbon-Alpha Atom\nIndex',
                 y_label='\nCarbon-Alpha Atom\nIndex',
                 for_paper=True
-            ).matrix_plot(kernel_matrix, as_surface=PLOT_3D_MAP)
+            ).matrix_plot(kernel_matrix.toarray(), as_surface=PLOT_3D_MAP)
         elif analyse_mode == WEIGHTED_DIAGONAL:
             ArrayPlotter(
                 interactive=False,
@@ -269,7 +380,7 @@ def calculate_symmetrical_kernel_matrix(
                 y_label='Correlation Value',
                 for_paper=True
             ).plot_gauss2d(xdata, original_ydata, rescaled_ydata, fit_y, kernel_function, kernel_stat_func)
-    return kernel_matrix
+    return kernel_matrix if as_toeplitz else kernel_matrix.toarray()
 
 
 def get_fitted_y_curve(kernel_name: str, xdata: np.ndarray, ydata: np.ndarray, **kwargs):
@@ -310,8 +421,12 @@ def get_fitted_y_curve(kernel_name: str, xdata: np.ndarray, ydata: np.ndarray, *
       - For other kernel types, `_fit_y_curve` is used to generate the fitted y curve with specified fitting options.
       - For kernel names starting with MY_LINEAR, `_get_linear_fitted_y` is used to generate the fitted y curve.
     - The returned fitted y curve is based on the conditions and fitting process described above.
+    - The epanechnikov, gaussian and exponential curves are fitted with closed-form parameter estimates
+      (see `_fit_y_curve`). The option `ITERATIVE_KERNEL_FIT` set to True falls back to `curve_fit`
+      with the default initial parameters.
 
     """
+    iterative = kwargs.get(ITERATIVE_KERNEL_FIT, False)
     if USE_DENSITY_KERNEL in kwargs.keys() and kwargs[USE_DENSITY_KERNEL]:
         return _get_density_fitted_y(kernel_name, xdata, ydata)
     else:
@@ -320,9 +435,9 @@ def get_fitted_y_curve(kernel_name: str, xdata: np.ndarray, ydata: np.ndarray, *
 
         if kernel_name in kernel_funcs.keys():
             if kernel_name in [MY_EPANECHNIKOV, MY_COS, MY_SINC + '_center']:
-                return _get_y_fitted_on_positive_values(kernel_name, xdata, ydata)
+                return _get_y_fitted_on_positive_values(kernel_name, xdata, ydata, iterative)
             else:
-                return _fit_y_curve(kernel_name, xdata, ydata, maxfev=5000)
+                return _fit_y_curve(kernel_name, xdata, ydata, iterative, maxfev=5000)
         elif kernel_name.startswith(MY_LINEAR):
             return _get_linear_fitted_y(kernel_name, xdata)
         else:
@@ -330,7 +445,7 @@ def get_fitted_y_curve(kernel_name: str, xdata: np.ndarray, ydata: np.ndarray, *
                                     f'does not exist. Please choose a valid kernel.')
 
 
-def _get_y_fitted_on_positive_values(kernel_name, xdata, ydata):
+def _get_y_fitted_on_positive_values(kernel_name, xdata, ydata, iterative=False):
     """
     Generate a fitted y curve for the given kernel based on positive values.
 
@@ -346,6 +461,8 @@ def _get_y_fitted_on_positive_values(kernel_name, xdata, ydata):
         x data for fitting.
     ydata : ndarray
         (Rescaled) y data.
+    iterative : bool, optional
+        Fit with the default `curve_fit` (see `_fit_y_curve`). Default is False.
 
     Returns
     -------
@@ -364,15 +481,15 @@ def _get_y_fitted_on_positive_values(kernel_name, xdata, ydata):
     """
     non_zero_i = np.argmax(ydata > 0)  # first index which is above 0
     if (non_zero_i == 0 and kernel_name not in [MY_COS]) or (np.sum(ydata > 0) == 1):
-        return _fit_y_curve(kernel_name, xdata, ydata)
+        return _fit_y_curve(kernel_name, xdata, ydata, iterative)
     else:
         if kernel_name in [MY_COS]:
             magic_number = 6
             non_zero_i = (len(xdata) // magic_number) if len(xdata) > magic_number else 1
-        return _fit_y_on_positive_values_in_the_middle(kernel_name, xdata, ydata, non_zero_i)
+        return _fit_y_on_positive_values_in_the_middle(kernel_name, xdata, ydata, non_zero_i, iterative)
 
 
-def _fit_y_curve(kernel_name: str, xdata: np.ndarray, ydata: np.ndarray, **fit_kwargs):
+def _fit_y_curve(kernel_name: str, xdata: np.ndarray, ydata: np.ndarray, iterative: bool = False, **fit_kwargs):
     """
     Fit a curve for the specified kernel and generate the fitted y curve.
 
@@ -387,6 +504,8 @@ def _fit_y_curve(kernel_name: str, xdata: np.ndarray, ydata: np.ndarray, **fit_k
         x data for fitting.
     ydata : ndarray
         (Rescaled) y data.
+    iterative : bool, optional
+        Fit only with `curve_fit` from the given (or default) initial parameters. Default is False.
     fit_kwargs
         Additional keyword arguments to be passed to the curve fitting function.
 
@@ -395,12 +514,97 @@ def _fit_y_curve(kernel_name: str, xdata: np.ndarray, ydata: np.ndarray, **fit_k
     ndarray
         The fitted y curve generated using the calculated fit parameters.
 
+    Notes
+    -----
+    Unless `iterative` is set, the least squares parameters of the epanechnikov kernel are calculated in closed form
+    (see `_epanechnikov_parameters`), and the gaussian and exponential kernels start the iterations of `curve_fit`
+    from closed-form estimates (see `_initial_kernel_parameters`). If these iterations do not converge,
+    the fit is repeated from the given (or default) initial parameters.
+
     """
-    fit_parameters, _ = curve_fit(kernel_funcs[kernel_name], xdata, ydata, **fit_kwargs)
+    fit_parameters = None
+    if not iterative:
+        if kernel_name == MY_EPANECHNIKOV:
+            fit_parameters = _epanechnikov_parameters(xdata, ydata)
+        initial_parameters = _initial_kernel_parameters(kernel_name, xdata, ydata)
+        if fit_parameters is None and initial_parameters is not None:
+            try:
+                fit_parameters, _ = curve_fit(kernel_funcs[kernel_name], xdata, ydata,
+                                              **dict(fit_kwargs, p0=initial_parameters))
+            except RuntimeError:
+                pass
+
+    if fit_parameters is None:
+        fit_parameters, _ = curve_fit(kernel_funcs[kernel_name], xdata, ydata, **fit_kwargs)
     return kernel_funcs[kernel_name](xdata, *fit_parameters)
 
 
-def _fit_y_on_positive_values_in_the_middle(kernel_name, xdata, ydata, non_zero_i):
+def _epanechnikov_parameters(xdata: np.ndarray, ydata: np.ndarray) -> [tuple, None]:
+    """
+    Calculate the least squares parameter of the epanechnikov kernel 1 - x^2 / sigma^2 in closed form.
+    The kernel is linear in u = 1 / sigma^2, so the minimum of sum((1 - y - u x^2)^2) is at
+    u = sum(x^2 (1 - y)) / sum(x^4).
+    :param xdata: x data
+    :param ydata: y data
+    :return: The parameters (sigma,), or None if the minimum is not at a positive u
+    """
+    squared_x = np.power(xdata, 2.)
+    denominator = np.sum(np.power(squared_x, 2.))
+    if denominator == 0:
+        return None
+    inverse_squared_sigma = np.sum(squared_x * (1 - ydata)) / denominator
+    if not inverse_squared_sigma > 0:
+        return None
+    return (1 / np.sqrt(inverse_squared_sigma),)
+
+
+def _initial_kernel_parameters(kernel_name: str, xdata: np.ndarray, ydata: np.ndarray) -> [tuple, None]:
+    """
+    Estimate the initial parameters of the gaussian and exponential kernel fits from the y data.
+    The kernels have the value 1 at their center and 1/2 at the half width at half maximum h from the center,
+    so sigma = h / sqrt(2 ln 2) for the gaussian and sigma = sqrt(h / (2 ln 2)) for the exponential kernel.
+    The center mu of the gaussian kernel is the x value of the maximum.
+    The other (periodic) kernels keep their initial parameters, since their fits have many local minima.
+    :param kernel_name: Name of the kernel
+    :param xdata: x data
+    :param ydata: y data
+    :return: The initial parameters, or None to keep the given or default initial parameters
+    """
+    if kernel_name not in [MY_GAUSSIAN, MY_EXPONENTIAL]:
+        return None
+    half_width = _first_crossing_distance(xdata, ydata, 0.5)
+    if half_width is None:
+        return None
+    if kernel_name == MY_GAUSSIAN:
+        return xdata[np.argmax(ydata)], half_width / np.sqrt(2 * np.log(2))
+    return (np.sqrt(half_width / (2 * np.log(2))),)
+
+
+def _first_crossing_distance(xdata: np.ndarray, ydata: np.ndarray, level: float) -> [float, None]:
+    """
+    :param xdata: Ascending x data
+    :param ydata: y data
+    :param level: Value to cross
+    :return: The mean linearly interpolated distance from the maximum, at which the y data first falls below
+        the level on both sides, or None if the y data does not fall below the level on either side
+    """
+    peak_i = np.argmax(ydata)
+    distances = []
+    for side_x, side_y in [(xdata[peak_i:], ydata[peak_i:]), (xdata[peak_i::-1], ydata[peak_i::-1])]:
+        below = side_y <= level
+        if not np.any(below):
+            continue
+        crossing_i = np.argmax(below)
+        if crossing_i == 0:
+            continue
+        y_before, y_after = side_y[crossing_i - 1], side_y[crossing_i]
+        fraction = (y_before - level) / (y_before - y_after)
+        distances.append(abs(side_x[crossing_i - 1] - side_x[0]) + fraction * abs(side_x[crossing_i] -
+                                                                                    side_x[crossing_i - 1]))
+    return np.mean(distances) if distances else None
+
+
+def _fit_y_on_positive_values_in_the_middle(kernel_name, xdata, ydata, non_zero_i, iterative=False):
     """
     Fit a curve for the specified kernel in the region of positive values within the middle range.
 
@@ -418,6 +622,8 @@ def _fit_y_on_positive_values_in_the_middle(kernel_name, xdata, ydata, non_zero_
         y data for fitting.
     non_zero_i : int
         Index of the first non-zero value. Shouldn't be zero.
+    iterative : bool, optional
+        Fit with the default `curve_fit` (see `_fit_y_curve`). Default is False.
 
     Returns
     -------
@@ -434,7 +640,7 @@ def _fit_y_on_positive_values_in_the_middle(kernel_name, xdata, ydata, non_zero_
     p0 = (len(xdata) // 2) - non_zero_i if kernel_name in [MY_COS] else 1
     middle_fit_y = _fit_y_curve(kernel_name, xdata[non_zero_i:-non_zero_i],
                                 ydata[non_zero_i:-non_zero_i],
-                                p0=p0, maxfev=5000)
+                                iterative, p0=p0, maxfev=5000)
     if kernel_name not in [MY_COS]:
         middle_fit_y = np.where(middle_fit_y < 0, 0, middle_fit_y)
     fit_y = ydata
@@ -628,6 +834,499 @@ def ensure_matrix_symmetry(matrix):
     return 0.5 * (matrix + matrix.T)
 
 
+def accumulated_gram(a: np.ndarray, b: np.ndarray = None, block_size: int = 4096) -> np.ndarray:
+    """
+    Calculate the (batched) matrix product a^T b over the sample axis with a float64 accumulation.
+
+    Double precision input is multiplied with one matrix product. For lower precision input, the samples are
+    split into blocks of `block_size`, each block product is calculated in the input precision (fast GEMM)
+    and the block products are summed in float64. So the rounding error of a sum grows with the block size,
+    and not with the number of samples.
+
+    Parameters
+    ----------
+    a : ndarray
+        Data with shape (..., n_samples, n_features_a).
+    b : ndarray, optional
+        Data with shape (..., n_samples, n_features_b). Default is `a`.
+    block_size : int, optional
+        Number of samples of the block products in lower precision. Default is 4096.
+
+    Returns
+    -------
+    ndarray
+        The float64 product with shape (..., n_features_a, n_features_b).
+
+    """
+    b = a if b is None else b
+    if np.result_type(a, b) == np.float64:
+        return np.matmul(np.swapaxes(a, -1, -2), b)
+
+    gram = np.zeros(a.shape[:-2] + (a.shape[-1], b.shape[-1]), dtype=np.float64)
+    for start in range(0, a.shape[-2], block_size):
+        block = slice(start, start + block_size)
+        gram += np.matmul(np.swapaxes(a[..., block, :], -1, -2), b[..., block, :])
+    return gram
+
+
+def partial_eigh(matrix: np.ndarray, n_eigenpairs: int = None, b: np.ndarray = None, solver: str = FULL_SOLVER,
+                 by_magnitude: bool = False, eigvals_only: bool = False):
+    """
+    Calculate the largest eigenpairs of a symmetric (generalized) eigenvalue problem.
+
+    Instead of the full spectrum, only the `n_eigenpairs` largest eigenvalues (and eigenvectors) are calculated.
+
+    Parameters
+    ----------
+    matrix : ndarray
+        Symmetric input matrix `a` of the problem a v = w b v.
+    n_eigenpairs : int, optional
+        Number of the largest eigenpairs to calculate. Default is None (all eigenpairs).
+    b : ndarray, optional
+        Symmetric positive definite matrix of the generalized problem. Default is None (standard problem).
+    solver : str, optional
+        'full' calculates the full spectrum and truncates it,
+        'subset' uses the LAPACK routines for a subset of the eigenvalues (`subset_by_index`),
+        'lanczos' uses the iterative (implicitly restarted) Lanczos method of ARPACK. Default is 'full'.
+    by_magnitude : bool, optional
+        Select and sort the eigenvalues by their absolute value. Default is False.
+    eigvals_only : bool, optional
+        Calculate only the eigenvalues. Default is False.
+
+    Returns
+    -------
+    eigenvalues : ndarray
+        The largest eigenvalues in descending order (of their absolute value if `by_magnitude`).
+    eigenvectors : ndarray
+        The corresponding eigenvectors in the columns. Only returned if `eigvals_only` is False.
+
+    Raises
+    ------
+    ValueError
+        If the solver name is not valid.
+
+    Notes
+    -----
+    - The Lanczos method needs less eigenpairs than the size of the matrix minus one,
+      otherwise the subset solver is used.
+    - For the generalized problem `b` has to be positive definite, otherwise a LinAlgError is raised.
+      The Lanczos method solves the standard problem of the Cholesky whitened matrix.
+    - Selecting by magnitude with the subset solver calculates the eigenpairs on both ends of the spectrum.
+
+    """
+    if solver not in [FULL_SOLVER, SUBSET_SOLVER, LANCZOS_SOLVER]:
+        raise ValueError(f'Eigen solver `{solver}` does not exist. '
+                         f'Choose from: {[FULL_SOLVER, SUBSET_SOLVER, LANCZOS_SOLVER]}')
+
+    size = matrix.shape[0]
+    if n_eigenpairs is None or n_eigenpairs > size:
+        n_eigenpairs = size
+
+    if solver == LANCZOS_SOLVER and n_eigenpairs < size - 1:
+        if b is None:
+            result = eigsh(matrix, k=n_eigenpairs, which='LM' if by_magnitude else 'LA',
+                           return_eigenvectors=not eigvals_only)
+        else:
+            # Reduce to the standard problem L^-1 a L^-T with the Cholesky factor b = L L^T
+            cholesky_factor = scipy.linalg.cholesky(b, lower=True)
+            whitened = scipy.linalg.solve_triangular(cholesky_factor, matrix, lower=True)
+            whitened = scipy.linalg.solve_triangular(cholesky_factor, whitened.T, lower=True)
+            result = eigsh(ensure_matrix_symmetry(whitened), k=n_eigenpairs, which='LM' if by_magnitude else 'LA',
+                           return_eigenvectors=not eigvals_only)
+            if not eigvals_only:
+                result = result[0], scipy.linalg.solve_triangular(cholesky_factor.T, result[1], lower=False)
+    elif solver == FULL_SOLVER or n_eigenpairs == size or (by_magnitude and 2 * n_eigenpairs >= size):
+        result = scipy.linalg.eigh(matrix, b, eigvals_only=eigvals_only)
+    elif by_magnitude:
+        lower = scipy.linalg.eigh(matrix, b, eigvals_only=eigvals_only, subset_by_index=[0, n_eigenpairs - 1])
+        upper = scipy.linalg.eigh(matrix, b, eigvals_only=eigvals_only,
+                                  subset_by_index=[size - n_eigenpairs, size - 1])
+        if eigvals_only:
+            result = np.concatenate((lower, upper))
+        else:
+            result = np.concatenate((lower[0], upper[0])), np.concatenate((lower[1], upper[1]), axis=1)
+    else:
+        result = scipy.linalg.eigh(matrix, b, eigvals_only=eigvals_only,
+                                   subset_by_index=[size - n_eigenpairs, size - 1])
+
+    eigenvalues = result if eigvals_only else result[0]
+    sorted_indices = np.argsort(np.abs(eigenvalues) if by_magnitude else eigenvalues)[::-1][:n_eigenpairs]
+    if eigvals_only:
+        return eigenvalues[sorted_indices]
+    else:
+        return eigenvalues[sorted_indices], result[1][:, sorted_indices]
+
+
+def eigenvalue_sum(matrix: np.ndarray, b: np.ndarray = None, by_magnitude: bool = False) -> float:
+    """
+    Calculate the sum of the full spectrum of a symmetric (generalized) eigenvalue problem.
+
+    The sum of the eigenvalues is the trace of the problem, so it is known without the partial eigenpairs
+    of `partial_eigh`. The sum of the absolute eigenvalues equals the trace only for a positive definite
+    problem, which is checked with a Cholesky factorization. Otherwise, the negative eigenvalues are calculated
+    (without eigenvectors) and the sum is the trace minus two times their sum.
+
+    Parameters
+    ----------
+    matrix : ndarray
+        Symmetric input matrix `a` of the problem a v = w b v.
+    b : ndarray, optional
+        Symmetric positive definite matrix of the generalized problem. Default is None (standard problem).
+    by_magnitude : bool, optional
+        Sum the absolute values of the eigenvalues. Default is False.
+
+    Returns
+    -------
+    float
+        The sum of the (absolute) eigenvalues.
+
+    Raises
+    ------
+    LinAlgError
+        If `b` is not positive definite.
+
+    """
+    if b is not None:
+        # Standard problem L^-1 a L^-T with the Cholesky factor b = L L^T and the same eigenvalues
+        cholesky_factor = scipy.linalg.cholesky(b, lower=True)
+        matrix = scipy.linalg.solve_triangular(cholesky_factor, matrix, lower=True)
+        matrix = ensure_matrix_symmetry(scipy.linalg.solve_triangular(cholesky_factor, matrix.T, lower=True))
+    trace = np.trace(matrix)
+    if not by_magnitude:
+        return trace
+    try:
+        scipy.linalg.cholesky(matrix, lower=True, check_finite=False)
+        return trace
+    except LinAlgError:
+        negative_eigenvalues = scipy.linalg.eigh(matrix, eigvals_only=True, subset_by_value=(-np.inf, 0))
+        return trace - 2 * np.sum(negative_eigenvalues)
+
+
+def symmetric_toeplitz_eigh(first_column: np.ndarray, n_eigenpairs: int = None, solver: str = FULL_SOLVER,
+                            by_magnitude: bool = False, eigvals_only: bool = False):
+    """
+    Calculate the largest eigenpairs of a symmetric Toeplitz matrix, using its centrosymmetric structure.
+
+    A symmetric Toeplitz matrix T is also persymmetric (J T J = T, with the exchange matrix J), so each eigenvector
+    is either symmetric (J v = v) or skew-symmetric (J v = -v). With the blocks T = [[A, B], [J B J, J A J]]
+    of an even size, the symmetric eigenvectors [x, J x] / sqrt(2) are given by (A + B J) x = w x
+    and the skew-symmetric eigenvectors [x, -J x] / sqrt(2) by (A - B J) x = w x.
+    An odd size adds the middle row and column to the symmetric problem.
+    The two problems of half the size are solved with `partial_eigh`, which needs about a quarter of the
+    floating point operations of the full problem.
+
+    Parameters
+    ----------
+    first_column : ndarray
+        First column of the symmetric Toeplitz matrix (the values of its lower diagonals).
+    n_eigenpairs : int, optional
+        Number of the largest eigenpairs to calculate. Default is None (all eigenpairs).
+    solver : str, optional
+        Solver of the two half problems, see `partial_eigh`. Default is 'full'.
+    by_magnitude : bool, optional
+        Select and sort the eigenvalues by their absolute value. Default is False.
+    eigvals_only : bool, optional
+        Calculate only the eigenvalues. Default is False.
+
+    Returns
+    -------
+    eigenvalues : ndarray
+        The largest eigenvalues in descending order (of their absolute value if `by_magnitude`).
+    eigenvectors : ndarray
+        The corresponding eigenvectors in the columns. Only returned if `eigvals_only` is False.
+
+    References
+    ----------
+    - Cantoni, Butler (1976): "Eigenvalues and Eigenvectors of Symmetric Centrosymmetric Matrices",
+      Linear Algebra and its Applications 13(3).
+
+    """
+    size = len(first_column)
+    if n_eigenpairs is None or n_eigenpairs > size:
+        n_eigenpairs = size
+    if size < 2:
+        return partial_eigh(first_column.reshape(size, size), n_eigenpairs, solver=solver,
+                            by_magnitude=by_magnitude, eigvals_only=eigvals_only)
+
+    matrix = toeplitz_view(np.concatenate((first_column[:0:-1], first_column)), (size, size))
+    half = size // 2
+    upper_left = matrix[:half, :half]
+    reflected_upper_right = matrix[:half, size - half:][:, ::-1]  # B J
+    symmetric_problem = matrix[:size - half, :size - half].copy()  # with the middle row and column for odd sizes
+    symmetric_problem[:half, :half] += reflected_upper_right
+    symmetric_problem[half:, :half] *= np.sqrt(2)
+    symmetric_problem[:half, half:] *= np.sqrt(2)
+    problems = [symmetric_problem, upper_left - reflected_upper_right]
+
+    results = [partial_eigh(problem, min(n_eigenpairs, len(problem)), solver=solver, by_magnitude=by_magnitude,
+                            eigvals_only=eigvals_only) for problem in problems]
+    eigenvalues = np.concatenate([result if eigvals_only else result[0] for result in results])
+    sorted_indices = np.argsort(np.abs(eigenvalues) if by_magnitude else eigenvalues, kind='stable')[::-1]
+    sorted_indices = sorted_indices[:n_eigenpairs]
+    if eigvals_only:
+        return eigenvalues[sorted_indices]
+
+    (symmetric_values, symmetric_vectors), (_, skew_vectors) = results
+    eigenvectors = np.zeros((size, len(eigenvalues)), dtype=symmetric_vectors.dtype)
+    is_skew = np.arange(len(eigenvalues)) >= len(symmetric_values)
+    eigenvectors[:half, ~is_skew] = symmetric_vectors[:half] / np.sqrt(2)
+    eigenvectors[size - half:, ~is_skew] = symmetric_vectors[half - 1::-1] / np.sqrt(2)
+    eigenvectors[half:size - half, ~is_skew] = symmetric_vectors[half:]
+    eigenvectors[:half, is_skew] = skew_vectors / np.sqrt(2)
+    eigenvectors[size - half:, is_skew] = -skew_vectors[::-1] / np.sqrt(2)
+    return eigenvalues[sorted_indices], eigenvectors[:, sorted_indices]
+
+
+def matrix_bandwidth(matrix: np.ndarray) -> int:
+    """
+    Calculate the (half) bandwidth of a symmetric matrix, the largest distance of a non-zero entry to the diagonal.
+
+    Compact support kernels (e.g. 'my_epanechnikov' or profiles with extinct side values) are zero on all the
+    diagonals farther away from the main diagonal than their support.
+
+    Parameters
+    ----------
+    matrix : ndarray
+        Symmetric input matrix.
+
+    Returns
+    -------
+    int
+        The largest |i - j| of the non-zero entries (i, j), or 0 for a diagonal or zero matrix.
+
+    """
+    if matrix.size == 0:
+        return 0
+    non_zero = np.asarray(matrix) != 0
+    first_columns = np.argmax(non_zero, axis=1)  # first non-zero entry of each row
+    rows = np.arange(len(matrix))
+    has_non_zero = non_zero[rows, first_columns]
+    if not np.any(has_non_zero):
+        return 0
+    return int(max(0, np.max((rows - first_columns)[has_non_zero])))
+
+
+def banded_storage(matrix: np.ndarray, bandwidth: int) -> np.ndarray:
+    """
+    Store the lower band of a symmetric matrix in the LAPACK lower banded form of `scipy.linalg.eig_banded`.
+
+    Parameters
+    ----------
+    matrix : ndarray
+        Symmetric input matrix with the shape (n, n).
+    bandwidth : int
+        Number of the stored lower diagonals (see `matrix_bandwidth`).
+
+    Returns
+    -------
+    ndarray
+        Banded matrix with the shape (bandwidth + 1, n), with `band[k, j] = matrix[j + k, j]`.
+
+    """
+    size = len(matrix)
+    band = np.zeros((bandwidth + 1, size), dtype=matrix.dtype)
+    for k in range(min(bandwidth + 1, size)):
+        band[k, :size - k] = np.diagonal(matrix, -k)
+    return band
+
+
+def banded_eigh(band: np.ndarray, n_eigenpairs: int = None, by_magnitude: bool = False,
+                eigvals_only: bool = False):
+    """
+    Calculate the largest eigenpairs of a symmetric banded matrix, stored in the lower banded form.
+
+    The eigenvalues are calculated with the LAPACK routines of `scipy.linalg.eig_banded`, which reduce the band
+    to a tridiagonal matrix in O(n^2 b) instead of O(n^3) operations. The eigenvectors of a partial spectrum are
+    calculated by inverse iteration with the LU factorization of the band (see `_banded_inverse_iteration`),
+    since the back-transformation of the LAPACK routines costs as much as the dense solver.
+
+    Parameters
+    ----------
+    band : ndarray
+        Lower banded matrix with the shape (bandwidth + 1, n) (see `banded_storage`).
+    n_eigenpairs : int, optional
+        Number of the largest eigenpairs to calculate. Default is None (all eigenpairs).
+    by_magnitude : bool, optional
+        Select and sort the eigenvalues by their absolute value. Default is False.
+    eigvals_only : bool, optional
+        Calculate only the eigenvalues. Default is False.
+
+    Returns
+    -------
+    eigenvalues : ndarray
+        The largest eigenvalues in descending order (of their absolute value if `by_magnitude`).
+    eigenvectors : ndarray
+        The corresponding eigenvectors in the columns. Only returned if `eigvals_only` is False.
+
+    """
+    size = band.shape[1]
+    if n_eigenpairs is None or n_eigenpairs > size:
+        n_eigenpairs = size
+
+    is_full_spectrum = n_eigenpairs == size or (by_magnitude and 2 * n_eigenpairs >= size)
+    if is_full_spectrum:
+        result = scipy.linalg.eig_banded(band, lower=True, eigvals_only=eigvals_only, check_finite=False)
+        eigenvalues = result if eigvals_only else result[0]
+    else:
+        select_ranges = [(size - n_eigenpairs, size - 1)]
+        if by_magnitude:
+            select_ranges.insert(0, (0, n_eigenpairs - 1))
+        eigenvalues = np.concatenate([
+            scipy.linalg.eig_banded(band, lower=True, eigvals_only=True, select='i', select_range=select_range,
+                                    check_finite=False)
+            for select_range in select_ranges
+        ])
+
+    sorted_indices = np.argsort(np.abs(eigenvalues) if by_magnitude else eigenvalues)[::-1][:n_eigenpairs]
+    eigenvalues = eigenvalues[sorted_indices]
+    if eigvals_only:
+        return eigenvalues
+    elif is_full_spectrum:
+        return eigenvalues, result[1][:, sorted_indices]
+    else:
+        return eigenvalues, _banded_inverse_iteration(band, eigenvalues)
+
+
+def banded_eigenvalue_sum(band: np.ndarray, by_magnitude: bool = False) -> float:
+    """
+    Calculate the sum of the full spectrum of a symmetric banded matrix, stored in the lower banded form.
+
+    The banded counterpart of `eigenvalue_sum`, with the banded Cholesky factorization and eigensolver.
+
+    Parameters
+    ----------
+    band : ndarray
+        Banded matrix with the shape (bandwidth + 1, n) (see `banded_storage`).
+    by_magnitude : bool, optional
+        Sum the absolute values of the eigenvalues. Default is False.
+
+    Returns
+    -------
+    float
+        The sum of the (absolute) eigenvalues.
+
+    """
+    trace = np.sum(band[0])
+    if not by_magnitude:
+        return trace
+    try:
+        scipy.linalg.cholesky_banded(band, lower=True, check_finite=False)
+        return trace
+    except LinAlgError:
+        negative_eigenvalues = scipy.linalg.eig_banded(band, lower=True, eigvals_only=True, select='v',
+                                                       select_range=(-np.inf, 0))
+        return trace - 2 * np.sum(negative_eigenvalues)
+
+
+def _banded_inverse_iteration(band: np.ndarray, eigenvalues: np.ndarray, n_iterations: int = 3,
+                              cluster_tolerance: float = 1e-3) -> np.ndarray:
+    """
+    Calculate the eigenvectors of known eigenvalues of a symmetric banded matrix by inverse iteration.
+
+    Each iteration solves the banded system (A - w I) x = v in O(n b^2). As in the LAPACK routine `stein`,
+    the eigenvectors of clustered eigenvalues are orthogonalized against each other in each iteration.
+
+    Parameters
+    ----------
+    band : ndarray
+        Lower banded matrix with the shape (bandwidth + 1, n).
+    eigenvalues : ndarray
+        Eigenvalues of the matrix.
+    n_iterations : int, optional
+        Number of inverse iterations. Default is 3.
+    cluster_tolerance : float, optional
+        Eigenvalues closer than this fraction of the largest absolute eigenvalue belong to the same cluster.
+        Default is 1e-3.
+
+    Returns
+    -------
+    ndarray
+        Normalized eigenvectors in the columns.
+
+    """
+    bandwidth, size = len(band) - 1, band.shape[1]
+    full_band = np.zeros((2 * bandwidth + 1, size), dtype=band.dtype)  # upper and lower band of `solve_banded`
+    full_band[bandwidth:] = band
+    for k in range(1, bandwidth + 1):
+        full_band[bandwidth - k, k:] = band[k, :size - k]
+
+    scale = max(np.max(np.abs(eigenvalues), initial=0), np.finfo(band.dtype).tiny)
+    perturbation = np.finfo(band.dtype).eps * scale  # keeps the shifted system from being exactly singular
+    random_state = np.random.default_rng(0)
+    eigenvectors = np.empty((size, len(eigenvalues)), dtype=band.dtype)
+    for i, eigenvalue in enumerate(eigenvalues):
+        shifted_band = full_band.copy()
+        shifted_band[bandwidth] -= eigenvalue + perturbation
+        cluster = eigenvectors[:, :i][:, np.abs(eigenvalues[:i] - eigenvalue) < cluster_tolerance * scale]
+        vector = random_state.standard_normal(size).astype(band.dtype)
+        for _ in range(n_iterations):
+            vector = scipy.linalg.solve_banded((bandwidth, bandwidth), shifted_band, vector, check_finite=False)
+            vector -= cluster @ (cluster.T @ vector)
+            vector /= np.linalg.norm(vector)
+        eigenvectors[:, i] = vector
+    return eigenvectors
+
+
+def randomized_eigh(operator, n_eigenpairs: int, n_oversamples: int = 10, n_power_iterations: int = 4,
+                    random_state=None):
+    """
+    Calculate the largest eigenpairs of a symmetric positive semi-definite operator with a randomized range finder.
+
+    The operator is only accessed by matrix products, so the matrix does not have to be materialized.
+    The range of the operator is approximated by an orthonormal basis Q of the products with a random matrix,
+    refined with power iterations, and the eigenvalue problem of the small matrix Q^T A Q is solved.
+
+    Parameters
+    ----------
+    operator : scipy.sparse.linalg.LinearOperator or ndarray
+        Symmetric positive semi-definite operator with shape (n, n), which supports matrix products `operator @ x`.
+    n_eigenpairs : int
+        Number of the largest eigenpairs to calculate.
+    n_oversamples : int, optional
+        Number of additional random vectors to improve the approximation of the range. Default is 10.
+    n_power_iterations : int, optional
+        Number of power iterations to improve the approximation for slowly decaying spectra. Default is 4.
+    random_state : int or np.random.RandomState, optional
+        Seed or random state of the random matrix. Default is None.
+
+    Returns
+    -------
+    eigenvalues : ndarray
+        The largest eigenvalues in descending order.
+    eigenvectors : ndarray
+        The corresponding (approximated) eigenvectors in the columns.
+    residuals : ndarray
+        Relative residual norm ||A v - w v|| / max(|w|, tiny) of each eigenpair as approximation error.
+
+    References
+    ----------
+    - Halko, Martinsson, Tropp (2011): "Finding Structure with Randomness: Probabilistic Algorithms for
+      Constructing Approximate Matrix Decompositions", SIAM Review 53(2), Algorithm 4.4 and 5.3.
+
+    """
+    size = operator.shape[0]
+    n_eigenpairs = min(n_eigenpairs, size)
+    n_samples = min(n_eigenpairs + n_oversamples, size)
+    if not isinstance(random_state, np.random.RandomState):
+        random_state = np.random.RandomState(random_state)
+
+    basis, _ = np.linalg.qr(operator @ random_state.standard_normal((size, n_samples)))
+    for _ in range(n_power_iterations):
+        basis, _ = np.linalg.qr(operator @ basis)
+
+    operator_basis = operator @ basis
+    eigenvalues, small_eigenvectors = np.linalg.eigh(ensure_matrix_symmetry(basis.T @ operator_basis))
+    sorted_indices = np.argsort(eigenvalues)[::-1][:n_eigenpairs]
+    eigenvalues, small_eigenvectors = eigenvalues[sorted_indices], small_eigenvectors[:, sorted_indices]
+
+    # A V = (A Q) U, so the residuals need no further product with the operator
+    residual_matrix = operator_basis @ small_eigenvectors - basis @ small_eigenvectors * eigenvalues
+    # Zero eigenvalues of rank deficient operators are scaled by a tiny value relative to the largest eigenvalue
+    scale = np.finfo(residual_matrix.dtype).tiny * max(np.max(np.abs(eigenvalues), initial=0), 1.0)
+    residuals = np.linalg.norm(residual_matrix, axis=0) / np.maximum(np.abs(eigenvalues), scale)
+    return eigenvalues, basis @ small_eigenvectors, residuals
+
+
 def reconstruct_matrix(projection, eigenvectors, dim, mean, std=1):
     """
     Reconstructs a matrix from a given projection and eigenvectors.
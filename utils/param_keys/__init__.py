@@ -15,12 +15,15 @@ INTERACTIVE = 'interactive'
 PLOT_FOR_PAPER = 'plot_for_paper'
 # Fitting params
 N_COMPONENTS = 'n_components'
+OUT = 'out'
+N_JOBS = 'n_jobs'
 # Preprocessing params
 BASIS_TRANSFORMATION = 'basis_transformation'
 CARBON_ATOMS_ONLY = 'carbon_atoms_only'
 RANDOM_SEED = 'random_seed'
 USE_ANGLES = 'use_angles'
 SUPERPOSING_INDEX = 'superposing_index'
+CHUNK_SIZE = 'chunk_size'
 MAIN_MODEL_PARAMS = 'main_model_params'
 SEL_COL = 'selected_columns'
 # Subset Trajectory params
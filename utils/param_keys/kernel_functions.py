@@ -23,4 +23,5 @@ KERNEL_MULTIPLICATION = 'multi'
 # Kernel additions
 DIAGONAL_SUMMARY_FUNCTION = 'diagonal_summary_function'
 USE_DENSITY_KERNEL = 'use_density_kernel'
+ITERATIVE_KERNEL_FIT = 'iterative_kernel_fit'
 MY = 'my_'
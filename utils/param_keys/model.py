@@ -16,4 +16,18 @@ EXTRA_LAYER_ON_PROJECTION = 'extra_layer_on_projection'
 ABS_EVAL_SORT = 'abs_eigenvalue_sorting'
 USE_STD = 'use_std'
 CENTER_OVER_TIME = 'center_over_time'
+USE_KRONECKER_STRUCTURE = 'use_kronecker_structure'
 USE_ORIGINAL_DATA = 'use_original_data'
+SOLVER = 'solver'
+N_OVERSAMPLES = 'n_oversamples'
+N_POWER_ITERATIONS = 'n_power_iterations'
+RANDOM_STATE = 'random_state'
+DTYPE = 'dtype'
+COPY = 'copy'
+REGULARIZATION = 'regularization'
+
+# Eigen solvers
+FULL_SOLVER = 'full'
+SUBSET_SOLVER = 'subset'
+LANCZOS_SOLVER = 'lanczos'
+RANDOMIZED_SOLVER = 'randomized'
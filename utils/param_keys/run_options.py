@@ -6,6 +6,7 @@ PLOT_KERNELS = 'plot_kernels'
 COMPARE_WITH_CA_ATOMS = 'compare_with_carbon_alpha_atoms'
 BASE_TRANSFORMATION = 'base_transformation'
 PARAMETER_GRID_SEARCH = 'parameter_grid_search'
+HALVING_GRID_SEARCH = 'halving_parameter_grid_search'
 
 # Sub-trajectory
 TRAJECTORY_SUBSET_ANALYSIS = 'trajectory_subset_analysis'
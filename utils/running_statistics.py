@@ -0,0 +1,256 @@
+import numpy as np
+import scipy.fft
+
+from utils.matrix_tools import accumulated_gram
+from utils.param_keys import MATRIX_NDIM
+from utils.param_keys.traj_dims import TIME_DIM, COMBINED_DIM
+
+# The FFT of the time lagged products is used for more than FFT_COST_FACTOR * log2(n_fft) lag times.
+# Measured on one core, the FFT of all the lag times took as long as the matrix products of about 100 lag times
+# for 5000 samples with 30 features (8 * log2(n_fft)), 200 for (10000, 60) and 380 for (20000, 100) (27 * log2(n_fft)).
+# The FFT transforms all the n_fft lags of all the feature pairs, so the typical sweeps of the implied timescales
+# (tens of lag times) are faster with one BLAS matrix product per lag time.
+FFT_COST_FACTOR = 20
+
+
+class RunningTensorStatistics:
+    """
+    Sufficient statistics of a data tensor, which is accumulated chunk by chunk.
+
+    The statistics are calculated separately for each layer of the combined dimension of a tensor
+    (n_samples, feature_dim, combine_dim). Matrix data (n_samples, feature_dim) is handled as one layer.
+    The means and co-moments are merged with the pairwise update of Chan et al., which is numerically stable
+    also for a large number of samples. The statistics are accumulated in float64, also for float32 chunks
+    (as the coordinates of mdtraj). For a lag time, the time lagged pairs (x_t, x_{t+lag_time})
+    are accumulated over the chunk borders, using a buffer of the last `lag_time` samples.
+    The statistics of several trajectories are pooled by starting each trajectory with `new_trajectory`,
+    then the time lagged pairs never span the border between two trajectories.
+
+    References
+    ----------
+    - Chan, Golub, LeVeque (1979): "Updating Formulae and a Pairwise Algorithm for Computing Sample Variances"
+    - Wikipedia: "Algorithms for calculating variance", Parallel algorithm and Covariance
+      https://en.wikipedia.org/wiki/Algorithms_for_calculating_variance
+    """
+    def __init__(self, lag_time: int = 0):
+        self.lag_time = lag_time
+        self.n_samples = 0
+        self._mean = None
+        self._comoment = None
+        self._ndim = None
+        self._tail = None
+        self.n_pairs = 0
+        self._pair_means = None
+        self._pair_comoments = None
+
+    @property
+    def shape(self) -> tuple:
+        """
+        Shape of the accumulated data, as if all the chunks were concatenated along the time dimension.
+        """
+        return (self.n_samples,) + self.mean.shape
+
+    @property
+    def mean(self) -> np.ndarray:
+        """
+        Mean of the samples with shape (feature_dim, combine_dim) or (feature_dim,), as np.mean(axis=0).
+        """
+        return self._to_data_shape(self._mean)
+
+    def update(self, chunk: np.ndarray, new_trajectory: bool = False):
+        """
+        Add the samples of a chunk to the statistics.
+        :param chunk: Data tensor (n_samples, feature_dim, combine_dim) or matrix (n_samples, feature_dim),
+            with the same feature dimensions as the previous chunks.
+        :param new_trajectory: The chunk is the start of another trajectory,
+            so no time lagged pairs are built with the samples of the previous chunks.
+        :return: self
+        """
+        if self._ndim is None:
+            self._ndim = chunk.ndim
+        elif chunk.ndim != self._ndim:
+            raise ValueError(f'The chunk has {chunk.ndim} dimensions, but the previous chunks had {self._ndim}.')
+
+        if chunk.ndim == MATRIX_NDIM:
+            chunk = chunk[:, :, np.newaxis]
+
+        self.n_samples, self._mean, self._comoment = self._merge(
+            (self.n_samples, self._mean, self._comoment), self._chunk_statistics(chunk, chunk))
+
+        if new_trajectory:
+            self._tail = None
+
+        if self.lag_time > 0:
+            buffer = chunk if self._tail is None else np.concatenate((self._tail, chunk), axis=TIME_DIM)
+            if buffer.shape[TIME_DIM] > self.lag_time:
+                self.n_pairs, self._pair_means, self._pair_comoments = self._merge(
+                    (self.n_pairs, self._pair_means, self._pair_comoments),
+                    self._chunk_statistics(buffer[:-self.lag_time], buffer[self.lag_time:]))
+            self._tail = buffer[-self.lag_time:]
+        return self
+
+    @classmethod
+    def for_lag_times(cls, data: np.ndarray, lag_times: list, fft_cost_factor: float = FFT_COST_FACTOR) -> list:
+        """
+        Calculate the statistics of the whole data for several lag times in one pass.
+        The time lagged products sum_t x_t x_{t+lag_time}^T of many lag times are calculated together
+        with the FFT of the centered data (cross-correlation theorem), instead of one matrix product per lag time.
+        The products without lag of the time lagged pairs are the products of all the samples minus the ones
+        of the last `lag_time` samples.
+        :param data: Data tensor (n_samples, feature_dim, combine_dim) or matrix (n_samples, feature_dim)
+        :param lag_times: Positive lag times, smaller than n_samples - 1
+        :param fft_cost_factor: Relative cost of the FFT (see `FFT_COST_FACTOR`),
+            0 always uses the FFT and np.inf never
+        :return: List with the statistics of each lag time, equal to `update` with the whole data
+        """
+        lag_times = [int(lag_time) for lag_time in lag_times]
+        n_samples = data.shape[TIME_DIM]
+        if len(lag_times) == 0 or min(lag_times) < 1 or max(lag_times) >= n_samples - 1:
+            raise ValueError(f'The lag times {lag_times} have to be positive and smaller than {n_samples - 1}.')
+
+        ndim = data.ndim
+        tensor = data[:, :, np.newaxis] if ndim == MATRIX_NDIM else data
+        mean = np.mean(tensor, axis=TIME_DIM, dtype=np.float64)
+        # Centered layers (combine_dim, n_samples, feature_dim)
+        layers = np.ascontiguousarray(np.moveaxis(tensor - mean, COMBINED_DIM, 0))
+        comoment = accumulated_gram(layers)
+        lagged_products = cls._lagged_products(layers, lag_times, fft_cost_factor)
+
+        tail_products = np.zeros_like(comoment)
+        tail_start = n_samples
+        statistics = {}
+        for lag_time in sorted(set(lag_times)):
+            tail_products += accumulated_gram(layers[:, n_samples - lag_time:tail_start])
+            tail_start = n_samples - lag_time
+            n_pairs = n_samples - lag_time
+            # Deviations of the means of the pairs (x_t, x_{t+lag_time}) from the mean of all the samples
+            delta_a = np.sum(layers[:, :-lag_time], axis=1).T / n_pairs
+            delta_b = np.sum(layers[:, lag_time:], axis=1).T / n_pairs
+            lag_statistics = cls(lag_time)
+            lag_statistics.n_samples, lag_statistics._mean, lag_statistics._comoment = n_samples, mean, comoment
+            lag_statistics._ndim, lag_statistics._tail = ndim, tensor[-lag_time:]
+            lag_statistics.n_pairs = n_pairs
+            lag_statistics._pair_means = np.asarray([mean + delta_a, mean + delta_b])
+            lag_statistics._pair_comoments = np.asarray([
+                comoment - tail_products - n_pairs * np.einsum('fc,gc->cfg', delta_a, delta_a),
+                lagged_products[lag_times.index(lag_time)] - n_pairs * np.einsum('fc,gc->cfg', delta_a, delta_b)])
+            statistics[lag_time] = lag_statistics
+        return [statistics[lag_time] for lag_time in lag_times]
+
+    @staticmethod
+    def _lagged_products(layers: np.ndarray, lag_times: list,
+                         fft_cost_factor: float = FFT_COST_FACTOR) -> np.ndarray:
+        """
+        Calculate the time lagged products sum_t x_t x_{t+lag_time}^T of each layer for all the lag times.
+        The cost of the FFT does not depend on the number of lag times, but it is about fft_cost_factor * log2(n_fft)
+        times the cost of the (BLAS) matrix products of one lag time. So the FFT is only used for more lag times,
+        e.g. for the implied timescales of all the lag times in a range. Then the FFT of the zero padded layers
+        is calculated once, and the cross-correlations of one feature with all the features are transformed back
+        in each step.
+        :param layers: Data layers (combine_dim, n_samples, feature_dim)
+        :param lag_times: Lag times, smaller than n_samples
+        :param fft_cost_factor: Relative cost of the FFT per log2(n_fft) (see `FFT_COST_FACTOR`)
+        :return: Time lagged products with shape (n_lag_times, combine_dim, feature_dim, feature_dim)
+        """
+        combine_dim, n_samples, feature_dim = layers.shape
+        # Zero padding to avoid the circular overlap of the cross-correlation up to the largest lag time
+        n_fft = scipy.fft.next_fast_len(n_samples + max(lag_times), real=True)
+        if len(lag_times) <= fft_cost_factor * np.log2(n_fft):
+            return np.asarray([accumulated_gram(layers[:, :-lag_time], layers[:, lag_time:])
+                               for lag_time in lag_times])
+
+        spectra = scipy.fft.rfft(layers, n=n_fft, axis=1)
+        lagged_products = np.empty((len(lag_times), combine_dim, feature_dim, feature_dim))
+        for feature in range(feature_dim):
+            cross_correlations = scipy.fft.irfft(np.conj(spectra[:, :, feature, np.newaxis]) * spectra,
+                                                 n=n_fft, axis=1)
+            lagged_products[:, :, feature, :] = np.moveaxis(cross_correlations[:, lag_times, :], 1, 0)
+        return lagged_products
+
+    @staticmethod
+    def _chunk_statistics(chunk_a: np.ndarray, chunk_b: np.ndarray) -> tuple:
+        """
+        Calculate the statistics of the samples of one chunk.
+        :return: (n_samples, means, co-moments), with the co-moments sum_t (a_t - mean_a) (b_t - mean_b)^T
+            of each combined dimension (combine_dim, feature_dim, feature_dim).
+            For the same chunks, only one mean and the co-moments (variance matrix) are returned.
+        """
+        mean_a = np.mean(chunk_a, axis=TIME_DIM, dtype=np.float64)
+        centered_a = chunk_a - mean_a
+        if chunk_a is chunk_b:
+            return chunk_a.shape[TIME_DIM], mean_a, np.einsum('tfc,tgc->cfg', centered_a, centered_a)
+
+        mean_b = np.mean(chunk_b, axis=TIME_DIM, dtype=np.float64)
+        centered_b = chunk_b - mean_b
+        comoments = np.asarray([np.einsum('tfc,tgc->cfg', centered_a, centered_a),
+                                np.einsum('tfc,tgc->cfg', centered_a, centered_b)])
+        return chunk_a.shape[TIME_DIM], np.asarray([mean_a, mean_b]), comoments
+
+    @staticmethod
+    def _merge(statistics_a: tuple, statistics_b: tuple) -> tuple:
+        """
+        Merge two statistics (n_samples, means, co-moments) with the pairwise update formulae.
+        The means can be stacked (2, feature_dim, combine_dim) with the co-moments (2, combine_dim, ...)
+        of (a, a) and (a, b).
+        """
+        n_a, mean_a, comoment_a = statistics_a
+        n_b, mean_b, comoment_b = statistics_b
+        if n_a == 0:
+            return n_b, mean_b, comoment_b
+
+        n = n_a + n_b
+        delta = mean_b - mean_a
+        mean = mean_a + delta * n_b / n
+        if delta.ndim == MATRIX_NDIM:
+            correction = np.einsum('fc,gc->cfg', delta, delta)
+        else:
+            correction = np.asarray([np.einsum('fc,gc->cfg', delta[0], delta[index]) for index in range(2)])
+        return n, mean, comoment_a + comoment_b + correction * n_a * n_b / n
+
+    @property
+    def std(self) -> np.ndarray:
+        """
+        Standard deviation (ddof=0) of the samples with shape (feature_dim, combine_dim) or (feature_dim,),
+        as np.std(axis=0).
+        """
+        return self._to_data_shape(self._std)
+
+    @property
+    def _std(self) -> np.ndarray:
+        variance = np.diagonal(self._comoment, axis1=1, axis2=2).T / self.n_samples
+        return np.sqrt(variance)
+
+    def _to_data_shape(self, array: np.ndarray) -> np.ndarray:
+        return array[:, 0] if self._ndim == MATRIX_NDIM else array
+
+    def covariance_tensor(self, lagged: bool = False, use_std: bool = True) -> np.ndarray:
+        """
+        Covariance matrices (as np.cov) of the (standardized) samples in each combined dimension.
+        :param lagged: Use only the samples, which have a time lagged partner (all but the last `lag_time`).
+        :param use_std: Scale the samples by their standard deviation.
+        :return: Covariance tensor with shape (combine_dim, feature_dim, feature_dim)
+        """
+        if lagged:
+            covariance = self._pair_comoments[0] / (self.n_pairs - 1)
+        else:
+            covariance = self._comoment / (self.n_samples - 1)
+        return self._scale(covariance, use_std)
+
+    def lagged_correlation_tensor(self, use_std: bool = True) -> np.ndarray:
+        """
+        Symmetrized time lagged correlation matrices sum_t x_t x_{t+lag_time}^T / n_pairs of the standardized
+        (centered by the mean of all the samples) data in each combined dimension.
+        :param use_std: Scale the samples by their standard deviation.
+        :return: Correlation tensor with shape (combine_dim, feature_dim, feature_dim)
+        """
+        delta_a, delta_b = self._pair_means - self._mean
+        correlation = (self._pair_comoments[1] / self.n_pairs +
+                       np.einsum('fc,gc->cfg', delta_a, delta_b))
+        correlation = self._scale(correlation, use_std)
+        return 0.5 * (correlation + np.swapaxes(correlation, 1, 2))
+
+    def _scale(self, tensor: np.ndarray, use_std: bool) -> np.ndarray:
+        if not use_std:
+            return tensor
+        std = self._std.T
+        return tensor / (std[:, :, np.newaxis] * std[:, np.newaxis, :])
@@ -0,0 +1,139 @@
+import hashlib
+import weakref
+from collections import OrderedDict
+
+import numpy as np
+
+from utils.param_keys.traj_dims import TIME_DIM
+
+
+class StageCache:
+    """
+    Bounded cache of intermediate results (stages) of model fits, with least recently used (LRU) eviction.
+
+    Sweeps over model configurations on the same input (e.g. `compare` or `grid_search`) recompute the same stages,
+    although most hyperparameters only change the later stages. While a cache is active (`with StageCache(): ...`),
+    DROPP looks up the standardized data, the combined covariance and correlation matrices and the fitted kernel
+    matrices in the cache. The entries are keyed by the identity of the input (see `input_key`)
+    and only by the hyperparameters, which the stage depends on.
+    The cached arrays are set read-only, since they are shared by all the models of the sweep.
+    The input data must not be modified in place while the cache is active (except by a fit with `copy=False`).
+    """
+    _active_caches = []
+
+    def __init__(self, max_size: int = 16):
+        """
+        :param max_size: Maximum number of entries. The least recently used entry is evicted first.
+        """
+        if max_size < 1:
+            raise ValueError(f'The maximum size of the cache ({max_size}) has to be positive.')
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._input_keys = {}
+
+    def __enter__(self):
+        StageCache._active_caches.append(self)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        StageCache._active_caches.remove(self)
+
+    def __len__(self):
+        return len(self._entries)
+
+    @classmethod
+    def active(cls):
+        """
+        :return: The innermost active cache, or None if no cache is active.
+        """
+        return cls._active_caches[-1] if cls._active_caches else None
+
+    def get(self, key: tuple, compute: callable):
+        """
+        Get the result of a stage from the cache, or compute and store it.
+        :param key: Hashable key of the stage, with the identity of its input and the hyperparameters it depends on
+        :param compute: Function without arguments, which calculates the result of the stage
+        :return: The (read-only) result of the stage
+        """
+        if key in self._entries:
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return self._entries[key]
+
+        self.misses += 1
+        value = compute()
+        for array in (value if isinstance(value, tuple) else (value,)):
+            if isinstance(array, np.ndarray):
+                array.flags.writeable = False
+        self._entries[key] = value
+        if len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+        return value
+
+    def clear(self):
+        """
+        Remove all the entries.
+        """
+        self._entries.clear()
+        self._input_keys.clear()
+
+    def input_key(self, array: np.ndarray) -> tuple:
+        """
+        Get the key of an input array, which identifies its content.
+        The analysers create a new view of the same trajectory data for every model, so the content is hashed
+        (see `fingerprint`) only for the first view of a memory region. The key is then remembered for the region
+        (data pointer, shape, strides and dtype) of the owning array, as long as the owning array is alive.
+        :param array: Input data
+        :return: Hashable key of the content (shape, dtype, digest)
+        """
+        root = self._owning_array(array)
+        region = (array.__array_interface__['data'][0], array.shape, array.strides, array.dtype.str)
+        reference, region_keys = self._input_keys.get(id(root), (None, None))
+        if reference is not None and reference() is root and region in region_keys:
+            return region_keys[region]
+
+        key = fingerprint(array)
+        if reference is None or reference() is not root:
+            reference, region_keys = weakref.ref(root, self._discard_input), {}
+            self._input_keys[id(root)] = (reference, region_keys)
+        region_keys[region] = key
+        return key
+
+    def forget(self, array: np.ndarray):
+        """
+        Forget the keys of the memory of an array, e.g. before it is modified in place.
+        :param array: Array (or a view of it)
+        """
+        self._input_keys.pop(id(self._owning_array(array)), None)
+
+    @staticmethod
+    def _owning_array(array: np.ndarray) -> np.ndarray:
+        while isinstance(array.base, np.ndarray):
+            array = array.base
+        return array
+
+    def _discard_input(self, reference: weakref.ref):
+        for root_id, (root_reference, _) in list(self._input_keys.items()):
+            if root_reference is reference:
+                del self._input_keys[root_id]
+
+
+def fingerprint(array: np.ndarray, block_bytes: int = 1 << 23) -> tuple:
+    """
+    Identify an array by its content, shape and dtype.
+    The data is hashed in blocks of samples, without a copy of the whole array for non-contiguous views.
+    :param array: Array to identify
+    :param block_bytes: Approximate size of the hashed blocks (default: 8 MiB)
+    :return: Hashable key (shape, dtype, digest)
+    """
+    digest = hashlib.sha1(usedforsecurity=False)
+    if array.ndim == 0 or array.size == 0:
+        digest.update(array.tobytes())
+    else:
+        sample_bytes = max(1, array[0].nbytes)
+        step = max(1, block_bytes // sample_bytes)
+        for start in range(0, array.shape[TIME_DIM], step):
+            digest.update(np.ascontiguousarray(array[start:start + step]).data)
+    return array.shape, array.dtype.str, digest.hexdigest()
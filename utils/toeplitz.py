@@ -0,0 +1,161 @@
+import numpy as np
+import scipy.linalg
+
+
+def toeplitz_view(profile: np.ndarray, shape: tuple) -> np.ndarray:
+    """
+    Create a read-only Toeplitz matrix view of a diagonal profile.
+
+    The entry (i, j) of the matrix is the value of the diagonal j - i, which is stored in
+    `profile[j - i + n_rows - 1]` (in the order of `diagonal_indices`). Each row of the view starts one element
+    before the previous row in the profile, so no entry of the matrix is copied.
+
+    Parameters
+    ----------
+    profile : ndarray
+        One-dimensional values of the diagonals with the length n_rows + n_columns - 1.
+    shape : tuple
+        Shape (n_rows, n_columns) of the matrix.
+
+    Returns
+    -------
+    ndarray
+        Read-only view with the given shape.
+
+    Raises
+    ------
+    ValueError
+        If the profile does not have one value for each diagonal of the shape.
+
+    """
+    n_rows, n_columns = shape
+    if profile.ndim != 1 or len(profile) != max(0, n_rows + n_columns - 1):
+        raise ValueError(f'The profile with the shape {profile.shape} does not have a value for each of the '
+                         f'{n_rows + n_columns - 1} diagonals of a matrix with the shape {shape}.')
+    if n_rows == 0 or n_columns == 0:
+        return np.empty(shape, dtype=profile.dtype)
+
+    profile = np.ascontiguousarray(profile)
+    return np.lib.stride_tricks.as_strided(profile[n_rows - 1:], shape=(n_rows, n_columns),
+                                           strides=(-profile.itemsize, profile.itemsize), writeable=False)
+
+
+class ToeplitzMatrix:
+    """
+    Lazy Toeplitz matrix, which stores only the values of its diagonals.
+
+    The fitted kernel matrices are constant along their diagonals, so they are fully described by the fitted
+    kernel curve of length n_rows + n_columns - 1. The matrix can be used as an operand of numpy functions,
+    e.g. `covariance_matrix -= kernel_matrix` or `covariance_matrix *= kernel_matrix`, which read the strided view
+    (`toeplitz_view`) without creating the dense matrix. `toarray` creates the dense matrix and `matvec` multiplies
+    the matrix with vectors via FFT in O(n log n).
+    """
+    ndim = 2
+
+    def __init__(self, profile: np.ndarray, shape: tuple, dtype=None):
+        """
+        Parameters
+        ----------
+        profile : ndarray
+            Values of the diagonals in the order of `diagonal_indices`, from the lower left to the upper right.
+        shape : tuple
+            Shape (n_rows, n_columns) of the matrix.
+        dtype : data-type, optional
+            Data type of the matrix. Default is the data type of the profile.
+        """
+        self.shape = tuple(shape)
+        self.profile = np.array(profile, dtype=dtype)
+        self.profile.flags.writeable = False
+        toeplitz_view(self.profile, self.shape)  # validates the length of the profile
+
+    def __repr__(self):
+        return f'ToeplitzMatrix(shape={self.shape}, dtype={self.dtype})'
+
+    def __array__(self, dtype=None, copy=None):
+        view = toeplitz_view(self.profile, self.shape)
+        if copy or (dtype is not None and np.dtype(dtype) != view.dtype):
+            return np.array(view, dtype=dtype)
+        return view
+
+    def __matmul__(self, other):
+        return self.matvec(other)
+
+    @property
+    def dtype(self) -> np.dtype:
+        return self.profile.dtype
+
+    @property
+    def first_column(self) -> np.ndarray:
+        return self.profile[self.shape[0] - 1::-1]
+
+    @property
+    def first_row(self) -> np.ndarray:
+        return self.profile[self.shape[0] - 1:]
+
+    @property
+    def bandwidth(self) -> int:
+        """
+        Returns
+        -------
+        int
+            The largest distance of a diagonal with a non-zero value to the main diagonal,
+            or 0 for a diagonal or zero matrix. It is read from the profile in O(n).
+        """
+        non_zero = np.flatnonzero(self.profile)
+        if len(non_zero) == 0:
+            return 0
+        return int(np.max(np.abs(non_zero - (self.shape[0] - 1))))
+
+    def lower_band(self, bandwidth: int) -> np.ndarray:
+        """
+        Store the lower band of the square matrix in the LAPACK lower banded form of `scipy.linalg.eig_banded`.
+
+        Parameters
+        ----------
+        bandwidth : int
+            Number of the stored lower diagonals (see `bandwidth`).
+
+        Returns
+        -------
+        ndarray
+            Banded matrix with the shape (bandwidth + 1, n), with `band[k, j] = matrix[j + k, j]`.
+        """
+        size = self.shape[0]
+        band = np.zeros((bandwidth + 1, size), dtype=self.dtype)
+        for k, value in enumerate(self.first_column[:bandwidth + 1]):
+            band[k, :size - k] = value
+        return band
+
+    def view(self) -> np.ndarray:
+        """
+        Returns
+        -------
+        ndarray
+            Read-only strided view of the matrix (see `toeplitz_view`).
+        """
+        return toeplitz_view(self.profile, self.shape)
+
+    def toarray(self) -> np.ndarray:
+        """
+        Returns
+        -------
+        ndarray
+            New dense (writeable) matrix.
+        """
+        return np.array(self.view())
+
+    def matvec(self, vectors: np.ndarray) -> np.ndarray:
+        """
+        Multiply the matrix with a vector or the columns of a matrix.
+
+        Parameters
+        ----------
+        vectors : ndarray
+            Vector with the shape (n_columns,) or matrix with the shape (n_columns, k).
+
+        Returns
+        -------
+        ndarray
+            The product with the shape (n_rows,) or (n_rows, k).
+        """
+        return scipy.linalg.matmul_toeplitz((self.first_column, self.first_row), vectors, check_finite=False)